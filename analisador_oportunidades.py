@@ -3,24 +3,31 @@
 # Objetivo: analisar dados do scraper e gerar ranking de oportunidades
 # ===============================================================
 
+import numpy as np
 import pandas as pd
 import logging
 import os
 import datetime
 import argparse
+import hashlib
+import json
+from contextlib import closing
+
+from armazenamento import ESQUEMA_EMPRESAS, carregar_tabela, concatenar_tabelas
+from banco_oportunidades import abrir_banco, caminho_sqlite, contar_oportunidades, upsert_oportunidades
+from cubo_comparativo import atualizar_cubo, caminho_cubo, carregar_cubo
+from deduplicacao import deduplicar_empresas
+from esquema_empresas import colunas_com_aliases, tipar_empresas
+from identificadores import COLUNA_ID
+from ingestao import mapear_em_paralelo
 
 # ---------------------------------------------------
-# 1. Configuração do logger
+# 1. Funções principais
 # ---------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()]
-)
 
-# ---------------------------------------------------
-# 2. Funções principais
-# ---------------------------------------------------
+# Projeção da leitura: colunas das métricas e as usadas na deduplicação (ver deduplicacao.py)
+COLUNAS_ANALISE = colunas_com_aliases(["cidade", "nicho", "nome", "nota", "reviews", COLUNA_ID, "endereco", "telefone"])
+
 
 def carregar_dados(input_file: str) -> pd.DataFrame:
     """Carrega e limpa os dados do CSV de entrada."""
@@ -28,7 +35,7 @@ def carregar_dados(input_file: str) -> pd.DataFrame:
         logging.error(f"❌ Arquivo '{input_file}' não encontrado.")
         return pd.DataFrame()
 
-    df = pd.read_csv(input_file)
+    df = tipar_empresas(carregar_tabela(input_file, colunas=COLUNAS_ANALISE, esquema=ESQUEMA_EMPRESAS, formato="csv"))
 
     required_columns = ["cidade", "nicho", "nome", "nota", "reviews"]
     if not all(col in df.columns for col in required_columns):
@@ -36,9 +43,9 @@ def carregar_dados(input_file: str) -> pd.DataFrame:
         logging.error(f"❌ CSV de entrada '{input_file}' está faltando colunas obrigatórias: {', '.join(missing_cols)}.")
         return pd.DataFrame()
 
-    df["nota"] = pd.to_numeric(df["nota"], errors="coerce").fillna(0)
-    df["reviews"] = pd.to_numeric(df["reviews"], errors="coerce").fillna(0)
     df = df.dropna(subset=["nome"])
+    # A mesma empresa com grafias diferentes contaria duas vezes em "empresas" e distorceria o score
+    df = deduplicar_empresas(df, por=["nicho"])
 
     if df.empty:
         logging.warning(f"⚠️ Após a limpeza, nenhum registro válido permaneceu em '{input_file}'.")
@@ -49,22 +56,32 @@ def carregar_dados(input_file: str) -> pd.DataFrame:
 
 def gerar_metricas(df: pd.DataFrame) -> pd.DataFrame:
     """Gera métricas agregadas por cidade e nicho."""
+    # Indicadores booleanos calculados uma vez sobre a coluna inteira; a média por grupo vira um agregado nativo
+    df = df.assign(
+        _baixa_qualidade=(df["nota"] < 4).astype("float64"),
+        _sem_reviews=(df["reviews"].isna() | (df["reviews"] == 0)).astype("float64"),
+    )
     resumo = (
-        df.groupby(["cidade", "nicho"])
+        df.groupby(["cidade", "nicho"], observed=True)
         .agg(
             empresas=("nome", "count"),
             nota_media=("nota", "mean"),
             total_reviews=("reviews", "sum"),
-            pct_baixa_qualidade=("nota", lambda x: (x < 4).mean() * 100),
-            pct_sem_reviews=("reviews", lambda x: (x.isna() | (x == 0)).mean() * 100),
+            pct_baixa_qualidade=("_baixa_qualidade", "mean"),
+            pct_sem_reviews=("_sem_reviews", "mean"),
         )
         .reset_index()
     )
+    resumo["pct_baixa_qualidade"] *= 100
+    resumo["pct_sem_reviews"] *= 100
     return resumo
 
 
 def calcular_score(row, pesos):
-    """Cálculo ajustado e normalizado do score de oportunidade."""
+    """
+    Cálculo ajustado e normalizado do score de oportunidade (linha a linha).
+    Mantido como implementação de referência de `calcular_scores_vetorizado`.
+    """
     demanda = min(row["total_reviews"] / 50, 1.0)
     concorrencia = 1 - min(row["empresas"] / 20, 1.0)
     satisfacao_inversa = (5 - (row["nota_media"] or 0)) / 5
@@ -78,7 +95,10 @@ def calcular_score(row, pesos):
     return round(max(0, min(score, 1)), 3)  
 
 def classificar(score, limites):
-    """Classifica o score em Alta, Média ou Baixa."""
+    """
+    Classifica o score em Alta, Média ou Baixa (valor a valor).
+    Mantido como implementação de referência de `classificar_vetorizado`.
+    """
     if score >= limites["alta"]:
         return "Alta"
     elif score >= limites["media"]:
@@ -86,78 +106,223 @@ def classificar(score, limites):
     return "Baixa"
 
 
+def calcular_scores_vetorizado(resumo: pd.DataFrame, pesos) -> np.ndarray:
+    """Calcula o score de oportunidade de todos os grupos de uma vez, em operações NumPy sobre colunas inteiras."""
+    total_reviews = resumo["total_reviews"].to_numpy(dtype="float64")
+    empresas = resumo["empresas"].to_numpy(dtype="float64")
+    nota_media = resumo["nota_media"].to_numpy(dtype="float64")
+
+    demanda = np.minimum(total_reviews / 50, 1.0)
+    concorrencia = 1 - np.minimum(empresas / 20, 1.0)
+    satisfacao_inversa = (5 - nota_media) / 5
+
+    score = (
+        (demanda * pesos["demanda"]) +
+        (concorrencia * pesos["concorrencia"]) +
+        (satisfacao_inversa * pesos["satisfacao"])
+    )
+    # Assim como em `calcular_score`, um score indefinido (NaN) é tratado como 0
+    score = np.where(np.isnan(score), 0.0, np.clip(score, 0, 1))
+    return np.round(score, 3)
+
+
+def classificar_vetorizado(scores, limites) -> np.ndarray:
+    """Classifica um vetor de scores em Alta, Média ou Baixa com `np.select`."""
+    scores = np.asarray(scores, dtype="float64")
+    return np.select(
+        [scores >= limites["alta"], scores >= limites["media"]],
+        ["Alta", "Média"],
+        default="Baixa",
+    )
+
+
+def pontuar_resumo(resumo: pd.DataFrame, pesos, limites) -> pd.DataFrame:
+    """Adiciona as colunas score_oportunidade e classificacao ao resumo agregado."""
+    resumo["score_oportunidade"] = calcular_scores_vetorizado(resumo, pesos)
+    resumo["classificacao"] = classificar_vetorizado(resumo["score_oportunidade"], limites)
+    return resumo
+
+
 def salvar_oportunidades_db(df_novo: pd.DataFrame, output_db_file: str):
-    """Salva ou anexa o ranking de oportunidades ao arquivo mestre, removendo duplicatas e mantendo o mais recente."""
-    os.makedirs(os.path.dirname(output_db_file), exist_ok=True)
-
-    if os.path.exists(output_db_file):
-        df_existente = pd.read_csv(output_db_file)
-        df_combinado = pd.concat([df_existente, df_novo], ignore_index=True)
-        # Remover duplicatas, mantendo a última entrada (mais recente)
-        df_final = df_combinado.drop_duplicates(subset=["cidade", "nicho"], keep="last")
-        logging.info(f"📊 {len(df_novo)} novas oportunidades combinadas com {len(df_existente)} existentes. Total após remoção de duplicatas: {len(df_final)}.")
+    """
+    Insere ou atualiza o ranking no índice SQLite (upsert por cidade/nicho, o mais recente prevalece)
+    e aplica os mesmos pares ao cubo comparativo (cubo_comparativo.py). A visão oportunidades.db.csv
+    não é regravada aqui: o consolidar e os relatórios a regeneram quando está desatualizada.
+    """
+    cubo = carregar_cubo(output_db_file) if os.path.exists(caminho_cubo(output_db_file)) else None
+    with closing(abrir_banco(output_db_file)) as conn:
+        total_antes = contar_oportunidades(conn)
+        upsert_oportunidades(conn, df_novo)
+        total_depois = contar_oportunidades(conn)
+        logging.info(f"📊 {len(df_novo)} oportunidades inseridas/atualizadas ({total_depois - total_antes} novas). Total no banco: {total_depois}.")
+    atualizar_cubo(output_db_file, df_novo, cubo)
+    logging.info(f"✅ Oportunidades salvas/atualizadas no índice: {caminho_sqlite(output_db_file)}")
+
+
+def caminho_manifesto(output_db_file: str) -> str:
+    """Retorna o caminho do manifesto de arquivos processados, mantido ao lado do banco de oportunidades."""
+    base = output_db_file[:-len(".db.csv")] if output_db_file.endswith(".db.csv") else os.path.splitext(output_db_file)[0]
+    return f"{base}.manifest.json"
+
+
+def calcular_hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo, lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def carregar_manifesto(manifest_file: str) -> dict:
+    """Carrega o manifesto (caminho -> tamanho, mtime, hash e agregados por grupo). Retorna vazio se inválido."""
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f).get("arquivos", {})
+    except (OSError, ValueError) as e:
+        logging.warning(f"⚠️ Manifesto '{manifest_file}' ilegível ({e}). Todos os arquivos serão reprocessados.")
+        return {}
+
+
+def salvar_manifesto(arquivos: dict, manifest_file: str):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    tmp_file = f"{manifest_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump({"versao": 1, "arquivos": arquivos}, f, ensure_ascii=False)
+    os.replace(tmp_file, manifest_file)
+
+
+def listar_arquivos_empresas(input_dir: str) -> list[str]:
+    """Lista, em ordem, os arquivos dados_empresas_*.csv do diretório de entrada."""
+    return [
+        os.path.join(input_dir, filename)
+        for filename in sorted(os.listdir(input_dir))
+        if filename.startswith("dados_empresas_") and filename.endswith(".csv")
+    ]
+
+
+def agregar_arquivo(input_file_path: str) -> pd.DataFrame:
+    """Carrega um arquivo de empresas e retorna seus agregados por (cidade, nicho), sem score."""
+    df = carregar_dados(input_file_path)
+    if df.empty:
+        return pd.DataFrame()
+    return gerar_metricas(df)
+
+
+def analisar_diretorio(input_dir: str, output_db_file: str, pesos, limites, completo: bool = False,
+                       workers: int | None = None) -> pd.DataFrame:
+    """
+    Analisa os arquivos de empresas de forma incremental.
+
+    Apenas arquivos novos ou modificados (segundo o manifesto) são carregados e agregados, em paralelo
+    (ver ingestao.mapear_em_paralelo), e somente os seus grupos são mesclados ao banco de oportunidades.
+    Arquivos inalterados reaproveitam os agregados do manifesto.
+    Retorna o resumo pontuado de todos os arquivos presentes no diretório.
+    """
+    manifest_file = caminho_manifesto(output_db_file)
+    manifesto_anterior = {} if completo else carregar_manifesto(manifest_file)
+    manifesto = {}
+    pendentes = []
+    manifesto_mudou = False
+
+    # 1ª passada: decide pelo manifesto (tamanho/mtime e, se preciso, hash) quais arquivos reprocessar
+    for input_file_path in listar_arquivos_empresas(input_dir):
+        chave = os.path.abspath(input_file_path)
+        stat = os.stat(input_file_path)
+        entrada = manifesto_anterior.get(chave)
+
+        if entrada and entrada["tamanho"] == stat.st_size and entrada["mtime_ns"] == stat.st_mtime_ns:
+            logging.debug(f"Arquivo inalterado (tamanho/mtime): {input_file_path}")
+            manifesto[chave] = entrada
+            continue
+
+        manifesto_mudou = True
+        sha256 = calcular_hash_arquivo(input_file_path)
+        if entrada and entrada["sha256"] == sha256:
+            logging.info(f"Arquivo com mtime alterado mas conteúdo idêntico: {os.path.basename(input_file_path)}")
+            manifesto[chave] = {**entrada, "tamanho": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        else:
+            logging.info(f"Processando arquivo: {os.path.basename(input_file_path)}")
+            manifesto[chave] = {"tamanho": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256, "resumo": []}
+            pendentes.append(input_file_path)
+
+    # 2ª passada: carrega e agrega os arquivos alterados em paralelo; o pai só recebe os agregados
+    resumos_alterados = []
+    for input_file_path, resumo in zip(pendentes, mapear_em_paralelo(agregar_arquivo, pendentes, workers)):
+        if not resumo.empty:
+            resumos_alterados.append(resumo)
+            manifesto[os.path.abspath(input_file_path)]["resumo"] = json.loads(resumo.to_json(orient="records", force_ascii=False))
+
+    removidos = set(manifesto_anterior) - set(manifesto)
+    if removidos:
+        logging.info(f"🗑️ {len(removidos)} arquivo(s) não existem mais e foram removidos do manifesto.")
+        manifesto_mudou = True
+
+    if resumos_alterados:
+        resumo_alterado_df = pontuar_resumo(concatenar_tabelas(resumos_alterados), pesos, limites)
+        resumo_alterado_df = resumo_alterado_df.sort_values("score_oportunidade", ascending=False)
+        salvar_oportunidades_db(resumo_alterado_df, output_db_file)
     else:
-        df_final = df_novo
-        logging.info(f"🆕 Criando novo arquivo de oportunidades com {len(df_final)} registros.")
+        logging.info("✅ Nenhum arquivo novo ou modificado. Banco de oportunidades mantido sem alterações.")
 
-    df_final.to_csv(output_db_file, index=False, encoding="utf-8-sig")
-    logging.info(f"✅ Oportunidades salvas/atualizadas em: {output_db_file}")
+    if manifesto_mudou:
+        salvar_manifesto(manifesto, manifest_file)
+    logging.info(f"📑 {len(pendentes)} arquivo(s) reprocessado(s), {len(manifesto) - len(pendentes)} reaproveitado(s) do manifesto.")
+
+    resumos_todos = [pd.DataFrame(entrada["resumo"]) for entrada in manifesto.values() if entrada["resumo"]]
+    if not resumos_todos:
+        return pd.DataFrame()
+    final_resumo_df = pontuar_resumo(pd.concat(resumos_todos, ignore_index=True), pesos, limites)
+    return final_resumo_df.sort_values("score_oportunidade", ascending=False)
 
 
 # ---------------------------------------------------
-# 3. Execução principal
+# 2. Execução principal
 # ---------------------------------------------------
-def main():
+def main(argv: list[str] | None = None):
     """Função principal para analisar os dados de empresas e gerar o ranking de oportunidades."""
     parser = argparse.ArgumentParser(description="Analisador de oportunidades de negócios.")
     parser.add_argument("--input_dir", type=str, default=os.path.join(os.getcwd(), "results", "csv"),
                         help="Diretório contendo os arquivos CSV de dados de empresas.")
-    args = parser.parse_args()
+    parser.add_argument("--completo", action="store_true",
+                        help="Ignora o manifesto e reprocessa todos os arquivos do diretório de entrada.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos para carregar os arquivos em paralelo (padrão: OPORTUNIDADES_WORKERS ou nº de CPUs).")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
 
     output_db_file = os.path.join(os.getcwd(), "data", "oportunidades.db.csv")
 
     pesos = {"demanda": 0.4, "concorrencia": 0.3, "satisfacao": 0.3}
     limites = {"alta": 0.66, "media": 0.4}
 
-    all_resumo_dfs = []
-
-    # Iterar sobre os arquivos CSV no diretório de entrada
-    for filename in os.listdir(args.input_dir):
-        if filename.startswith("dados_empresas_") and filename.endswith(".csv"):
-            input_file_path = os.path.join(args.input_dir, filename)
-            logging.info(f"Processando arquivo: {filename}")
-            df = carregar_dados(input_file_path)
-            if df.empty:
-                continue
+    final_resumo_df = analisar_diretorio(args.input_dir, output_db_file, pesos, limites, completo=args.completo,
+                                         workers=args.workers)
 
-            resumo = gerar_metricas(df)
-            resumo["score_oportunidade"] = resumo.apply(lambda r: calcular_score(r, pesos), axis=1)
-            resumo["classificacao"] = resumo["score_oportunidade"].apply(lambda s: classificar(s, limites))
-            all_resumo_dfs.append(resumo)
-
-    if not all_resumo_dfs:
+    if final_resumo_df.empty:
         logging.warning("⚠️ Nenhum arquivo de dados de empresas encontrado para processar.")
         return
 
-    final_resumo_df = pd.concat(all_resumo_dfs, ignore_index=True)
-    final_resumo_df = final_resumo_df.sort_values("score_oportunidade", ascending=False)
-    
-    salvar_oportunidades_db(final_resumo_df, output_db_file)
-
-    # Log de insights (apenas para o último conjunto de dados processado ou um resumo geral)
-    if not final_resumo_df.empty:
-        media = final_resumo_df["score_oportunidade"].mean()
-        top = final_resumo_df.iloc[0]
-        altas = (final_resumo_df["classificacao"] == "Alta").sum()
-
-        logging.info("\n📊 RESUMO DE INSIGHTS GERAIS")
-        logging.info(f"- Nichos analisados: {len(final_resumo_df)}")
-        logging.info(f"- Score médio geral: {media:.2f}")
-        logging.info(f"- Nichos 'Alta': {altas}")
-        logging.info(f"- Melhor nicho: {top['nicho']} (Score {top['score_oportunidade']:.2f}) na cidade {top['cidade']}")
-
-        if altas == 0:
-            logging.warning("⚠️ Nenhum nicho com score alto neste dataset geral.")
+    # Log de insights (resumo geral de todos os arquivos do diretório)
+    media = final_resumo_df["score_oportunidade"].mean()
+    top = final_resumo_df.iloc[0]
+    altas = (final_resumo_df["classificacao"] == "Alta").sum()
+
+    logging.info("\n📊 RESUMO DE INSIGHTS GERAIS")
+    logging.info(f"- Nichos analisados: {len(final_resumo_df)}")
+    logging.info(f"- Score médio geral: {media:.2f}")
+    logging.info(f"- Nichos 'Alta': {altas}")
+    logging.info(f"- Melhor nicho: {top['nicho']} (Score {top['score_oportunidade']:.2f}) na cidade {top['cidade']}")
+
+    if altas == 0:
+        logging.warning("⚠️ Nenhum nicho com score alto neste dataset geral.")
 
 
 if __name__ == "__main__":
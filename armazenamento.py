@@ -0,0 +1,317 @@
+# ===============================================================
+# armazenamento.py
+# Objetivo: camada de persistência das tabelas do pipeline (CSV ou Parquet)
+# ===============================================================
+#
+# O formato é escolhido pela variável de ambiente OPORTUNIDADES_FORMATO ("csv" ou "parquet", padrão "csv").
+# Os chamadores sempre informam o caminho lógico em CSV (ex.: data/oportunidades.db.csv); no modo Parquet
+# o arquivo físico é o mesmo caminho com extensão .parquet. Com OPORTUNIDADES_EXPORTAR_CSV=1 uma cópia
+# CSV também é gravada para consumidores que ainda leem CSV.
+
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from esquema_empresas import TIPOS_EMPRESA
+
+FORMATOS_SUPORTADOS = ("csv", "parquet")
+
+# ---------------------------------------------------
+# 1. Esquemas (dtypes fixos por tabela)
+# ---------------------------------------------------
+# Colunas de poucos valores repetidos em muitas linhas (cidade, nicho, classificação) são category:
+# cada texto fica uma vez na memória e as linhas guardam só um código inteiro.
+ESQUEMA_OPORTUNIDADES = {
+    "cidade": "category",
+    "nicho": "category",
+    "empresas": "Int64",
+    "nota_media": "float64",
+    "total_reviews": "float64",
+    "pct_baixa_qualidade": "float64",
+    "pct_sem_reviews": "float64",
+    "score_oportunidade": "float64",
+    "classificacao": "category",
+}
+
+ESQUEMA_EMPRESAS = dict(TIPOS_EMPRESA) # Ver esquema_empresas.py
+
+ESQUEMA_RELATORIO_COMPARATIVO = {
+    "Nicho": "string",
+    "Nº de cidades analisadas": "Int64",
+    "Média do score": "float64",
+    "Desvio padrão": "float64",
+    "Replicabilidade (%)": "float64",
+}
+
+_TIPOS_NUMERICOS = ("Int64", "int64", "int32", "float64", "float32")
+
+# ---------------------------------------------------
+# 2. Configuração
+# ---------------------------------------------------
+
+def formato_configurado() -> str:
+    """Retorna o formato de armazenamento configurado (OPORTUNIDADES_FORMATO), validando o valor."""
+    load_dotenv()
+    formato = os.getenv("OPORTUNIDADES_FORMATO", "csv").strip().lower()
+    if formato not in FORMATOS_SUPORTADOS:
+        raise ValueError(f"Formato de armazenamento '{formato}' inválido. Use um de: {', '.join(FORMATOS_SUPORTADOS)}.")
+    return formato
+
+
+def exportar_csv_configurado() -> bool:
+    """Indica se uma cópia CSV deve ser exportada junto do formato colunar (OPORTUNIDADES_EXPORTAR_CSV)."""
+    load_dotenv()
+    return os.getenv("OPORTUNIDADES_EXPORTAR_CSV", "0").strip().lower() in ("1", "true", "sim", "yes")
+
+
+def resolver_caminho(caminho: str, formato: str) -> str:
+    """Converte o caminho lógico (.csv) no caminho físico do formato informado."""
+    if formato == "csv":
+        return caminho
+    base = caminho[:-len(".csv")] if caminho.endswith(".csv") else caminho
+    return f"{base}.{formato}"
+
+
+def _exigir_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("O formato 'parquet' requer o pacote 'pyarrow' (pip install pyarrow).") from e
+
+# ---------------------------------------------------
+# 3. Leitura e escrita
+# ---------------------------------------------------
+
+def aplicar_esquema(df: pd.DataFrame, esquema: dict | None) -> pd.DataFrame:
+    """Converte as colunas presentes no DataFrame para os dtypes fixos do esquema."""
+    if not esquema:
+        return df
+    for coluna, dtype in esquema.items():
+        if coluna not in df.columns or df[coluna].dtype == dtype:
+            continue
+        if dtype in _TIPOS_NUMERICOS:
+            valores = pd.to_numeric(df[coluna], errors="coerce")
+            if dtype in ("int32", "int64"): # Inteiros sem suporte a nulos: ausente conta como zero
+                valores = valores.fillna(0)
+            if dtype in ("Int64", "int32", "int64"):
+                valores = valores.round()
+            df[coluna] = valores.astype(dtype)
+        else:
+            df[coluna] = df[coluna].astype(dtype)
+    return df
+
+
+def memoria_sem_otimizacao(df: pd.DataFrame) -> int:
+    """
+    Estima os bytes que o DataFrame ocuparia lido sem dtypes (o que um pd.read_csv puro produz):
+    texto e categorias como object, com um objeto str por linha, e números em 64 bits.
+    """
+    total = 0
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tamanhos = np.array([sys.getsizeof(str(c)) for c in serie.cat.categories] + [0], dtype="int64")
+            total += 8 * len(serie) + int(tamanhos[serie.cat.codes.to_numpy()].sum()) # código -1 (nulo) -> 0
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            total += 8 * len(serie)
+        else:
+            total += int(serie.memory_usage(deep=True, index=False))
+    return total
+
+
+def relatar_memoria(df: pd.DataFrame, rotulo: str) -> tuple[int, int]:
+    """Registra no log a memória do DataFrame e quanto os dtypes declarados economizaram. Retorna (atual, sem otimização)."""
+    atual = int(df.memory_usage(deep=True, index=False).sum())
+    sem_otimizacao = memoria_sem_otimizacao(df)
+    logging.info(
+        f"🧮 {rotulo}: {len(df)} linhas em {atual / 2**20:.2f} MiB "
+        f"({(sem_otimizacao - atual) / 2**20:.2f} MiB a menos que sem dtypes)."
+    )
+    return atual, sem_otimizacao
+
+
+def concatenar_tabelas(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    pd.concat que preserva as colunas category: as categorias das partes são unidas antes, senão
+    partes com categorias diferentes fariam a coluna voltar a ser object.
+    """
+    categoricas = {c for df in dfs for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    for coluna in categoricas:
+        partes = [df[coluna].astype("category").cat.categories for df in dfs if coluna in df.columns]
+        tipo = pd.CategoricalDtype(partes[0].append(partes[1:]).unique())
+        dfs = [df.assign(**{coluna: df[coluna].astype(tipo)}) if coluna in df.columns else df for df in dfs]
+    return pd.concat(dfs, ignore_index=True)
+
+
+def existe_tabela(caminho: str, formato: str | None = None) -> bool:
+    """Indica se a tabela existe no formato configurado ou, como alternativa, em CSV."""
+    formato = formato or formato_configurado()
+    return os.path.exists(resolver_caminho(caminho, formato)) or os.path.exists(caminho)
+
+
+def carregar_tabela(caminho: str, colunas: list[str] | None = None, esquema: dict | None = None,
+                    formato: str | None = None) -> pd.DataFrame:
+    """
+    Carrega uma tabela do pipeline, lendo apenas as colunas pedidas (projeção, na ordem pedida) quando informadas.
+    No CSV, texto e categorias do esquema são declarados ao parser (sem passar por colunas object) e inteiros
+    Int64 são lidos como texto, para não perderem precisão em float64. A memória economizada vai para o log.
+    Se o formato configurado for colunar e o arquivo ainda não existir nele, lê a versão CSV.
+    Lança FileNotFoundError se a tabela não existir em nenhum formato.
+    """
+    formato = formato or formato_configurado()
+    caminho_fisico = resolver_caminho(caminho, formato)
+
+    if formato == "parquet" and os.path.exists(caminho_fisico):
+        _exigir_pyarrow()
+        if colunas is not None:
+            import pyarrow.parquet as pq
+            disponiveis = set(pq.read_schema(caminho_fisico).names)
+            colunas = [c for c in colunas if c in disponiveis]
+        df = pd.read_parquet(caminho_fisico, columns=colunas)
+    elif os.path.exists(caminho):
+        if formato != "csv":
+            logging.info(f"ℹ️ '{caminho_fisico}' não encontrado. Lendo a versão CSV '{caminho}'.")
+        usecols = (lambda c: c in set(colunas)) if colunas is not None else None
+        dtypes = {
+            coluna: ("string" if dtype == "Int64" else dtype)
+            for coluna, dtype in (esquema or {}).items() if dtype in ("category", "string", "Int64")
+        }
+        df = pd.read_csv(caminho, usecols=usecols, dtype=dtypes)
+    else:
+        raise FileNotFoundError(caminho_fisico)
+
+    if colunas is not None:
+        df = df[[c for c in colunas if c in df.columns]]
+    df = aplicar_esquema(df, esquema)
+    if esquema:
+        relatar_memoria(df, os.path.basename(caminho_fisico))
+    return df
+
+
+def carregar_tabela_em_partes(caminho: str, tamanho_parte: int, colunas: list[str] | None = None,
+                              esquema: dict | None = None, formato: str | None = None):
+    """
+    Gera a tabela em partes de até `tamanho_parte` linhas, com a mesma projeção e os mesmos dtypes de
+    `carregar_tabela`, sem carregá-la inteira. No Parquet, lê por lotes (iter_batches).
+    Lança FileNotFoundError (ao pedir a primeira parte) se a tabela não existir em nenhum formato.
+    """
+    formato = formato or formato_configurado()
+    caminho_fisico = resolver_caminho(caminho, formato)
+
+    if formato == "parquet" and os.path.exists(caminho_fisico):
+        _exigir_pyarrow()
+        import pyarrow.parquet as pq
+        arquivo = pq.ParquetFile(caminho_fisico)
+        if colunas is not None:
+            colunas = [c for c in colunas if c in set(arquivo.schema_arrow.names)]
+        partes = (lote.to_pandas() for lote in arquivo.iter_batches(batch_size=tamanho_parte, columns=colunas))
+    elif os.path.exists(caminho):
+        usecols = (lambda c: c in set(colunas)) if colunas is not None else None
+        dtypes = {
+            coluna: ("string" if dtype == "Int64" else dtype)
+            for coluna, dtype in (esquema or {}).items() if dtype in ("category", "string", "Int64")
+        }
+        partes = pd.read_csv(caminho, usecols=usecols, dtype=dtypes, chunksize=tamanho_parte)
+    else:
+        raise FileNotFoundError(caminho_fisico)
+
+    for df in partes:
+        if colunas is not None:
+            df = df[[c for c in colunas if c in df.columns]]
+        yield aplicar_esquema(df, esquema)
+
+
+def salvar_tabela(df: pd.DataFrame, caminho: str, esquema: dict | None = None, formato: str | None = None,
+                  exportar_csv: bool | None = None) -> str:
+    """
+    Salva uma tabela do pipeline no formato configurado, com dtypes fixos do esquema.
+    Retorna o caminho físico gravado. No modo colunar, `exportar_csv` grava também a cópia CSV.
+    """
+    formato = formato or formato_configurado()
+    if exportar_csv is None:
+        exportar_csv = exportar_csv_configurado()
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+    df = aplicar_esquema(df.copy(), esquema)
+    caminho_fisico = resolver_caminho(caminho, formato)
+
+    if formato == "parquet":
+        _exigir_pyarrow()
+        df.to_parquet(caminho_fisico, index=False)
+        if exportar_csv:
+            df.to_csv(caminho, index=False, encoding="utf-8-sig")
+            logging.info(f"📤 Cópia CSV exportada em: {caminho}")
+    else:
+        df.to_csv(caminho_fisico, index=False, encoding="utf-8-sig")
+    return caminho_fisico
+
+
+class EscritorTabela:
+    """
+    Grava uma tabela em partes no formato configurado, sem manter a tabela inteira em memória.
+    As colunas são fixadas na criação; cada parte é reindexada para elas antes da escrita.
+    """
+
+    def __init__(self, caminho: str, colunas: list[str], esquema: dict | None = None, formato: str | None = None,
+                 exportar_csv: bool | None = None):
+        self.formato = formato or formato_configurado()
+        self.exportar_csv = exportar_csv_configurado() if exportar_csv is None else exportar_csv
+        self.caminho = caminho
+        self.caminho_fisico = resolver_caminho(caminho, self.formato)
+        self.colunas = list(colunas)
+        # Colunas fora do esquema são gravadas como texto, para que o tipo não varie entre as partes;
+        # category também vira texto, pois o dicionário de cada parte seria diferente no Parquet
+        self.esquema = {coluna: (esquema or {}).get(coluna, "string") for coluna in self.colunas}
+        self.esquema = {coluna: ("string" if dtype == "category" else dtype) for coluna, dtype in self.esquema.items()}
+        self.linhas_escritas = 0
+        self._csv_iniciado = False
+        self._parquet_writer = None
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        if self.formato == "parquet":
+            _exigir_pyarrow()
+
+    def escrever(self, df: pd.DataFrame):
+        """Acrescenta uma parte ao arquivo de saída."""
+        df = aplicar_esquema(df.reindex(columns=self.colunas), self.esquema)
+        if self.formato == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet_writer is None:
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                self._parquet_writer = pq.ParquetWriter(self.caminho_fisico, schema)
+            tabela = pa.Table.from_pandas(df, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(tabela)
+        if self.formato == "csv" or self.exportar_csv:
+            self._escrever_csv(df)
+        self.linhas_escritas += len(df)
+
+    def _escrever_csv(self, df: pd.DataFrame):
+        if self._csv_iniciado:
+            df.to_csv(self.caminho, mode="a", header=False, index=False, encoding="utf-8")
+        else:
+            df.to_csv(self.caminho, mode="w", header=True, index=False, encoding="utf-8-sig")
+            self._csv_iniciado = True
+
+    def fechar(self) -> str:
+        """Finaliza o arquivo (gravando apenas o cabeçalho se nenhuma parte foi escrita) e retorna o caminho físico."""
+        if self.linhas_escritas == 0:
+            self.escrever(pd.DataFrame(columns=self.colunas))
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        return self.caminho_fisico
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
@@ -0,0 +1,286 @@
+# ===============================================================
+# banco_oportunidades.py
+# Objetivo: índice de oportunidades em SQLite, com upsert por (cidade, nicho)
+# ===============================================================
+#
+# A tabela `oportunidades` tem índice único em (cidade, nicho) e é atualizada com
+# INSERT ... ON CONFLICT DO UPDATE, sem recarregar nem reescrever o banco inteiro.
+# As tabelas `historico_oportunidades` e `historico_execucoes` são append-only (UPDATE/DELETE
+# são bloqueados por triggers). O oportunidades.db.csv (ou .parquet) passa a ser uma visão
+# gerada a partir do SQLite para os consumidores existentes. Ela não é regravada a cada upsert:
+# a tabela `metadados` guarda a versão dos dados (incrementada no upsert) e a da última visão
+# exportada, e `garantir_visao` só a regenera quando está desatualizada (no consolidar e nos relatórios).
+
+import argparse
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from armazenamento import ESQUEMA_OPORTUNIDADES, carregar_tabela, existe_tabela, salvar_tabela
+
+COLUNAS_OPORTUNIDADES = list(ESQUEMA_OPORTUNIDADES) + ["timestamp_processamento"]
+CHAVE = ("cidade", "nicho")
+
+_TIPOS_SQL = {
+    "string": "TEXT",
+    "category": "TEXT",
+    "Int64": "INTEGER",
+    "float64": "REAL",
+}
+
+# ---------------------------------------------------
+# 1. Conexão e esquema
+# ---------------------------------------------------
+
+def caminho_sqlite(output_db_file: str) -> str:
+    """Retorna o caminho do arquivo SQLite correspondente ao banco lógico (ex.: data/oportunidades.sqlite)."""
+    base = output_db_file[:-len(".db.csv")] if output_db_file.endswith(".db.csv") else os.path.splitext(output_db_file)[0]
+    return f"{base}.sqlite"
+
+
+def criar_esquema(conn: sqlite3.Connection):
+    """Cria tabelas, índices e triggers de append-only, se ainda não existirem."""
+    colunas_sql = ",\n            ".join(
+        f'"{coluna}" {_TIPOS_SQL[dtype]}{" NOT NULL" if coluna in CHAVE else ""}'
+        for coluna, dtype in ESQUEMA_OPORTUNIDADES.items()
+    )
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS oportunidades (
+            {colunas_sql},
+            "timestamp_processamento" TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_oportunidades_cidade_nicho ON oportunidades (cidade, nicho);
+        CREATE INDEX IF NOT EXISTS ix_oportunidades_score ON oportunidades (score_oportunidade DESC);
+        CREATE INDEX IF NOT EXISTS ix_oportunidades_nicho_score ON oportunidades (nicho, score_oportunidade DESC);
+
+        CREATE TABLE IF NOT EXISTS historico_oportunidades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {colunas_sql},
+            "timestamp_processamento" TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_historico_cidade_nicho ON historico_oportunidades (cidade, nicho);
+
+        CREATE TABLE IF NOT EXISTS metadados (
+            chave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS historico_execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            cidades TEXT,
+            nichos TEXT,
+            novas_entradas INTEGER,
+            total_db INTEGER
+        );
+
+        CREATE TRIGGER IF NOT EXISTS tr_historico_oportunidades_sem_update BEFORE UPDATE ON historico_oportunidades
+        BEGIN SELECT RAISE(ABORT, 'historico_oportunidades é append-only'); END;
+        CREATE TRIGGER IF NOT EXISTS tr_historico_oportunidades_sem_delete BEFORE DELETE ON historico_oportunidades
+        BEGIN SELECT RAISE(ABORT, 'historico_oportunidades é append-only'); END;
+        CREATE TRIGGER IF NOT EXISTS tr_historico_execucoes_sem_update BEFORE UPDATE ON historico_execucoes
+        BEGIN SELECT RAISE(ABORT, 'historico_execucoes é append-only'); END;
+        CREATE TRIGGER IF NOT EXISTS tr_historico_execucoes_sem_delete BEFORE DELETE ON historico_execucoes
+        BEGIN SELECT RAISE(ABORT, 'historico_execucoes é append-only'); END;
+    """)
+
+
+def conectar(caminho: str) -> sqlite3.Connection:
+    """Abre (ou cria) o banco SQLite e garante o esquema."""
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    conn = sqlite3.connect(caminho)
+    conn.execute("PRAGMA journal_mode=WAL")
+    criar_esquema(conn)
+    return conn
+
+
+def abrir_banco(output_db_file: str) -> sqlite3.Connection:
+    """
+    Abre o SQLite do banco lógico informado. Na primeira abertura, importa o
+    oportunidades.db.csv (ou .parquet) legado, se existir.
+    """
+    conn = conectar(caminho_sqlite(output_db_file))
+    if contar_oportunidades(conn) == 0 and existe_tabela(output_db_file):
+        df_legado = carregar_tabela(output_db_file, esquema=ESQUEMA_OPORTUNIDADES)
+        if not df_legado.empty:
+            upsert_oportunidades(conn, df_legado, registrar_historico=False)
+            _marcar_visao(conn, _versao(conn, "versao_dados")) # A visão legada é a própria origem dos dados
+            logging.info(f"📦 {len(df_legado)} oportunidades importadas de '{output_db_file}' para o SQLite.")
+    return conn
+
+# ---------------------------------------------------
+# 2. Escrita
+# ---------------------------------------------------
+
+def _valor_sqlite(valor):
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat(sep=" ")
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+def upsert_oportunidades(conn: sqlite3.Connection, df: pd.DataFrame, registrar_historico: bool = True) -> int:
+    """
+    Insere ou atualiza as oportunidades por (cidade, nicho) com INSERT ... ON CONFLICT DO UPDATE.
+    Apenas as colunas presentes no DataFrame são atualizadas. Retorna o número de linhas processadas.
+    """
+    if df.empty:
+        return 0
+    df = df.copy()
+    if "timestamp_processamento" not in df.columns:
+        df["timestamp_processamento"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    colunas = [c for c in COLUNAS_OPORTUNIDADES if c in df.columns]
+    nomes = ", ".join(f'"{c}"' for c in colunas)
+    marcadores = ", ".join("?" for _ in colunas)
+    atualizacoes = ", ".join(f'"{c}" = excluded."{c}"' for c in colunas if c not in CHAVE)
+    linhas = [tuple(_valor_sqlite(v) for v in linha) for linha in df[colunas].itertuples(index=False, name=None)]
+
+    with conn:
+        conn.executemany(
+            f"INSERT INTO oportunidades ({nomes}) VALUES ({marcadores}) "
+            f"ON CONFLICT (cidade, nicho) DO UPDATE SET {atualizacoes}",
+            linhas,
+        )
+        if registrar_historico:
+            conn.executemany(f"INSERT INTO historico_oportunidades ({nomes}) VALUES ({marcadores})", linhas)
+        conn.execute("INSERT INTO metadados (chave, valor) VALUES ('versao_dados', 1) "
+                     "ON CONFLICT (chave) DO UPDATE SET valor = valor + 1")
+    return len(linhas)
+
+
+def _marcar_visao(conn: sqlite3.Connection, versao: int):
+    with conn:
+        conn.execute("INSERT INTO metadados (chave, valor) VALUES ('versao_visao', ?) "
+                     "ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor", (versao,))
+
+
+def registrar_execucao(conn: sqlite3.Connection, origem: str, cidades: list, nichos: list, novas_entradas: int) -> dict:
+    """Registra uma execução no histórico append-only e retorna o registro gravado."""
+    registro = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "origem": origem,
+        "cidades": str(cidades),
+        "nichos": str(nichos),
+        "novas_entradas": int(novas_entradas),
+        "total_db": contar_oportunidades(conn),
+    }
+    with conn:
+        conn.execute(
+            "INSERT INTO historico_execucoes (timestamp, origem, cidades, nichos, novas_entradas, total_db) "
+            "VALUES (:timestamp, :origem, :cidades, :nichos, :novas_entradas, :total_db)",
+            registro,
+        )
+    return registro
+
+# ---------------------------------------------------
+# 3. Consultas
+# ---------------------------------------------------
+
+def contar_oportunidades(conn: sqlite3.Connection) -> int:
+    """Retorna o número de pares (cidade, nicho) no banco."""
+    return conn.execute("SELECT COUNT(*) FROM oportunidades").fetchone()[0]
+
+
+def _versao(conn: sqlite3.Connection, chave: str) -> int:
+    linha = conn.execute("SELECT valor FROM metadados WHERE chave = ?", (chave,)).fetchone()
+    return linha[0] if linha else 0
+
+
+def versao_dados(output_db_file: str) -> int | None:
+    """Retorna a versão dos dados do SQLite (incrementada a cada upsert), ou None se não há SQLite."""
+    if not os.path.exists(caminho_sqlite(output_db_file)):
+        return None
+    with closing(conectar(caminho_sqlite(output_db_file))) as conn:
+        return _versao(conn, "versao_dados")
+
+
+def _consultar(conn: sqlite3.Connection, sql: str, params=()) -> pd.DataFrame:
+    df = pd.read_sql_query(sql, conn, params=params)
+    return df.dropna(axis=1, how="all") if not df.empty else df
+
+
+def carregar_oportunidades(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Retorna todas as oportunidades, ordenadas por score decrescente."""
+    return _consultar(conn, "SELECT * FROM oportunidades ORDER BY score_oportunidade DESC")
+
+
+def top_oportunidades(conn: sqlite3.Connection, n: int = 10, classificacao: str | None = None) -> pd.DataFrame:
+    """Retorna as N melhores oportunidades (usa o índice por score), opcionalmente filtradas por classificação."""
+    if classificacao:
+        return _consultar(
+            conn,
+            "SELECT * FROM oportunidades WHERE classificacao = ? ORDER BY score_oportunidade DESC LIMIT ?",
+            (classificacao, n),
+        )
+    return _consultar(conn, "SELECT * FROM oportunidades ORDER BY score_oportunidade DESC LIMIT ?", (n,))
+
+
+def oportunidades_por_nicho(conn: sqlite3.Connection, nicho: str) -> pd.DataFrame:
+    """Retorna as oportunidades de um nicho em todas as cidades (usa o índice por nicho)."""
+    return _consultar(
+        conn,
+        "SELECT * FROM oportunidades WHERE nicho = ? ORDER BY score_oportunidade DESC",
+        (nicho,),
+    )
+
+
+def exportar_visao(conn: sqlite3.Connection, output_db_file: str) -> str:
+    """Gera o oportunidades.db.csv (ou .parquet) a partir do SQLite para os consumidores existentes."""
+    versao = _versao(conn, "versao_dados")
+    caminho_salvo = salvar_tabela(carregar_oportunidades(conn), output_db_file, esquema=ESQUEMA_OPORTUNIDADES)
+    _marcar_visao(conn, versao)
+    return caminho_salvo
+
+
+def visao_em_dia(conn: sqlite3.Connection, output_db_file: str) -> bool:
+    """Indica se a visão existe e reflete todos os upserts feitos no SQLite."""
+    return existe_tabela(output_db_file) and _versao(conn, "versao_visao") == _versao(conn, "versao_dados")
+
+
+def garantir_visao(output_db_file: str) -> str | None:
+    """
+    Regenera a visão oportunidades.db.csv se o SQLite mudou desde a última exportação.
+    Retorna o caminho gravado, ou None se a visão já estava em dia (ou se não há SQLite).
+    """
+    if not os.path.exists(caminho_sqlite(output_db_file)):
+        return None
+    with closing(abrir_banco(output_db_file)) as conn:
+        if visao_em_dia(conn, output_db_file):
+            return None
+        return exportar_visao(conn, output_db_file)
+
+# ---------------------------------------------------
+# 4. Execução principal
+# ---------------------------------------------------
+def main(argv: list[str] | None = None):
+    """Consulta o índice de oportunidades pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Consultas ao índice SQLite de oportunidades.")
+    parser.add_argument("--db", type=str, default=os.path.join(os.getcwd(), "data", "oportunidades.db.csv"),
+                        help="Caminho lógico do banco de oportunidades.")
+    parser.add_argument("--top", type=int, default=10, help="Número de oportunidades no ranking.")
+    parser.add_argument("--classificacao", type=str, default=None, help="Filtra o ranking por classificação (ex.: Alta).")
+    parser.add_argument("--nicho", type=str, default=None, help="Lista as oportunidades de um nicho em todas as cidades.")
+    parser.add_argument("--exportar", action="store_true", help="Regenera a visão oportunidades.db.csv a partir do SQLite.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    with closing(abrir_banco(args.db)) as conn:
+        if args.exportar:
+            logging.info(f"✅ Visão exportada em: {exportar_visao(conn, args.db)}")
+        if args.nicho:
+            resultado = oportunidades_por_nicho(conn, args.nicho)
+        else:
+            resultado = top_oportunidades(conn, args.top, args.classificacao)
+        print(resultado.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
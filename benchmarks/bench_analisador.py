@@ -0,0 +1,54 @@
+import pytest
+
+from analisador_oportunidades import calcular_score, carregar_dados, gerar_metricas, pontuar_resumo
+
+PESOS = {"demanda": 0.4, "concorrencia": 0.3, "satisfacao": 0.3}
+LIMITES = {"alta": 0.66, "media": 0.4}
+# Teto absoluto do pico de carregar_dados por linha, além da referência relativa: a deduplicação
+# aproximada já chegou a ~7 KB por linha (trigramas de todas as linhas em memória)
+LIMITE_MEMORIA_POR_LINHA = 1024
+LINHAS_MINIMAS_LIMITE = 100_000 # Abaixo disso o custo fixo domina a conta por linha
+
+
+@pytest.fixture(scope="session")
+def arquivo_empresas(empresas, linhas, tmp_path_factory):
+    caminho = tmp_path_factory.mktemp(f"analisador_{linhas}") / "dados_empresas_sinteticos.csv"
+    empresas.to_csv(caminho, index=False, encoding="utf-8-sig")
+    return str(caminho)
+
+
+@pytest.fixture(scope="session")
+def empresas_carregadas(arquivo_empresas):
+    return carregar_dados(arquivo_empresas)
+
+
+@pytest.fixture(scope="session")
+def resumo(empresas_carregadas):
+    return gerar_metricas(empresas_carregadas)
+
+
+def test_carregar_dados(benchmark, memoria, arquivo_empresas, linhas, rodadas):
+    # Leitura tipada + deduplicação aproximada, o passo mais caro do analisador
+    pico_mib = memoria(carregar_dados, arquivo_empresas)
+    if linhas >= LINHAS_MINIMAS_LIMITE:
+        assert pico_mib * 2**20 / linhas <= LIMITE_MEMORIA_POR_LINHA, f"{pico_mib:.1f} MiB para {linhas} linhas"
+    df = benchmark.pedantic(carregar_dados, args=(arquivo_empresas,), rounds=rodadas, iterations=1)
+    assert not df.empty
+
+
+def test_gerar_metricas(benchmark, memoria, empresas_carregadas):
+    memoria(gerar_metricas, empresas_carregadas)
+    resumo = benchmark(gerar_metricas, empresas_carregadas)
+    assert resumo["empresas"].sum() == len(empresas_carregadas)
+
+
+def test_calcular_score_por_linha(benchmark, memoria, resumo):
+    memoria(resumo.apply, calcular_score, axis=1, pesos=PESOS)
+    scores = benchmark(resumo.apply, calcular_score, axis=1, pesos=PESOS)
+    assert len(scores) == len(resumo)
+
+
+def test_pontuar_resumo_vetorizado(benchmark, memoria, resumo):
+    memoria(pontuar_resumo, resumo.copy(), PESOS, LIMITES)
+    pontuado = benchmark(lambda: pontuar_resumo(resumo.copy(), PESOS, LIMITES))
+    assert pontuado["score_oportunidade"].between(0, 1).all()
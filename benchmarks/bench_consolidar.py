@@ -0,0 +1,34 @@
+import os
+import shutil
+
+import pytest
+
+from armazenamento import existe_tabela
+from consolidar import consolidar_dados_empresas_googlemaps
+from gerador_dados import gravar_em_lotes
+
+
+@pytest.fixture(scope="session")
+def diretorio_resultados(empresas, linhas, tmp_path_factory):
+    # Quatro dados_empresas_googlemaps_sub_*.csv, como quatro execuções do scraper no modo padrão
+    base = tmp_path_factory.mktemp(f"consolidar_{linhas}")
+    gravar_em_lotes(empresas, str(base / "csv"), lotes=4)
+    return str(base)
+
+
+# workers=1 mede o processo atual inteiro (tracemalloc não enxerga processos filhos); workers=None é o
+# padrão da CLI (OPORTUNIDADES_WORKERS ou nº de CPUs), com as faixas dos arquivos lidas e interpretadas no pool
+@pytest.mark.parametrize("workers", [1, None], ids=["serial", "padrao"])
+def test_consolidar_dados_empresas_googlemaps(benchmark, memoria, diretorio_resultados, rodadas, workers):
+    consolidated_path = os.path.join(diretorio_resultados, f"consolidados_{workers or 'padrao'}")
+
+    def limpar():
+        shutil.rmtree(consolidated_path, ignore_errors=True)
+
+    def consolidar():
+        limpar()
+        return consolidar_dados_empresas_googlemaps(diretorio_resultados, consolidated_path, workers=workers)
+
+    memoria(consolidar)
+    master_path = benchmark.pedantic(consolidar, rounds=rodadas, iterations=1)
+    assert existe_tabela(master_path)
@@ -0,0 +1,29 @@
+import os
+
+import pandas as pd
+import pytest
+
+from filtrar_nichos_campeoes import gerar_arquivos_nichos_campeoes
+from gerador_dados import gravar_por_par
+
+
+@pytest.fixture(scope="session")
+def base_campeoes(empresas, linhas, tmp_path_factory):
+    """Metade dos nichos é campeã; metade das linhas vai para o master e o resto para cidadesVizinhas (um arquivo por par)."""
+    base = tmp_path_factory.mktemp(f"campeoes_{linhas}")
+    nichos = sorted(empresas["nicho"].unique())
+    os.makedirs(base / "data")
+    pd.DataFrame({"Nicho": nichos[::2]}).to_csv(base / "data" / "nichos_campeoes.csv", index=False)
+
+    metade = len(empresas) // 2
+    os.makedirs(base / "results" / "consolidados")
+    empresas.iloc[:metade].to_csv(base / "results" / "consolidados" / "dados_empresas_googlemaps_master.csv", index=False)
+    gravar_por_par(empresas.iloc[metade:], str(base / "results" / "cidadesVizinhas"))
+    return str(base)
+
+
+def test_gerar_arquivos_nichos_campeoes(benchmark, memoria, base_campeoes, rodadas):
+    memoria(gerar_arquivos_nichos_campeoes, workers=1, base_dir=base_campeoes)
+    benchmark.pedantic(gerar_arquivos_nichos_campeoes, kwargs={"workers": 1, "base_dir": base_campeoes},
+                       rounds=rodadas, iterations=1)
+    assert os.listdir(os.path.join(base_campeoes, "results", "nichosCampeoes"))
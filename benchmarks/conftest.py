@@ -0,0 +1,128 @@
+# ===============================================================
+# benchmarks/conftest.py
+# Objetivo: fixtures da suíte de benchmarks (dados sintéticos por tamanho e pico de memória)
+# ===============================================================
+#
+# Variáveis de ambiente:
+#   BENCH_TAMANHOS=10000,100000,1000000  tamanhos (linhas) medidos (padrão: 10000)
+#   BENCH_TOLERANCIA_MEMORIA=0.2         aumento máximo do pico de memória sobre a referência
+#   BENCH_ATUALIZAR_MEMORIA=1            regrava benchmarks/referencia_memoria.json com as medidas
+#   BENCH_EXIGIR_REFERENCIA=1            benchmark sem referência de memória falha em vez de só avisar
+#                                        (padrão: ativo quando a variável CI está definida)
+#   BENCH_COMPARAR_TEMPO=1               compara o tempo com a última execução salva nesta máquina e
+#                                        falha acima de BENCH_TOLERANCIA_TEMPO (padrão 0.2); sem
+#                                        execução salva, salva esta como linha de base
+# O tempo é comparado pelo próprio pytest-benchmark (--benchmark-compare-fail, ver README); o pico de
+# memória (tracemalloc) fica em extra_info e é comparado aqui com a referência versionada em
+# benchmarks/referencia_memoria.json. Um benchmark sem referência gera um aviso, ou falha no CI.
+
+import glob
+import json
+import os
+import sys
+import tracemalloc
+import warnings
+
+import pytest
+from pytest_benchmark.utils import get_machine_id, get_tag, parse_compare_fail
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(DIRETORIO_BENCHMARKS, "..")))
+sys.path.insert(0, DIRETORIO_BENCHMARKS)
+
+from gerador_dados import gerar_empresas_com_linhas  # noqa: E402
+
+TAMANHOS = [int(t) for t in os.getenv("BENCH_TAMANHOS", "10000").split(",") if t.strip()]
+CAMINHO_REFERENCIA_MEMORIA = os.path.join(DIRETORIO_BENCHMARKS, "referencia_memoria.json")
+TOLERANCIA_MEMORIA = float(os.getenv("BENCH_TOLERANCIA_MEMORIA", "0.2"))
+ATUALIZAR_MEMORIA = os.getenv("BENCH_ATUALIZAR_MEMORIA") == "1"
+EXIGIR_REFERENCIA = os.getenv("BENCH_EXIGIR_REFERENCIA", "1" if os.getenv("CI") else "0") == "1"
+COMPARAR_TEMPO = os.getenv("BENCH_COMPARAR_TEMPO") == "1"
+TOLERANCIA_TEMPO = float(os.getenv("BENCH_TOLERANCIA_TEMPO", "0.2"))
+
+_medidas_memoria = {}
+
+
+def _referencia_memoria() -> dict:
+    if not os.path.exists(CAMINHO_REFERENCIA_MEMORIA):
+        return {}
+    with open(CAMINHO_REFERENCIA_MEMORIA, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _tem_linha_de_base_de_tempo(config) -> bool:
+    """True se o pytest-benchmark já salvou alguma execução desta máquina no --benchmark-storage."""
+    storage = config.getoption("benchmark_storage")
+    caminho = storage[len("file://"):] if storage.startswith("file://") else storage
+    return bool(glob.glob(os.path.join(caminho, get_machine_id(), "*.json")))
+
+
+def pytest_configure(config):
+    """Com BENCH_COMPARAR_TEMPO=1, liga a comparação de tempo (ou grava a linha de base, se ainda não houver)."""
+    if not COMPARAR_TEMPO or config.getoption("benchmark_compare") or config.getoption("benchmark_autosave"):
+        return
+    if _tem_linha_de_base_de_tempo(config):
+        config.option.benchmark_compare = True
+        config.option.benchmark_compare_fail = [parse_compare_fail(f"mean:{round(TOLERANCIA_TEMPO * 100)}%")]
+    else:
+        print("⏱️ Sem execução salva para comparar o tempo: esta execução será a linha de base (--benchmark-autosave).")
+        config.option.benchmark_autosave = get_tag() # O mesmo nome que --benchmark-autosave daria
+
+
+@pytest.fixture(scope="session", params=TAMANHOS, ids=lambda linhas: f"{linhas}_linhas")
+def linhas(request) -> int:
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def empresas(linhas):
+    """Empresas sintéticas com ~`linhas` linhas (10 cidades, 5% de duplicatas, 10% de campos vazios)."""
+    return gerar_empresas_com_linhas(linhas)
+
+
+@pytest.fixture(scope="session")
+def rodadas(linhas) -> int:
+    """Menos rodadas para os tamanhos grandes, para a suíte completa caber em alguns minutos."""
+    return 5 if linhas <= 10_000 else 3 if linhas <= 100_000 else 1
+
+
+@pytest.fixture
+def memoria(request, benchmark):
+    """
+    Retorna `medir(funcao, *args)`: executa a função uma vez sob tracemalloc, registra o pico (MiB)
+    em benchmark.extra_info e falha se ele passar da referência mais a tolerância. Sem referência
+    para o benchmark (ex.: um tamanho novo em BENCH_TAMANHOS), falha com BENCH_EXIGIR_REFERENCIA e,
+    fora dele, emite um aviso em vez de passar calado.
+    """
+    def medir(funcao, *args, **kwargs) -> float:
+        tracemalloc.start()
+        try:
+            funcao(*args, **kwargs)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        pico_mib = pico / 2**20
+        benchmark.extra_info["pico_memoria_mib"] = round(pico_mib, 2)
+        _medidas_memoria[request.node.name] = round(pico_mib, 2)
+
+        referencia = _referencia_memoria().get(request.node.name)
+        if ATUALIZAR_MEMORIA:
+            return pico_mib
+        if referencia is None:
+            mensagem = (f"{request.node.name}: sem referência de memória em {CAMINHO_REFERENCIA_MEMORIA}; "
+                        f"grave-a com BENCH_ATUALIZAR_MEMORIA=1.")
+            if EXIGIR_REFERENCIA:
+                pytest.fail(mensagem)
+            warnings.warn(mensagem, pytest.PytestWarning)
+        elif pico_mib > referencia * (1 + TOLERANCIA_MEMORIA):
+            pytest.fail(f"Pico de memória de {pico_mib:.1f} MiB excede a referência de {referencia:.1f} MiB "
+                        f"em mais de {TOLERANCIA_MEMORIA:.0%}.")
+        return pico_mib
+    return medir
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if ATUALIZAR_MEMORIA and _medidas_memoria:
+        referencia = {**_referencia_memoria(), **_medidas_memoria}
+        with open(CAMINHO_REFERENCIA_MEMORIA, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(referencia.items())), f, indent=1)
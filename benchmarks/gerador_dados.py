@@ -0,0 +1,154 @@
+# ===============================================================
+# benchmarks/gerador_dados.py
+# Objetivo: gerar dados sintéticos de empresas no formato dos scrapers (dados_empresas_*.csv)
+# ===============================================================
+#
+# As empresas seguem o esquema de esquema_empresas.py: nome, endereço, telefone e site plausíveis,
+# nota e reviews com a assimetria vista nos dados reais (muitas empresas sem reviews), coordenadas
+# em torno do centro de cada cidade. Parâmetros:
+#   - cidades / nichos: quantidade (nomes gerados) ou lista de nomes;
+#   - empresas_por_par: empresas distintas por (nicho, cidade);
+#   - taxa_duplicatas: fração de linhas extras repetindo empresas já geradas — metade cópias exatas,
+#     metade com grafia diferente (maiúsculas, sufixo "Ltda", telefone em outro formato);
+#   - taxa_ausentes: probabilidade de endereço, telefone, site e descrição virem vazios.
+# Tudo é sorteado com numpy a partir de `semente`, então a mesma chamada gera os mesmos dados.
+#
+#   python benchmarks/gerador_dados.py --linhas 100000 --destino /tmp/dados --formato lotes
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from saida_scraper import sanitizar_nome_arquivo  # noqa: E402
+
+PREFIXOS_NOME = ["Casa", "Studio", "Espaço", "Central", "Clínica", "Oficina", "Ateliê", "Empório", "Mercado", "Instituto"]
+COMPLEMENTOS_NOME = [
+    "São João", "Boa Vista", "Santa Luzia", "Primavera", "Aurora", "do Porto", "Bela Vista",
+    "Nossa Senhora", "Estrela", "Jardim", "Horizonte", "Novo Tempo", "Vila Real", "Três Irmãos",
+]
+LOGRADOUROS = ["Rua", "R.", "Av.", "Avenida", "Travessa", "Estrada"]
+RUAS = [
+    "Sete de Setembro", "XV de Novembro", "Tiradentes", "Dom Pedro II", "das Flores", "Marechal Deodoro",
+    "Visconde de Mauá", "Getúlio Vargas", "Presidente Vargas", "Amaral Peixoto", "Roberto Silveira",
+]
+BAIRROS = ["Centro", "Icaraí", "Jardim", "Santa Rosa", "Fonseca", "Barreto", "Ingá", "Itaipu", "Piratininga"]
+COLUNAS_GERADAS = [
+    "nicho", "cidade", "nome", "endereco", "telefone", "website", "tipo", "nota", "reviews",
+    "descricao", "latitude", "longitude",
+]
+
+
+def _nomes(valor, rotulo: str) -> list[str]:
+    return list(valor) if not isinstance(valor, int) else [f"{rotulo} {i:03d}" for i in range(1, valor + 1)]
+
+
+def gerar_empresas(cidades=10, nichos=20, empresas_por_par: int = 50, taxa_duplicatas: float = 0.05,
+                   taxa_ausentes: float = 0.1, semente: int = 42) -> pd.DataFrame:
+    """Gera o DataFrame de empresas sintéticas (ver o cabeçalho do módulo), em ordem aleatória."""
+    rng = np.random.default_rng(semente)
+    cidades, nichos = _nomes(cidades, "Cidade"), _nomes(nichos, "Nicho")
+    n = len(cidades) * len(nichos) * empresas_por_par
+
+    pares = np.arange(n) // empresas_por_par
+    idx_cidade, idx_nicho = pares // len(nichos), pares % len(nichos)
+    sequencia = np.arange(n) % empresas_por_par
+    centro_lat = rng.uniform(-23.0, -22.0, len(cidades))
+    centro_lon = rng.uniform(-44.0, -42.0, len(cidades))
+
+    prefixos = rng.choice(PREFIXOS_NOME, n)
+    complementos = rng.choice(COMPLEMENTOS_NOME, n)
+    logradouros, ruas, bairros = rng.choice(LOGRADOUROS, n), rng.choice(RUAS, n), rng.choice(BAIRROS, n)
+    numeros = rng.integers(1, 3000, n)
+    telefones = rng.integers(10_000_000, 99_999_999, n)
+    nomes_cidades = np.array(cidades, dtype=object)[idx_cidade]
+    nomes_nichos = np.array(nichos, dtype=object)[idx_nicho]
+
+    # Reviews: ~15% sem nenhuma, o resto com cauda longa; empresas sem reviews ficam sem nota
+    reviews = np.where(rng.random(n) < 0.15, 0, rng.geometric(0.02, n)).astype("int64")
+    notas = np.where(reviews > 0, np.round(np.clip(rng.normal(4.2, 0.6, n), 1, 5), 1), 0.0)
+
+    df = pd.DataFrame({
+        "nicho": nomes_nichos,
+        "cidade": nomes_cidades,
+        "nome": [f"{p} {c} {s}" for p, c, s in zip(prefixos, complementos, sequencia)],
+        "endereco": [f"{lg} {r}, {num} - {b}, {cid} - RJ" for lg, r, num, b, cid in zip(logradouros, ruas, numeros, bairros, nomes_cidades)],
+        "telefone": [f"(21) 9{t // 10_000}-{t % 10_000:04d}" for t in telefones],
+        "website": [f"https://{p.lower()}{s}.com.br" for p, s in zip(prefixos, sequencia)],
+        "tipo": nomes_nichos,
+        "nota": notas,
+        "reviews": reviews,
+        "descricao": None,
+        "latitude": centro_lat[idx_cidade] + rng.normal(0, 0.02, n),
+        "longitude": centro_lon[idx_cidade] + rng.normal(0, 0.02, n),
+    })
+    for coluna in ("endereco", "telefone", "website"):
+        df.loc[rng.random(n) < taxa_ausentes, coluna] = None
+
+    num_duplicatas = int(round(n * taxa_duplicatas))
+    if num_duplicatas:
+        duplicatas = df.iloc[rng.choice(n, num_duplicatas)].copy()
+        variantes = rng.random(num_duplicatas) < 0.5
+        nomes = duplicatas["nome"].to_numpy(dtype=object)
+        sufixo = rng.random(num_duplicatas) < 0.5
+        duplicatas["nome"] = np.where(variantes & sufixo, nomes + " Ltda", np.where(variantes, [str(x).upper() for x in nomes], nomes))
+        telefone = duplicatas["telefone"].astype("string").str.replace(r"\D", "", regex=True)
+        duplicatas["telefone"] = np.where(variantes & telefone.notna().to_numpy(), "+55 " + telefone.fillna(""), duplicatas["telefone"])
+        df = pd.concat([df, duplicatas], ignore_index=True)
+
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)[COLUNAS_GERADAS]
+
+
+def gerar_empresas_com_linhas(linhas: int, cidades: int = 10, taxa_duplicatas: float = 0.05, **opcoes) -> pd.DataFrame:
+    """Gera ~`linhas` empresas: 10 cidades e nichos suficientes para ~500 empresas por par (mínimo 20 nichos)."""
+    nichos = max(20, linhas // (cidades * 500))
+    empresas_por_par = max(1, int(round(linhas / (cidades * nichos * (1 + taxa_duplicatas)))))
+    return gerar_empresas(cidades, nichos, empresas_por_par, taxa_duplicatas=taxa_duplicatas, **opcoes)
+
+
+def gravar_por_par(df: pd.DataFrame, diretorio: str) -> list[str]:
+    """Grava um dados_empresas_<nicho>_<cidade>.csv por par, como o modo 'expansao' dos scrapers."""
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = []
+    for (nicho, cidade), grupo in df.groupby(["nicho", "cidade"], sort=True):
+        caminho = os.path.join(diretorio, f"dados_empresas_{sanitizar_nome_arquivo(nicho)}_{sanitizar_nome_arquivo(cidade)}.csv")
+        grupo.to_csv(caminho, index=False, encoding="utf-8-sig")
+        caminhos.append(caminho)
+    return caminhos
+
+
+def gravar_em_lotes(df: pd.DataFrame, diretorio: str, lotes: int = 4) -> list[str]:
+    """Grava `lotes` arquivos dados_empresas_googlemaps_sub_<n>.csv, como execuções sucessivas do modo padrão."""
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = []
+    for i, parte in enumerate(np.array_split(np.arange(len(df)), lotes)):
+        caminho = os.path.join(diretorio, f"dados_empresas_googlemaps_sub_{i:03d}.csv")
+        df.iloc[parte].to_csv(caminho, index=False, encoding="utf-8-sig")
+        caminhos.append(caminho)
+    return caminhos
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos de empresas (dados_empresas_*.csv).")
+    parser.add_argument("--linhas", type=int, default=10_000, help="Número aproximado de linhas.")
+    parser.add_argument("--cidades", type=int, default=10, help="Número de cidades.")
+    parser.add_argument("--taxa-duplicatas", type=float, default=0.05, help="Fração de linhas duplicadas (exatas ou variantes).")
+    parser.add_argument("--taxa-ausentes", type=float, default=0.1, help="Probabilidade de endereço/telefone/site vazios.")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador aleatório.")
+    parser.add_argument("--formato", choices=("por_par", "lotes"), default="por_par",
+                        help="'por_par': um arquivo por (nicho, cidade); 'lotes': dados_empresas_googlemaps_sub_*.csv.")
+    parser.add_argument("--destino", type=str, default=os.path.join("results", "sinteticos"), help="Diretório de saída.")
+    args = parser.parse_args(argv)
+
+    df = gerar_empresas_com_linhas(args.linhas, args.cidades, taxa_duplicatas=args.taxa_duplicatas,
+                                   taxa_ausentes=args.taxa_ausentes, semente=args.semente)
+    caminhos = gravar_por_par(df, args.destino) if args.formato == "por_par" else gravar_em_lotes(df, args.destino)
+    print(f"{len(df)} linhas gravadas em {len(caminhos)} arquivo(s) em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
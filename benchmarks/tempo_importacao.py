@@ -0,0 +1,101 @@
+# ===============================================================
+# benchmarks/tempo_importacao.py
+# Objetivo: medir o custo de inicialização dos módulos do pipeline e da CLI (python -X importtime)
+# ===============================================================
+#
+# Para cada módulo, roda `python -X importtime -c "import <módulo>"` em um processo novo e lê do
+# stderr o tempo acumulado da importação (µs) e o número de módulos carregados; também mede o tempo
+# total (wall) de `python oportunidades.py --help`. Cada medida é o mínimo de N repetições, para
+# descontar o ruído do sistema. Módulos que não importam neste ambiente (dependência ausente)
+# aparecem com o erro, sem interromper as demais medidas.
+#
+#   python benchmarks/tempo_importacao.py
+#   python benchmarks/tempo_importacao.py --repeticoes 10 --modulos oportunidades consolidar
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODULOS_PADRAO = [
+    "oportunidades",
+    "consolidar",
+    "analisador_oportunidades",
+    "relatorio_comparativo_multicitadino",
+    "filtrar_nichos_campeoes",
+    "google_maps_scraper",
+    "google_maps_scraper_playwright",
+]
+MODULOS_PESADOS = ("pandas", "numpy", "matplotlib", "seaborn", "playwright", "aiohttp")
+
+
+def _ambiente() -> dict:
+    ambiente = dict(os.environ)
+    ambiente["PYTHONPATH"] = os.pathsep.join(filter(None, [RAIZ, ambiente.get("PYTHONPATH")]))
+    ambiente["PYTHONDONTWRITEBYTECODE"] = "1"
+    return ambiente
+
+
+def _ler_importtime(stderr: str) -> dict[str, int]:
+    """Converte as linhas 'import time: self | cumulative | módulo' em {módulo: µs acumulados}."""
+    tempos = {}
+    for linha in stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, modulo = linha[len("import time:"):].split("|")
+        tempos[modulo.strip()] = int(acumulado)
+    return tempos
+
+
+def medir_importacao(modulo: str, repeticoes: int = 5) -> dict:
+    """Mínimo, em ms, do tempo acumulado de importação do módulo em processos novos."""
+    melhor = None
+    for _ in range(repeticoes):
+        resultado = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+            cwd=RAIZ, env=_ambiente(), capture_output=True, text=True,
+        )
+        tempos = _ler_importtime(resultado.stderr)
+        if resultado.returncode != 0 or modulo not in tempos:
+            erro = resultado.stderr.strip().splitlines()[-1] if resultado.stderr.strip() else "falhou"
+            return {"modulo": modulo, "erro": erro}
+        if melhor is None or tempos[modulo] < melhor["us"]:
+            pesados = sorted({m.split(".")[0] for m in tempos} & set(MODULOS_PESADOS))
+            melhor = {"modulo": modulo, "us": tempos[modulo], "modulos_carregados": len(tempos), "pesados": pesados}
+    melhor["ms"] = melhor.pop("us") / 1000
+    return melhor
+
+
+def medir_comando(argv: list[str], repeticoes: int = 5) -> float:
+    """Mínimo, em ms, do tempo total (processo inteiro) de um comando Python."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=RAIZ, env=_ambiente(), capture_output=True)
+        melhor = min(melhor, (time.perf_counter() - inicio) * 1000)
+    return melhor
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Tempo de importação dos módulos do pipeline.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por medida (vale o mínimo).")
+    parser.add_argument("--modulos", nargs="+", default=MODULOS_PADRAO, help="Módulos a medir.")
+    args = parser.parse_args(argv)
+
+    print(f"{'módulo':<40} {'import (ms)':>12} {'módulos':>8}  pesados")
+    for modulo in args.modulos:
+        medida = medir_importacao(modulo, args.repeticoes)
+        if "erro" in medida:
+            print(f"{modulo:<40} {'—':>12} {'—':>8}  erro: {medida['erro']}")
+        else:
+            print(f"{modulo:<40} {medida['ms']:>12.1f} {medida['modulos_carregados']:>8}  {', '.join(medida['pesados']) or '-'}")
+
+    print()
+    print(f"{'python -c pass':<40} {medir_comando(['-c', 'pass'], args.repeticoes):>12.1f} ms (processo)")
+    print(f"{'oportunidades.py --help':<40} {medir_comando(['oportunidades.py', '--help'], args.repeticoes):>12.1f} ms (processo)")
+
+
+if __name__ == "__main__":
+    main()
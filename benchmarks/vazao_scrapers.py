@@ -0,0 +1,240 @@
+# ===============================================================
+# benchmarks/vazao_scrapers.py
+# Objetivo: medir a vazão dos scrapers (pares/min e cartões/s) contra o servidor de replay local
+# ===============================================================
+#
+# Sobe o ServidorReplay (replay_scraper.py) com as gravações de --diretorio — ou, com --sintetico,
+# com gravações geradas a partir de benchmarks/gerador_dados.py (3 páginas da SerpAPI e uma lista
+# do Maps por par) — e roda contra ele:
+#   - serpapi:       google_maps_scraper.buscar_empresas, par a par (cliente síncrono);
+#   - serpapi_async: serpapi_async.buscar_pares (--concorrencia pares simultâneos);
+#   - playwright:    google_maps_scraper_playwright.executar_pool_de_buscas (--workers contextos).
+# Sem --com-cortesia, as pausas de cortesia entre páginas e buscas são zeradas, para medir o
+# scraper e não os sleeps; a latência e os erros vêm do servidor (--latencia-ms, --taxa-erros).
+# Nenhum cache de buscas é usado. Sem Chromium instalado, o playwright aparece com o erro.
+#
+#   python benchmarks/vazao_scrapers.py --sintetico --pares 20 --latencia-ms 50,150 --taxa-erros 0.05
+#   python benchmarks/vazao_scrapers.py --diretorio tests/fixtures/replay --scrapers serpapi_async
+
+import argparse
+import asyncio
+import html
+import os
+import sys
+import tempfile
+import threading
+import time
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(DIRETORIO_BENCHMARKS, "..")))
+sys.path.insert(0, DIRETORIO_BENCHMARKS)
+
+from gerador_dados import gerar_empresas  # noqa: E402
+from replay_scraper import PAGE_SIZE, ServidorReplay, gravar_pagina_maps, gravar_resposta_serpapi  # noqa: E402
+
+SCRAPERS = ("serpapi", "serpapi_async", "playwright")
+
+CARTAO_MAPS = """<div class="Nv2PK THOPZb CpccDe">
+  <a class="hfpxzc" aria-label="{nome}" href="https://www.google.com/maps/place/data=!4m7!3m6!1s0x{id:x}:0x{id:x}!8m2!3d{lat}!4d{lon}!19sChIJreplay{id}"></a>
+  <div class="qBF1Pd fontHeadlineSmall">{nome}</div>
+  <div class="W4Efsd"><span class="ZkP5Je"><span class="MW4etd">{nota}</span><span class="UY7F9">({reviews})</span></span></div>
+  <div class="W4Efsd">
+    <div class="W4Efsd"><span><span>{tipo}</span></span><span> · </span><span>{endereco}</span></div>
+    <div class="W4Efsd"><span><span class="UsdlK">{telefone}</span></span></div>
+  </div>
+</div>"""
+
+# ---------------------------------------------------
+# 1. Gravações sintéticas
+# ---------------------------------------------------
+
+def gerar_gravacoes_sinteticas(diretorio: str, pares: int = 20, empresas_por_par: int = 45, semente: int = 42) -> list[tuple[str, str]]:
+    """Grava, para cada par, as páginas google_local da SerpAPI e a lista do Maps; retorna os pares (nicho, cidade)."""
+    cidades = max(1, pares // 5)
+    nichos = -(-pares // cidades)
+    df = gerar_empresas(cidades, nichos, empresas_por_par, taxa_duplicatas=0, semente=semente)
+    df = df.sort_values(["cidade", "nicho", "nome"], kind="stable")
+    df = df.astype(object).where(df.notna(), None) # Campos vazios viram null no JSON e "" no HTML
+
+    gravados = []
+    for id_base, ((nicho, cidade), grupo) in enumerate(df.groupby(["nicho", "cidade"], sort=True)):
+        if len(gravados) == pares:
+            break
+        registros = grupo.to_dict("records")
+        for pagina, inicio in enumerate(range(0, len(registros), PAGE_SIZE)):
+            lote = registros[inicio:inicio + PAGE_SIZE]
+            gravar_resposta_serpapi(diretorio, "google_local", nicho, cidade, pagina, {
+                "local_results": [
+                    {"title": r["nome"], "address": r["endereco"], "phone": r["telefone"], "website": r["website"],
+                     "type": r["tipo"], "rating": r["nota"], "reviews": r["reviews"],
+                     "gps_coordinates": {"latitude": r["latitude"], "longitude": r["longitude"]}}
+                    for r in lote
+                ],
+                "serpapi_pagination": {"next": "..."} if inicio + PAGE_SIZE < len(registros) else {},
+            })
+        cartoes = "\n".join(
+            CARTAO_MAPS.format(
+                nome=html.escape(r["nome"]), id=id_base * 1000 + i, lat=r["latitude"], lon=r["longitude"],
+                nota=f"{r['nota']:.1f}".replace(".", ","), reviews=r["reviews"], tipo=html.escape(r["tipo"]),
+                endereco=html.escape(r["endereco"] or ""), telefone=r["telefone"] or "",
+            )
+            for i, r in enumerate(registros)
+        )
+        gravar_pagina_maps(diretorio, nicho, cidade, (
+            f'<html><body><div role="main"><div role="feed" aria-label="Resultados para {html.escape(nicho)}">\n'
+            f'{cartoes}\n</div><span>Você chegou ao fim da lista.</span></div></body></html>'
+        ))
+        gravados.append((nicho, cidade))
+    return gravados
+
+# ---------------------------------------------------
+# 2. Execução dos scrapers
+# ---------------------------------------------------
+
+class ServidorEmSegundoPlano:
+    """Roda o ServidorReplay em um event loop próprio, numa thread, para atender também o cliente síncrono."""
+
+    def __init__(self, servidor: ServidorReplay):
+        self.servidor = servidor
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self) -> ServidorReplay:
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.servidor.__aenter__(), self.loop).result()
+        return self.servidor
+
+    def __exit__(self, exc_type, exc, tb):
+        asyncio.run_coroutine_threadsafe(self.servidor.__aexit__(exc_type, exc, tb), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def _rodar_serpapi(pares, args):
+    from google_maps_scraper import buscar_empresas
+
+    cartoes = 0
+    for nicho, cidade in pares:
+        cartoes += len(buscar_empresas(nicho, cidade, max_pages=5))
+    return cartoes
+
+
+def _rodar_serpapi_async(pares, args):
+    from serpapi_async import buscar_pares
+
+    empresas = buscar_pares(pares, os.environ["SERPAPI_API_KEY"], max_pages=5, concorrencia=args.concorrencia,
+                            req_por_segundo=args.req_por_segundo)
+    return len(empresas)
+
+
+def _rodar_playwright(pares, args):
+    from google_maps_scraper_playwright import executar_pool_de_buscas
+
+    return len(asyncio.run(executar_pool_de_buscas(pares, args.workers)))
+
+
+EXECUTORES = {"serpapi": _rodar_serpapi, "serpapi_async": _rodar_serpapi_async, "playwright": _rodar_playwright}
+
+
+def medir_scraper(nome: str, pares: list[tuple[str, str]], servidor: ServidorReplay, args) -> dict:
+    """Roda um scraper sobre todos os pares e devolve tempo, pares/min, cartões/s e requisições ao servidor."""
+    requisicoes_antes, erros_antes = servidor.requisicoes, servidor.erros_injetados
+    inicio = time.perf_counter()
+    try:
+        cartoes = EXECUTORES[nome](pares, args)
+    except Exception as e:
+        return {"scraper": nome, "erro": f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"}
+    segundos = time.perf_counter() - inicio
+    return {
+        "scraper": nome,
+        "segundos": segundos,
+        "pares_por_minuto": len(pares) / segundos * 60,
+        "cartoes": cartoes,
+        "cartoes_por_segundo": cartoes / segundos,
+        "requisicoes": servidor.requisicoes - requisicoes_antes,
+        "erros_injetados": servidor.erros_injetados - erros_antes,
+    }
+
+
+def _sem_cortesia():
+    """Zera as pausas de cortesia dos scrapers (entre páginas, entre buscas e o piso das esperas por evento)."""
+    import google_maps_scraper
+    import google_maps_scraper_playwright
+
+    google_maps_scraper.INTERVALO_ENTRE_PAGINAS = (0, 0)
+    google_maps_scraper_playwright.INTERVALO_ENTRE_BUSCAS = (0, 0)
+    os.environ["SCRAPER_CORTESIA_MS"] = "0,0"
+
+# ---------------------------------------------------
+# 3. Linha de comando
+# ---------------------------------------------------
+
+def _intervalo_ms(valor: str) -> tuple[float, float]:
+    minimo, _, maximo = valor.partition(",")
+    return float(minimo), float(maximo or minimo)
+
+
+def _ler_pares(caminho: str) -> list[tuple[str, str]]:
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [tuple(parte.strip() for parte in linha.split(";", 1)) for linha in f if ";" in linha]
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Vazão dos scrapers contra o servidor de replay local.")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--sintetico", action="store_true", help="Gera gravações sintéticas em um diretório temporário.")
+    origem.add_argument("--diretorio", help="Diretório com gravações reais (SCRAPER_GRAVAR_REPLAY / exportar-cache).")
+    parser.add_argument("--pares-arquivo", help='Com --diretorio: arquivo com um par "nicho;cidade" por linha.')
+    parser.add_argument("--pares", type=int, default=20, help="Com --sintetico: número de pares (nicho, cidade).")
+    parser.add_argument("--empresas-por-par", type=int, default=45, help="Com --sintetico: empresas por par.")
+    parser.add_argument("--scrapers", nargs="+", choices=SCRAPERS, default=list(SCRAPERS))
+    parser.add_argument("--latencia-ms", type=_intervalo_ms, default=(50, 150), help='Latência do servidor, "min,max" em ms.')
+    parser.add_argument("--taxa-erros", type=float, default=0.0, help="Probabilidade de o servidor responder HTTP 503.")
+    parser.add_argument("--concorrencia", type=int, default=4, help="Pares simultâneos do serpapi_async.")
+    parser.add_argument("--req-por-segundo", type=float, default=1000, help="Rate limit do serpapi_async.")
+    parser.add_argument("--workers", type=int, default=4, help="Contextos paralelos do playwright.")
+    parser.add_argument("--com-cortesia", action="store_true", help="Mantém as pausas de cortesia dos scrapers.")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if not args.com_cortesia:
+        _sem_cortesia()
+    os.environ.setdefault("SERPAPI_API_KEY", "replay")
+    os.environ.pop("SCRAPER_GRAVAR_REPLAY", None) # Não regrava o que está sendo servido
+
+    with tempfile.TemporaryDirectory() as temporario:
+        if args.sintetico:
+            diretorio = os.path.join(temporario, "replay")
+            pares = gerar_gravacoes_sinteticas(diretorio, args.pares, args.empresas_por_par, args.semente)
+        elif args.pares_arquivo:
+            diretorio, pares = args.diretorio, _ler_pares(args.pares_arquivo)
+        else:
+            parser.error("--diretorio exige --pares-arquivo")
+
+        # Capturas de tela e o HTML de depuração dos scrapers ficam no diretório temporário
+        diretorio_original = os.getcwd()
+        diretorio = os.path.abspath(diretorio)
+        os.chdir(temporario)
+        try:
+            servidor = ServidorReplay(diretorio, args.latencia_ms, args.taxa_erros, args.semente)
+            with ServidorEmSegundoPlano(servidor):
+                os.environ["SERPAPI_BASE_URL"] = servidor.url_serpapi
+                os.environ["GOOGLE_MAPS_URL"] = servidor.url_maps
+                medidas = [medir_scraper(nome, pares, servidor, args) for nome in args.scrapers]
+        finally:
+            os.chdir(diretorio_original)
+
+    print(f"{len(pares)} par(es), latência {args.latencia_ms[0]:g}-{args.latencia_ms[1]:g} ms, taxa de erros {args.taxa_erros:.0%}")
+    print(f"{'scraper':<15} {'tempo (s)':>10} {'pares/min':>10} {'cartões':>8} {'cartões/s':>10} {'requisições':>12} {'erros':>6}")
+    for m in medidas:
+        if "erro" in m:
+            print(f"{m['scraper']:<15} {'—':>10}  erro: {m['erro']}")
+        else:
+            print(f"{m['scraper']:<15} {m['segundos']:>10.2f} {m['pares_por_minuto']:>10.1f} {m['cartoes']:>8} "
+                  f"{m['cartoes_por_segundo']:>10.1f} {m['requisicoes']:>12} {m['erros_injetados']:>6}")
+    return medidas
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# ===============================================================
+# cache_buscas.py
+# Objetivo: cache persistente de buscas (engine, nicho, cidade, página) com TTL e LRU
+# ===============================================================
+#
+# Os resultados ficam em um SQLite (padrão data/cache_buscas.sqlite), serializados em JSON.
+# Entradas mais antigas que o TTL são descartadas na leitura; quando o tamanho total passa
+# do limite, as entradas acessadas há mais tempo são removidas primeiro (LRU).
+# Configuração: CACHE_BUSCAS_TTL_HORAS (padrão 168) e CACHE_BUSCAS_MAX_MB (padrão 200).
+
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from dotenv import load_dotenv
+
+CAMINHO_CACHE_PADRAO = os.path.join("data", "cache_buscas.sqlite")
+TTL_PADRAO_HORAS = 24 * 7
+TAMANHO_MAXIMO_PADRAO_MB = 200
+
+
+class CacheBuscas:
+    """Cache em disco de resultados de busca, com expiração por TTL e despejo LRU por tamanho."""
+
+    def __init__(self, caminho: str | None = None, ttl_horas: float | None = None, max_mb: float | None = None,
+                 refresh: bool = False):
+        load_dotenv()
+        self.caminho = caminho or CAMINHO_CACHE_PADRAO
+        self.ttl_segundos = float(ttl_horas if ttl_horas is not None else os.getenv("CACHE_BUSCAS_TTL_HORAS", TTL_PADRAO_HORAS)) * 3600
+        self.max_bytes = int(float(max_mb if max_mb is not None else os.getenv("CACHE_BUSCAS_MAX_MB", TAMANHO_MAXIMO_PADRAO_MB)) * 1024 * 1024)
+        self.refresh = refresh
+        self.acertos = 0
+        self.falhas = 0
+
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.conn = sqlite3.connect(self.caminho)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_buscas (
+                engine TEXT NOT NULL,
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                pagina INTEGER NOT NULL,
+                valor TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                criado_em REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                PRIMARY KEY (engine, nicho, cidade, pagina)
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_buscas_ultimo_acesso ON cache_buscas (ultimo_acesso);
+        """)
+
+    def obter(self, engine: str, nicho: str, cidade: str, pagina: int = 0):
+        """Retorna o valor em cache ou None (ausente, expirado ou com --refresh)."""
+        if self.refresh:
+            self.falhas += 1
+            return None
+        chave = (engine, nicho, cidade, int(pagina))
+        linha = self.conn.execute(
+            "SELECT valor, criado_em FROM cache_buscas WHERE engine = ? AND nicho = ? AND cidade = ? AND pagina = ?",
+            chave,
+        ).fetchone()
+        agora = time.time()
+        if linha is None:
+            self.falhas += 1
+            return None
+        valor, criado_em = linha
+        if agora - criado_em > self.ttl_segundos:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM cache_buscas WHERE engine = ? AND nicho = ? AND cidade = ? AND pagina = ?", chave
+                )
+            self.falhas += 1
+            return None
+        with self.conn:
+            self.conn.execute(
+                "UPDATE cache_buscas SET ultimo_acesso = ? WHERE engine = ? AND nicho = ? AND cidade = ? AND pagina = ?",
+                (agora, *chave),
+            )
+        self.acertos += 1
+        logging.info(f"💾 Cache: resultado reaproveitado para ({engine}, {nicho}, {cidade}, página {pagina}).")
+        return json.loads(valor)
+
+    def salvar(self, engine: str, nicho: str, cidade: str, pagina: int, valor):
+        """Grava (ou substitui) um valor no cache e aplica o limite de tamanho."""
+        serializado = json.dumps(valor, ensure_ascii=False, default=str)
+        agora = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache_buscas (engine, nicho, cidade, pagina, valor, tamanho, criado_em, ultimo_acesso) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (engine, nicho, cidade, int(pagina), serializado, len(serializado.encode("utf-8")), agora, agora),
+            )
+        self._aplicar_limite()
+
+    def entradas(self, engines=None):
+        """Percorre todas as entradas (engine, nicho, cidade, pagina, valor), sem aplicar o TTL nem mexer no LRU."""
+        consulta = "SELECT engine, nicho, cidade, pagina, valor FROM cache_buscas"
+        parametros = ()
+        if engines:
+            consulta += f" WHERE engine IN ({', '.join('?' * len(engines))})"
+            parametros = tuple(engines)
+        for engine, nicho, cidade, pagina, valor in self.conn.execute(consulta + " ORDER BY engine, nicho, cidade, pagina", parametros):
+            yield engine, nicho, cidade, pagina, json.loads(valor)
+
+    def _aplicar_limite(self):
+        """Remove as entradas menos recentemente acessadas até o total caber em max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM cache_buscas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removidas = 0
+        with self.conn:
+            for rowid, tamanho in self.conn.execute(
+                "SELECT rowid, tamanho FROM cache_buscas ORDER BY ultimo_acesso ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM cache_buscas WHERE rowid = ?", (rowid,))
+                total -= tamanho
+                removidas += 1
+        logging.info(f"🧹 Cache: {removidas} entrada(s) removida(s) por limite de tamanho (LRU).")
+
+    def fechar(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
@@ -1,61 +1,245 @@
 # Este script consolida e organiza os dados de oportunidades e empresas.
 
+import numpy as np
 import pandas as pd
 import os
 import glob
+import io
+import pickle
+import tempfile
 import time
-import matplotlib.pyplot as plt
-import seaborn as sns
+from contextlib import nullcontext
+from functools import partial
+
+from armazenamento import (
+    ESQUEMA_EMPRESAS, ESQUEMA_OPORTUNIDADES, EscritorTabela, carregar_tabela, carregar_tabela_em_partes,
+    formato_configurado, resolver_caminho, salvar_tabela,
+)
+from banco_oportunidades import garantir_visao
+from deduplicacao import deduplicar_empresas, particoes_de_comparacao
+from esquema_empresas import ALIASES_COLUNAS, TIPOS_LEITURA_CSV, padronizar_colunas
+from identificadores import COLUNA_ID, garantir_id_empresa
+from ingestao import mapear_em_paralelo
 
 # --- Configurações --- #
 LIMITE_SCORE = 0.63
+# O id vindo do place_id não inclui a cidade: a mesma empresa em cidades vizinhas fica uma vez em cada cidade
+CHAVES_DEDUPLICACAO = [COLUNA_ID, "cidade", "nicho"]
+TAMANHO_CHUNK = 50_000
+TAMANHO_FAIXA = 8 * 2**20 # Bytes de CSV lidos e interpretados por tarefa do pool
+_BLOCO_LEITURA = 2**20
+# Partições em disco da deduplicação aproximada: o pico é o de uma partição, não o do master inteiro
+PARTICOES_APROXIMADAS = 64
+_COLUNA_ARQUIVO = "_indice_arquivo"
 
 # --- Funções de Consolidação --- #
 
-def consolidar_dados_empresas_googlemaps(results_path, consolidated_path):
+def _hash_chaves(df, chaves):
+    """Calcula um hash de 64 bits por linha a partir das colunas-chave de deduplicação."""
+    return pd.util.hash_pandas_object(df[chaves].astype("string"), index=False).to_numpy()
+
+
+def _faixas_do_arquivo(caminho, tamanho_faixa):
+    """
+    Divide um CSV em faixas de ~`tamanho_faixa` bytes que começam e terminam em fim de registro e
+    retorna (cabeçalho, [(início, fim), ...]). Uma quebra de linha só é fronteira fora de aspas
+    (paridade das aspas até ela), então campos com quebras de linha não são partidos. O arquivo é
+    percorrido em blocos de bytes, sem interpretar o CSV: essa parte fica com os workers.
+    """
+    faixas = []
+    with open(caminho, "rb") as f:
+        cabecalho = f.readline()
+        inicio = posicao = f.tell()
+        aspas = 0 # Paridade das aspas antes do início do bloco atual
+        while bloco := f.read(_BLOCO_LEITURA):
+            contadas = 0 # Posição no bloco até a qual `aspas` já inclui as aspas
+            procurar_de = 0
+            while True:
+                procurar_de = max(procurar_de, inicio + tamanho_faixa - posicao)
+                quebra = bloco.find(b"\n", procurar_de) if procurar_de < len(bloco) else -1
+                if quebra == -1:
+                    break
+                aspas = (aspas + bloco.count(b'"', contadas, quebra)) % 2
+                contadas = procurar_de = quebra + 1
+                if not aspas:
+                    faixas.append((inicio, posicao + quebra + 1))
+                    inicio = posicao + quebra + 1
+            aspas = (aspas + bloco.count(b'"', contadas)) % 2
+            posicao += len(bloco)
+    if posicao > inicio:
+        faixas.append((inicio, posicao))
+    return cabecalho, faixas
+
+
+def _faixas_dos_arquivos(arquivos, tamanho_faixa):
+    """Gera as faixas (índice do arquivo, caminho, cabeçalho, início, fim) de todos os arquivos, na ordem."""
+    for indice, caminho in enumerate(arquivos):
+        cabecalho, faixas = _faixas_do_arquivo(caminho, tamanho_faixa)
+        for inicio, fim in faixas:
+            yield indice, caminho, cabecalho, inicio, fim
+
+
+def _preparar_faixa(faixa, chaves, chunksize):
+    """
+    Lê uma faixa do CSV e a interpreta em partes de até `chunksize` linhas, padroniza cada parte,
+    garante o id_empresa e calcula os hashes das chaves (executado nos processos do pool).
+    """
+    indice, caminho, cabecalho, inicio, fim = faixa
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        conteudo = f.read(fim - inicio)
+    partes = []
+    for chunk in pd.read_csv(io.BytesIO(cabecalho + conteudo), chunksize=chunksize, dtype=TIPOS_LEITURA_CSV):
+        chunk = garantir_id_empresa(padronizar_colunas(chunk))
+        partes.append((chunk, _hash_chaves(chunk.reindex(columns=chaves), chaves)))
+    return indice, partes
+
+
+def _guardar_na_particao(diretorio, linhas, particoes):
+    """Acrescenta as linhas, separadas por partição, aos arquivos temporários das partições."""
+    for particao, grupo in linhas.groupby(particoes_de_comparacao(linhas, particoes, por=["nicho"]), sort=False):
+        with open(os.path.join(diretorio, f"{particao}.pkl"), "ab") as f:
+            pickle.dump(grupo, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _ler_particao(caminho):
+    partes = []
+    with open(caminho, "rb") as f:
+        while True:
+            try:
+                partes.append(pickle.load(f))
+            except EOFError:
+                break
+    return pd.concat(partes, ignore_index=True)
+
+
+def consolidar_em_streaming(arquivos, output_path, chaves=CHAVES_DEDUPLICACAO, chunksize=TAMANHO_CHUNK, workers=None,
+                            tamanho_faixa=TAMANHO_FAIXA, aproximada=False, particoes=PARTICOES_APROXIMADAS):
+    """
+    Lê cada arquivo em partes e grava direto no master apenas as linhas cuja chave ainda não foi vista.
+    Guarda somente um vetor ordenado de hashes de 64 bits das chaves, então a memória é limitada
+    pelo número de chaves únicas e não pelo total de linhas. O pai só divide os arquivos em faixas de
+    bytes (ver _faixas_do_arquivo); cada worker lê a sua faixa do disco e faz a leitura do CSV, a
+    padronização, o cálculo do id e os hashes, então a interpretação roda em paralelo e só as partes
+    já prontas voltam ao pai. A janela de mapear_em_paralelo limita as faixas em trânsito, então o
+    pico continua limitado a algumas faixas. O pai apenas deduplica e grava, na ordem dos arquivos.
+    Com `aproximada`, as linhas que passam pela deduplicação exata vão para `particoes` arquivos
+    temporários, pelo contexto de comparação (cidade, nicho) de deduplicacao.py; no fim, cada partição
+    é deduplicada por deduplicar_empresas e gravada no master. Como as linhas de cidades ou nichos
+    diferentes nunca são comparadas, o resultado é o mesmo de deduplicar o master inteiro, mas o pico
+    é o de uma partição. Dentro de cada partição vale a ordem dos arquivos (a primeira ocorrência
+    fica); entre partições, o master segue a ordem das partições.
+    Retorna as estatísticas por arquivo.
+    """
+    colunas = [COLUNA_ID] # Arquivos antigos, sem a coluna, recebem o id calculado na leitura
+    for f in arquivos:
+        for coluna in pd.read_csv(f, nrows=0).columns:
+            coluna = ALIASES_COLUNAS.get(coluna, coluna)
+            if coluna not in colunas:
+                colunas.append(coluna)
+
+    faixas = _faixas_dos_arquivos(arquivos, tamanho_faixa)
+    preparadas = mapear_em_paralelo(partial(_preparar_faixa, chaves=chaves, chunksize=chunksize), faixas, workers)
+
+    vistos = np.empty(0, dtype=np.uint64)
+    estatisticas = [
+        {"arquivo": os.path.basename(f), "linhas_lidas": 0, "linhas_adicionadas": 0, "duplicatas_removidas": 0,
+         "duplicatas_aproximadas": 0}
+        for f in arquivos
+    ]
+    diretorio_saida = os.path.dirname(output_path) or None
+    if diretorio_saida:
+        os.makedirs(diretorio_saida, exist_ok=True)
+    with EscritorTabela(output_path, colunas, esquema=ESQUEMA_EMPRESAS) as escritor, \
+            (tempfile.TemporaryDirectory(dir=diretorio_saida, prefix=".particoes_") if aproximada else nullcontext()) as temporario:
+        for indice, partes in preparadas:
+            estatistica = estatisticas[indice]
+            for chunk, hashes in partes:
+                estatistica["linhas_lidas"] += len(chunk)
+                unicos, primeira_posicao = np.unique(hashes, return_index=True)
+                novos = ~np.isin(unicos, vistos, assume_unique=True)
+                if novos.any():
+                    vistos = np.union1d(vistos, unicos[novos])
+                    manter = np.sort(primeira_posicao[novos])
+                    if aproximada:
+                        _guardar_na_particao(temporario, chunk.iloc[manter].assign(**{_COLUNA_ARQUIVO: indice}), particoes)
+                    else:
+                        escritor.escrever(chunk.iloc[manter])
+                    estatistica["linhas_adicionadas"] += len(manter)
+
+        if aproximada:
+            for particao in range(particoes):
+                caminho = os.path.join(temporario, f"{particao}.pkl")
+                if not os.path.exists(caminho):
+                    continue
+                df_particao = _ler_particao(caminho)
+                df_unicos = deduplicar_empresas(df_particao, por=["nicho"])
+                removidas = df_particao[_COLUNA_ARQUIVO].value_counts().sub(df_unicos[_COLUNA_ARQUIVO].value_counts(), fill_value=0)
+                for indice, quantidade in removidas.items():
+                    estatisticas[indice]["duplicatas_aproximadas"] += int(quantidade)
+                    estatisticas[indice]["linhas_adicionadas"] -= int(quantidade)
+                escritor.escrever(df_unicos.drop(columns=[_COLUNA_ARQUIVO]))
+                os.remove(caminho)
+
+    for estatistica in estatisticas:
+        estatistica["duplicatas_removidas"] = estatistica["linhas_lidas"] - estatistica["linhas_adicionadas"]
+    return estatisticas
+
+
+def consolidar_dados_empresas_googlemaps(results_path, consolidated_path, workers=None):
     """
     Consolida todos os arquivos dados_empresas_googlemaps_sub_*.csv em um único arquivo master.
-    Realiza deduplicação com base em "nome", "cidade" e "nicho".
+    Realiza a deduplicação com base em id_empresa, cidade e nicho e a deduplicação aproximada entre
+    fontes (ver deduplicacao.py), por cidade e nicho, ambas em streaming (ver consolidar_em_streaming).
+    Retorna o caminho lógico do master (o master não é recarregado em memória), ou None se não há arquivos.
     """
     print("Consolidando dados_empresas_googlemaps...")
-    all_files = glob.glob(os.path.join(results_path, "csv", "dados_empresas_googlemaps_sub_*.csv"))
+    all_files = sorted(glob.glob(os.path.join(results_path, "csv", "dados_empresas_googlemaps_sub_*.csv")))
     
     if not all_files:
         print("Nenhum arquivo dados_empresas_googlemaps_sub_*.csv encontrado para consolidar.")
-        return pd.DataFrame()
-
-    df_list = []
-    for f in all_files:
-        df = pd.read_csv(f)
-        df_list.append(df)
-    
-    if not df_list:
-        return pd.DataFrame()
+        return None
 
-    df_master = pd.concat(df_list, ignore_index=True)
-    df_master.drop_duplicates(subset=["nome", "cidade", "nicho"], inplace=True)
-    
     output_path = os.path.join(consolidated_path, "dados_empresas_googlemaps_master.csv")
     os.makedirs(consolidated_path, exist_ok=True)
-    df_master.to_csv(output_path, index=False)
-    print(f"Dados consolidados salvos em: {output_path}")
-    return df_master
+    estatisticas = consolidar_em_streaming(all_files, output_path, workers=workers, aproximada=True)
 
-def criar_nichos_especificos(df_oportunidades, df_empresas_master, consolidated_path):
+    for estatistica in estatisticas:
+        print(f"  {estatistica['arquivo']}: {estatistica['linhas_lidas']} linhas lidas, "
+              f"{estatistica['linhas_adicionadas']} adicionadas, {estatistica['duplicatas_removidas']} duplicatas removidas "
+              f"({estatistica['duplicatas_aproximadas']} com grafias diferentes).")
+    total = sum(e["linhas_adicionadas"] for e in estatisticas)
+    print(f"Dados consolidados ({total} registros únicos) salvos em: {resolver_caminho(output_path, formato_configurado())}")
+    return output_path
+
+def criar_nichos_especificos(df_oportunidades, master_path, consolidated_path, chunksize=TAMANHO_CHUNK):
     """
     Cria arquivos CSV específicos para nichos com score de oportunidade acima do limite.
+    O master é lido em partes de `chunksize` linhas e cada parte acrescenta as suas linhas aos arquivos
+    dos nichos, então o pico de memória é o de uma parte e não o do master inteiro.
     """
     print("Criando arquivos específicos por nicho...")
     especificos_path = os.path.join(consolidated_path, "especificos")
     os.makedirs(especificos_path, exist_ok=True)
 
     nichos_interessantes = df_oportunidades[df_oportunidades["score_oportunidade"] > LIMITE_SCORE]["nicho"].unique()
-
+    caminhos = {}
     for nicho in nichos_interessantes:
-        df_nicho = df_empresas_master[df_empresas_master["nicho"] == nicho]
         nicho_filename = nicho.replace(" ", "_").replace("/", "_").replace("\\", "_").replace(":", "").replace("*", "").replace("?", "").replace("\"", "").replace("<", "").replace(">", "").replace("|", "")
-        output_path = os.path.join(especificos_path, f"{nicho_filename}_empresas_googlemaps.csv")
-        df_nicho.to_csv(output_path, index=False)
+        caminhos[nicho] = os.path.join(especificos_path, f"{nicho_filename}_empresas_googlemaps.csv")
+
+    iniciados = set()
+    colunas = None
+    for chunk in carregar_tabela_em_partes(master_path, chunksize, esquema=ESQUEMA_EMPRESAS):
+        colunas = chunk.columns
+        chunk = chunk[chunk["nicho"].isin(caminhos)]
+        for nicho, df_nicho in chunk.groupby("nicho", observed=True, sort=False):
+            df_nicho.to_csv(caminhos[nicho], mode="a" if nicho in iniciados else "w", header=nicho not in iniciados, index=False)
+            iniciados.add(nicho)
+
+    for nicho, output_path in caminhos.items():
+        if nicho not in iniciados: # Nicho sem empresas no master: só o cabeçalho, como antes
+            pd.DataFrame(columns=colunas).to_csv(output_path, index=False)
         print(f"Arquivo específico para nicho '{nicho}' salvo em: {output_path}")
 
 # --- Funções de Limpeza --- #
@@ -100,18 +284,19 @@ def organizar_oportunidades_db(data_path):
     """
     print("Organizando oportunidades.db.csv e criando melhores_oportunidades.db.csv...")
     oportunidades_db_path = os.path.join(data_path, "oportunidades.db.csv")
-    df_oportunidades = pd.read_csv(oportunidades_db_path)
+    garantir_visao(oportunidades_db_path) # O analisador só faz upsert no SQLite; a visão é regenerada aqui
+    df_oportunidades = carregar_tabela(oportunidades_db_path, esquema=ESQUEMA_OPORTUNIDADES)
 
     # Ordenar e salvar oportunidades.db.csv
     df_oportunidades_sorted = df_oportunidades.sort_values(by="score_oportunidade", ascending=False)
-    df_oportunidades_sorted.to_csv(oportunidades_db_path, index=False)
-    print(f"oportunidades.db.csv organizado por score e salvo em: {oportunidades_db_path}")
+    caminho_salvo = salvar_tabela(df_oportunidades_sorted, oportunidades_db_path, esquema=ESQUEMA_OPORTUNIDADES)
+    print(f"oportunidades.db.csv organizado por score e salvo em: {caminho_salvo}")
 
     # Criar melhores_oportunidades.db.csv
     df_melhores_oportunidades = df_oportunidades_sorted[df_oportunidades_sorted["score_oportunidade"] > LIMITE_SCORE]
     melhores_oportunidades_path = os.path.join(data_path, "melhores_oportunidades.db.csv") # Alterado para data_path
-    df_melhores_oportunidades.to_csv(melhores_oportunidades_path, index=False)
-    print(f"Melhores oportunidades salvas em: {melhores_oportunidades_path}")
+    caminho_salvo = salvar_tabela(df_melhores_oportunidades, melhores_oportunidades_path, esquema=ESQUEMA_OPORTUNIDADES)
+    print(f"Melhores oportunidades salvas em: {caminho_salvo}")
     return df_oportunidades_sorted, df_melhores_oportunidades
 
 def gerar_grafico_oportunidades(df_melhores_oportunidades, data_path): # Alterado para data_path
@@ -123,8 +308,12 @@ def gerar_grafico_oportunidades(df_melhores_oportunidades, data_path): # Alterad
         print("Não há melhores oportunidades para gerar o gráfico.")
         return
 
+    # matplotlib/seaborn só são importados quando há gráfico a desenhar (são a maior parte do tempo de importação)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Agrupar por nicho e calcular a média do score de oportunidade
-    df_plot = df_melhores_oportunidades.groupby("nicho")["score_oportunidade"].mean().sort_values(ascending=False).head(10) # Top 10 nichos
+    df_plot = df_melhores_oportunidades.groupby("nicho", observed=True)["score_oportunidade"].mean().sort_values(ascending=False).head(10) # Top 10 nichos
 
     plt.figure(figsize=(12, 7))
     ax = sns.barplot(x=df_plot.values, y=df_plot.index, palette="viridis")
@@ -179,15 +368,15 @@ def main():
     limpar_arquivos_antigos(results_path)
 
     # 1. Consolidar dados_empresas_googlemaps
-    df_empresas_master = consolidar_dados_empresas_googlemaps(results_path, consolidated_path)
+    master_path = consolidar_dados_empresas_googlemaps(results_path, consolidated_path)
     num_processed_files = len(glob.glob(os.path.join(results_path, "csv", "dados_empresas_googlemaps_sub_*.csv")))
 
     # 2. Organizar oportunidades.db.csv e criar melhores_oportunidades.db.csv
     df_oportunidades_sorted, df_melhores_oportunidades = organizar_oportunidades_db(data_path) 
 
     # 3. Criar arquivos específicos por nicho (se houver dados de empresas)
-    if not df_empresas_master.empty:
-        criar_nichos_especificos(df_oportunidades_sorted, df_empresas_master, consolidated_path)
+    if master_path is not None:
+        criar_nichos_especificos(df_oportunidades_sorted, master_path, consolidated_path)
     else:
         print("Não há dados de empresas para criar arquivos específicos por nicho.")
 
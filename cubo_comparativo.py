@@ -0,0 +1,289 @@
+# ===============================================================
+# cubo_comparativo.py
+# Objetivo: cubo materializado nicho × cidade dos scores de oportunidade
+# ===============================================================
+#
+# O relatório comparativo (média, desvio padrão e replicabilidade por nicho) e o heatmap
+# nicho × cidade saem do mesmo cubo, sem reler nem reagrupar o banco de oportunidades:
+#   - `scores` é uma matriz densa float32 (linhas = nichos, colunas = cidades, NaN = par
+#     não analisado) e `alta` marca os pares classificados como "Alta";
+#   - `indice_nichos`/`indice_cidades` mapeiam nome -> posição na matriz;
+#   - por nicho ficam acumulados soma, soma dos quadrados, nº de cidades e nº de cidades
+#     "Alta", então `upsert` de um único (cidade, nicho) atualiza média, desvio e
+#     replicabilidade em O(1) (a matriz cresce dobrando de capacidade).
+# O cubo é gravado em data/oportunidades.cubo.npz, ao lado do banco, e atualizado pelo
+# analisador e pelo indexador a cada upsert (`atualizar_cubo`). Ele guarda a versão dos dados
+# do SQLite que reflete (banco_oportunidades.versao_dados); se ela não for a atual, o cubo é
+# reconstruído a partir da visão oportunidades.db.csv, regenerada antes se desatualizada. Sem
+# SQLite, vale a data de modificação: visão mais nova que o cubo também o reconstrói.
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import ESQUEMA_OPORTUNIDADES, carregar_tabela, formato_configurado, resolver_caminho
+from banco_oportunidades import garantir_visao, versao_dados
+
+COLUNAS_CUBO = ["nicho", "cidade", "score_oportunidade", "classificacao"]
+CAPACIDADE_INICIAL = 16
+
+
+def caminho_cubo(output_db_file: str) -> str:
+    """Retorna o caminho do cubo correspondente ao banco lógico (ex.: data/oportunidades.cubo.npz)."""
+    base = output_db_file[:-len(".db.csv")] if output_db_file.endswith(".db.csv") else os.path.splitext(output_db_file)[0]
+    return f"{base}.cubo.npz"
+
+
+class CuboComparativo:
+    """Scores por (nicho, cidade) em matriz densa, com agregados por nicho mantidos incrementalmente."""
+
+    def __init__(self, capacidade_nichos: int = CAPACIDADE_INICIAL, capacidade_cidades: int = CAPACIDADE_INICIAL):
+        self.nichos: list[str] = []
+        self.cidades: list[str] = []
+        self.indice_nichos: dict[str, int] = {}
+        self.indice_cidades: dict[str, int] = {}
+        self.scores = np.full((capacidade_nichos, capacidade_cidades), np.nan, dtype=np.float32)
+        self.alta = np.zeros((capacidade_nichos, capacidade_cidades), dtype=bool)
+        self.soma = np.zeros(capacidade_nichos)
+        self.soma_quadrados = np.zeros(capacidade_nichos)
+        self.contagem = np.zeros(capacidade_nichos, dtype=np.int64)
+        self.num_alta = np.zeros(capacidade_nichos, dtype=np.int64)
+        self.versao_dados = 0 # Versão do SQLite refletida pelo cubo (-1: desconhecida)
+
+    def __len__(self) -> int:
+        return int(self.contagem[:len(self.nichos)].sum())
+
+    # ---------------------------------------------------
+    # 1. Construção e atualização
+    # ---------------------------------------------------
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> "CuboComparativo":
+        """Monta o cubo de uma vez a partir das colunas COLUNAS_CUBO (o último registro de cada par prevalece)."""
+        if df.empty:
+            return cls()
+        df = df.drop_duplicates(subset=["nicho", "cidade"], keep="last")
+        nichos = df["nicho"].astype("category")
+        cidades = df["cidade"].astype("category")
+        cubo = cls(len(nichos.cat.categories), len(cidades.cat.categories))
+        cubo.nichos = [str(n) for n in nichos.cat.categories]
+        cubo.cidades = [str(c) for c in cidades.cat.categories]
+        cubo.indice_nichos = {nicho: i for i, nicho in enumerate(cubo.nichos)}
+        cubo.indice_cidades = {cidade: j for j, cidade in enumerate(cubo.cidades)}
+
+        i, j = nichos.cat.codes.to_numpy(), cidades.cat.codes.to_numpy()
+        cubo.scores[i, j] = df["score_oportunidade"].to_numpy(dtype=np.float32, na_value=np.nan)
+        cubo.alta[i, j] = (df["classificacao"].astype("string") == "Alta").fillna(False).to_numpy(dtype=bool)
+        cubo.recalcular()
+        return cubo
+
+    def recalcular(self):
+        """Refaz os agregados por nicho a partir da matriz (ex.: depois de carregar ou de muitas atualizações)."""
+        validos = ~np.isnan(self.scores)
+        self.alta &= validos
+        valores = np.where(validos, self.scores, 0).astype(np.float64)
+        self.soma = valores.sum(axis=1)
+        self.soma_quadrados = (valores * valores).sum(axis=1)
+        self.contagem = validos.sum(axis=1).astype(np.int64)
+        self.num_alta = self.alta.sum(axis=1).astype(np.int64)
+
+    def _crescer(self, linhas: int, colunas: int):
+        n, m = self.scores.shape
+        scores = np.full((linhas, colunas), np.nan, dtype=np.float32)
+        alta = np.zeros((linhas, colunas), dtype=bool)
+        scores[:n, :m] = self.scores
+        alta[:n, :m] = self.alta
+        self.scores, self.alta = scores, alta
+        if linhas > n:
+            extra = linhas - n
+            self.soma = np.concatenate([self.soma, np.zeros(extra)])
+            self.soma_quadrados = np.concatenate([self.soma_quadrados, np.zeros(extra)])
+            self.contagem = np.concatenate([self.contagem, np.zeros(extra, dtype=np.int64)])
+            self.num_alta = np.concatenate([self.num_alta, np.zeros(extra, dtype=np.int64)])
+
+    def _posicao(self, nome: str, nomes: list[str], indice: dict[str, int], eixo: int) -> int:
+        posicao = indice.get(nome)
+        if posicao is None:
+            posicao = len(nomes)
+            if posicao == self.scores.shape[eixo]:
+                nova_capacidade = max(CAPACIDADE_INICIAL, 2 * posicao)
+                if eixo == 0:
+                    self._crescer(nova_capacidade, self.scores.shape[1])
+                else:
+                    self._crescer(self.scores.shape[0], nova_capacidade)
+            nomes.append(nome)
+            indice[nome] = posicao
+        return posicao
+
+    def upsert(self, cidade: str, nicho: str, score: float, classificacao: str | None):
+        """Insere ou substitui o score de um (cidade, nicho) e ajusta os agregados do nicho em O(1)."""
+        i = self._posicao(str(nicho), self.nichos, self.indice_nichos, 0)
+        j = self._posicao(str(cidade), self.cidades, self.indice_cidades, 1)
+
+        anterior = self.scores[i, j]
+        if not np.isnan(anterior):
+            anterior = float(anterior)
+            self.soma[i] -= anterior
+            self.soma_quadrados[i] -= anterior * anterior
+            self.contagem[i] -= 1
+            self.num_alta[i] -= int(self.alta[i, j])
+
+        # Os agregados acumulam o valor já arredondado para float32, o mesmo que fica na matriz
+        valor = np.float32(np.nan if score is None or pd.isna(score) else score)
+        self.scores[i, j] = valor
+        self.alta[i, j] = not np.isnan(valor) and classificacao == "Alta"
+        if not np.isnan(valor):
+            valor = float(valor)
+            self.soma[i] += valor
+            self.soma_quadrados[i] += valor * valor
+            self.contagem[i] += 1
+            self.num_alta[i] += int(self.alta[i, j])
+
+    def upsert_dataframe(self, df: pd.DataFrame) -> int:
+        """Aplica `upsert` a cada linha de um DataFrame com as colunas COLUNAS_CUBO. Retorna o nº de linhas."""
+        colunas = df[["cidade", "nicho", "score_oportunidade", "classificacao"]]
+        for cidade, nicho, score, classificacao in colunas.itertuples(index=False, name=None):
+            self.upsert(cidade, nicho, score, None if pd.isna(classificacao) else str(classificacao))
+        return len(colunas)
+
+    # ---------------------------------------------------
+    # 2. Consultas
+    # ---------------------------------------------------
+
+    def metricas_nicho(self, nicho: str) -> dict:
+        """Métricas de um nicho lidas direto dos agregados, em O(1)."""
+        i = self.indice_nichos[nicho]
+        metricas = self._metricas(slice(i, i + 1))
+        return {chave: valores[0].item() for chave, valores in metricas.items()}
+
+    def _metricas(self, linhas) -> dict:
+        contagem = self.contagem[linhas]
+        soma = self.soma[linhas]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = soma / contagem
+            # Variância amostral (ddof=1, como o std do pandas); nichos com uma só cidade ficam com desvio 0
+            variancia = np.where(contagem > 1, (self.soma_quadrados[linhas] - soma * media) / (contagem - 1), 0.0)
+            replicabilidade = self.num_alta[linhas] / contagem * 100
+        return {
+            "num_cidades": contagem,
+            "media": media,
+            "desvio_padrao": np.sqrt(np.clip(variancia, 0, None)),
+            "replicabilidade_pct": replicabilidade,
+        }
+
+    def relatorio(self) -> pd.DataFrame:
+        """Relatório comparativo por nicho no formato de ESQUEMA_RELATORIO_COMPARATIVO, do maior para o menor score médio."""
+        metricas = self._metricas(slice(0, len(self.nichos)))
+        relatorio = pd.DataFrame({
+            "Nicho": pd.array(self.nichos, dtype="string"),
+            "Nº de cidades analisadas": pd.array(metricas["num_cidades"], dtype="Int64"),
+            "Média do score": metricas["media"].round(2),
+            "Desvio padrão": metricas["desvio_padrao"].round(2),
+            "Replicabilidade (%)": metricas["replicabilidade_pct"].round(2),
+        })
+        relatorio = relatorio[metricas["num_cidades"] > 0]
+        return relatorio.sort_values(by="Média do score", ascending=False)
+
+    def matriz(self) -> pd.DataFrame:
+        """Scores nicho × cidade (NaN onde o par não foi analisado), em ordem alfabética como um pivot_table."""
+        n, m = len(self.nichos), len(self.cidades)
+        matriz = pd.DataFrame(self.scores[:n, :m], index=pd.Index(self.nichos, name="nicho"),
+                              columns=pd.Index(self.cidades, name="cidade"))
+        matriz = matriz.dropna(how="all").dropna(axis=1, how="all")
+        return matriz.sort_index().sort_index(axis=1)
+
+    # ---------------------------------------------------
+    # 3. Persistência
+    # ---------------------------------------------------
+
+    def salvar(self, caminho: str):
+        """Grava o cubo em .npz (matriz, nomes e agregados), substituindo o arquivo de forma atômica."""
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        n, m = len(self.nichos), len(self.cidades)
+        temporario = f"{caminho}.{os.getpid()}.tmp" # Relatório e gráficos podem reconstruir o cubo ao mesmo tempo
+        with open(temporario, "wb") as arquivo:
+            np.savez(
+                arquivo,
+                nichos=np.array(self.nichos, dtype=str),
+                cidades=np.array(self.cidades, dtype=str),
+                scores=self.scores[:n, :m],
+                alta=self.alta[:n, :m],
+                soma=self.soma[:n],
+                soma_quadrados=self.soma_quadrados[:n],
+                contagem=self.contagem[:n],
+                num_alta=self.num_alta[:n],
+                versao_dados=np.int64(self.versao_dados),
+            )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "CuboComparativo":
+        """Lê um cubo gravado por `salvar`."""
+        with np.load(caminho, allow_pickle=False) as dados:
+            nichos, cidades = dados["nichos"].tolist(), dados["cidades"].tolist()
+            cubo = cls(max(len(nichos), CAPACIDADE_INICIAL), max(len(cidades), CAPACIDADE_INICIAL))
+            n, m = len(nichos), len(cidades)
+            cubo.scores[:n, :m] = dados["scores"]
+            cubo.alta[:n, :m] = dados["alta"]
+            cubo.soma[:n] = dados["soma"]
+            cubo.soma_quadrados[:n] = dados["soma_quadrados"]
+            cubo.contagem[:n] = dados["contagem"]
+            cubo.num_alta[:n] = dados["num_alta"]
+            cubo.versao_dados = int(dados["versao_dados"]) if "versao_dados" in dados.files else -1 # Cubo anterior à versão
+        cubo.nichos, cubo.cidades = nichos, cidades
+        cubo.indice_nichos = {nicho: i for i, nicho in enumerate(nichos)}
+        cubo.indice_cidades = {cidade: j for j, cidade in enumerate(cidades)}
+        return cubo
+
+# ---------------------------------------------------
+# 4. Cubo do banco de oportunidades
+# ---------------------------------------------------
+
+def _visoes(output_db_file: str) -> list[str]:
+    return [c for c in (resolver_caminho(output_db_file, formato_configurado()), output_db_file) if os.path.exists(c)]
+
+
+def carregar_cubo(output_db_file: str) -> CuboComparativo:
+    """
+    Carrega o cubo do banco de oportunidades. Com o índice SQLite, o cubo vale enquanto a versão
+    gravada nele for a do SQLite; sem SQLite, enquanto a visão oportunidades.db.csv não for mais
+    nova que ele. Fora disso (ou sem cubo) ele é reconstruído a partir da visão e gravado.
+    """
+    caminho = caminho_cubo(output_db_file)
+    versao = versao_dados(output_db_file) # Lida antes da visão: um upsert concorrente só deixa o cubo para trás
+    visoes = _visoes(output_db_file)
+    if os.path.exists(caminho):
+        cubo = CuboComparativo.carregar(caminho)
+        if versao is not None and cubo.versao_dados == versao:
+            return cubo
+        if versao is None and not (visoes and os.path.getmtime(visoes[0]) > os.path.getmtime(caminho)):
+            return cubo
+
+    if garantir_visao(output_db_file): # O SQLite pode ter upserts ainda não exportados para a visão
+        visoes = _visoes(output_db_file)
+    if not visoes:
+        return CuboComparativo()
+
+    df = carregar_tabela(output_db_file, colunas=COLUNAS_CUBO, esquema=ESQUEMA_OPORTUNIDADES)
+    cubo = CuboComparativo.de_dataframe(df)
+    cubo.versao_dados = versao or 0
+    cubo.salvar(caminho)
+    logging.info(f"🧊 Cubo comparativo reconstruído a partir de '{output_db_file}': {len(cubo.nichos)} nichos × {len(cubo.cidades)} cidades.")
+    return cubo
+
+
+def atualizar_cubo(output_db_file: str, df_novo: pd.DataFrame, cubo: CuboComparativo | None):
+    """
+    Aplica ao cubo os pares que acabaram de receber upsert no SQLite e grava a nova versão.
+    `cubo` é o cubo carregado antes do upsert; sem ele, o cubo é montado uma única vez a partir da visão completa.
+    """
+    if cubo is None:
+        carregar_cubo(output_db_file)
+        return
+    cubo.upsert_dataframe(df_novo)
+    cubo.versao_dados = versao_dados(output_db_file) or 0
+    cubo.salvar(caminho_cubo(output_db_file))
@@ -0,0 +1,242 @@
+# ===============================================================
+# deduplicacao.py
+# Objetivo: resolução de entidades entre fontes (SerpAPI e Playwright) sem comparação O(n²)
+# ===============================================================
+#
+# O id_empresa (identificadores.py) só une linhas idênticas após a normalização. Aqui
+# variações pequenas de grafia ("Padaria São João Ltda" x "Padaria Sao Joao") também viram
+# uma única empresa:
+#   1. Nome, telefone e endereço são normalizados uma vez por linha; só esses textos ficam
+#      guardados. Os trigramas são montados apenas para as linhas de blocos com dois ou mais
+#      membros, em um cache por bloco descartado ao fim dele (guardá-los para todas as linhas
+#      custava alguns KB por linha).
+#   2. Blocagem: cada linha entra em poucos blocos — (cidade, telefone) e (cidade, chave
+#      fonética de cada um dos dois primeiros termos do nome) — e só pares do mesmo bloco
+#      são comparados. Blocos muito grandes usam vizinhança ordenada (cada linha contra as
+#      JANELA_BLOCO_GRANDE seguintes, em ordem de nome), mantendo o custo quase linear.
+#   3. Os pares aceitos por `mesma_empresa` são unidos com union-find; o representante de
+#      cada grupo é a primeira linha em que ele aparece.
+
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from identificadores import COLUNA_ID, COLUNAS_ENDERECO, normalizar_texto, primeira_coluna
+
+COLUNAS_TELEFONE = ("telefone", "Telefone")
+LIMIAR_NOME = 0.85 # Similaridade mínima do nome quando o telefone não confirma
+LIMIAR_NOME_COM_TELEFONE = 0.5 # Com o mesmo telefone, basta o nome ser parecido
+LIMIAR_ENDERECO = 0.7
+TAMANHO_MAXIMO_BLOCO = 200
+JANELA_BLOCO_GRANDE = 20
+
+_TERMOS_IGNORADOS = {
+    "ltda", "me", "mei", "epp", "eireli", "cia", "sa", "s", "a", "o",
+    "de", "da", "do", "das", "dos", "e", "em", "the",
+}
+_ABREVIACOES_ENDERECO = {
+    "r": "rua", "av": "avenida", "al": "alameda", "tv": "travessa", "trav": "travessa", "estr": "estrada",
+    "rod": "rodovia", "pc": "praca", "pca": "praca", "lgo": "largo", "dr": "doutor", "prof": "professor",
+}
+_TERMOS_IGNORADOS_ENDERECO = {"n", "no", "numero", "s", "sn"}
+_RE_NUMERO = re.compile(r"\d+")
+_REGRAS_FONETICAS = [
+    (re.compile(r"ph"), "f"), (re.compile(r"[cs]h"), "x"), (re.compile(r"lh"), "l"), (re.compile(r"nh"), "n"),
+    (re.compile(r"qu|q"), "k"), (re.compile(r"c(?=[eiy])"), "s"), (re.compile(r"c"), "k"),
+    (re.compile(r"g(?=[eiy])"), "j"), (re.compile(r"z"), "s"), (re.compile(r"y"), "i"), (re.compile(r"w"), "v"),
+    (re.compile(r"h"), ""), (re.compile(r"(.)\1+"), r"\1"),
+]
+
+# ---------------------------------------------------
+# 1. Normalização
+# ---------------------------------------------------
+
+def normalizar_nome(nome) -> str:
+    """Nome sem acentos, pontuação, sufixos societários (Ltda, ME, S.A.) e preposições."""
+    return " ".join(t for t in normalizar_texto(nome).split() if t not in _TERMOS_IGNORADOS)
+
+
+def normalizar_telefone(telefone) -> str:
+    """Últimos 8 dígitos do telefone (ignora DDI, DDD e o nono dígito), ou "" se não houver telefone."""
+    if isinstance(telefone, float) and telefone.is_integer(): # Coluna lida como número pelo read_csv
+        telefone = int(telefone)
+    digitos = re.sub(r"\D", "", normalizar_texto(telefone))
+    return digitos[-8:] if len(digitos) >= 8 else ""
+
+
+def normalizar_endereco(endereco) -> str:
+    """Logradouro e número (o trecho antes de " - "), com abreviações comuns expandidas."""
+    if not normalizar_texto(endereco):
+        return ""
+    texto = normalizar_texto(str(endereco).split(" - ")[0])
+    termos = (_ABREVIACOES_ENDERECO.get(t, t) for t in texto.split())
+    return " ".join(t for t in termos if t not in _TERMOS_IGNORADOS_ENDERECO)
+
+
+def chave_fonetica(termo: str) -> str:
+    """Chave fonética simplificada para o português: primeira letra + consoantes normalizadas (até 6)."""
+    if not termo:
+        return ""
+    chave = termo
+    for regra, troca in _REGRAS_FONETICAS:
+        chave = regra.sub(troca, chave)
+    if not chave:
+        return termo[:6]
+    return (chave[0] + re.sub(r"[aeiou]", "", chave[1:]))[:6]
+
+# ---------------------------------------------------
+# 2. Similaridade
+# ---------------------------------------------------
+
+def _trigramas(texto: str) -> frozenset:
+    texto = f"  {texto} "
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+def similaridade(a: frozenset, b: frozenset) -> float:
+    """Coeficiente de Dice entre dois conjuntos de trigramas."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class _Registro:
+    """Trigramas e números de uma linha já normalizada, montados só para a comparação dentro de um bloco."""
+    __slots__ = ("nome", "trigramas_nome", "numeros", "telefone", "trigramas_endereco")
+
+    def __init__(self, nome: str, telefone: str, endereco: str):
+        self.nome = nome
+        self.trigramas_nome = _trigramas(nome) if nome else frozenset()
+        self.numeros = frozenset(_RE_NUMERO.findall(nome))
+        self.telefone = telefone
+        self.trigramas_endereco = _trigramas(endereco) if endereco else frozenset()
+
+
+def mesma_empresa(a: _Registro, b: _Registro) -> bool:
+    """
+    Decide se dois registros do mesmo bloco são a mesma empresa. Números no nome que não batem
+    ("Loja 1" x "Loja 2") separam sempre; o mesmo telefone aceita nomes apenas parecidos; sem essa
+    confirmação o nome precisa ser quase igual e os endereços, quando ambos existem, parecidos.
+    """
+    if a.numeros and b.numeros and a.numeros != b.numeros:
+        return False
+    sim_nome = similaridade(a.trigramas_nome, b.trigramas_nome)
+    if a.telefone and a.telefone == b.telefone:
+        return sim_nome >= LIMIAR_NOME_COM_TELEFONE
+    if sim_nome < LIMIAR_NOME:
+        return False
+    if a.trigramas_endereco and b.trigramas_endereco:
+        return similaridade(a.trigramas_endereco, b.trigramas_endereco) >= LIMIAR_ENDERECO
+    return True
+
+# ---------------------------------------------------
+# 3. Blocagem e union-find
+# ---------------------------------------------------
+
+def _encontrar(pais: list[int], i: int) -> int:
+    while pais[i] != i:
+        pais[i] = pais[pais[i]]
+        i = pais[i]
+    return i
+
+
+def _unir(pais: list[int], i: int, j: int) -> int:
+    raiz_i, raiz_j = _encontrar(pais, i), _encontrar(pais, j)
+    # A menor posição vira a raiz, então o representante é a primeira ocorrência
+    raiz = min(raiz_i, raiz_j)
+    pais[max(raiz_i, raiz_j)] = raiz
+    return raiz
+
+
+def _pares_do_bloco(posicoes: list[int], nomes: list[str]):
+    if len(posicoes) <= TAMANHO_MAXIMO_BLOCO:
+        for k, i in enumerate(posicoes):
+            for j in posicoes[k + 1:]:
+                yield i, j
+    else:
+        ordenadas = sorted(posicoes, key=lambda p: nomes[p])
+        for k, i in enumerate(ordenadas):
+            for j in ordenadas[k + 1:k + 1 + JANELA_BLOCO_GRANDE]:
+                yield i, j
+
+
+def _contexto_de_comparacao(df: pd.DataFrame, por) -> list[str]:
+    """Cidade normalizada e valores de `por` de cada linha: só linhas com o mesmo contexto são comparadas."""
+    contexto = [normalizar_texto(c) for c in primeira_coluna(df, ("cidade",))]
+    for coluna in por:
+        contexto = [f"{c}|{v}" for c, v in zip(contexto, df[coluna].astype("string").fillna(""))]
+    return contexto
+
+
+def particoes_de_comparacao(df: pd.DataFrame, particoes: int, por: list[str] | tuple = ()) -> np.ndarray:
+    """
+    Partição (0..particoes-1) de cada linha, pelo hash do seu contexto de comparação: linhas que
+    agrupar_duplicatas poderia unir caem sempre na mesma partição, então um conjunto grande pode ser
+    deduplicado partição a partição, com o mesmo resultado.
+    """
+    contexto = np.array(_contexto_de_comparacao(df, por), dtype=object)
+    return (pd.util.hash_array(contexto) % np.uint64(particoes)).astype(np.int64)
+
+
+def agrupar_duplicatas(df: pd.DataFrame, por: list[str] | tuple = ()) -> np.ndarray:
+    """
+    Retorna, para cada linha de `df`, a posição (0..n-1) do representante do seu grupo de
+    duplicatas. Só linhas da mesma cidade e com os mesmos valores em `por` são comparadas.
+    """
+    n = len(df)
+    pais = list(range(n))
+    if n == 0:
+        return np.arange(0)
+
+    # Só os textos normalizados ficam por linha; os trigramas são montados por bloco
+    nomes = [normalizar_nome(nome) for nome in primeira_coluna(df, ("nome",))]
+    telefones = [normalizar_telefone(telefone) for telefone in primeira_coluna(df, COLUNAS_TELEFONE)]
+    enderecos = [normalizar_endereco(endereco) for endereco in primeira_coluna(df, COLUNAS_ENDERECO)]
+    contexto = _contexto_de_comparacao(df, por)
+
+    blocos = defaultdict(list)
+    ids = df[COLUNA_ID] if COLUNA_ID in df.columns else pd.Series(pd.NA, index=df.index)
+    for posicao, (nome, telefone, ctx, id_empresa) in enumerate(zip(nomes, telefones, contexto, ids)):
+        if not pd.isna(id_empresa):
+            blocos[("id", ctx, id_empresa)].append(posicao)
+        if telefone:
+            blocos[("telefone", ctx, telefone)].append(posicao)
+        for termo in nome.split()[:2]:
+            blocos[("nome", ctx, chave_fonetica(termo))].append(posicao)
+    del contexto
+
+    # Endereço (normalizado) conhecido de cada grupo: um registro sem endereço não pode servir de
+    # ponte entre duas filiais homônimas com endereços diferentes
+    endereco_do_grupo = {}
+    for (tipo, _, _), posicoes in blocos.items():
+        if len(posicoes) < 2:
+            continue
+        if tipo == "id":
+            for j in posicoes[1:]:
+                _unir(pais, posicoes[0], j)
+            continue
+        registros = {} # Cache do bloco: cada linha monta os seus trigramas uma vez por bloco
+        for i, j in _pares_do_bloco(posicoes, nomes):
+            raiz_i, raiz_j = _encontrar(pais, i), _encontrar(pais, j)
+            if raiz_i == raiz_j:
+                continue
+            for p in (i, j):
+                if p not in registros:
+                    registros[p] = _Registro(nomes[p], telefones[p], enderecos[p])
+            if not mesma_empresa(registros[i], registros[j]):
+                continue
+            endereco_i = endereco_do_grupo.get(raiz_i, enderecos[raiz_i])
+            endereco_j = endereco_do_grupo.get(raiz_j, enderecos[raiz_j])
+            if endereco_i and endereco_j and similaridade(_trigramas(endereco_i), _trigramas(endereco_j)) < LIMIAR_ENDERECO:
+                continue
+            endereco_do_grupo[_unir(pais, i, j)] = endereco_i or endereco_j
+
+    return np.array([_encontrar(pais, i) for i in range(n)])
+
+
+def deduplicar_empresas(df: pd.DataFrame, por: list[str] | tuple = ()) -> pd.DataFrame:
+    """Mantém só a primeira linha de cada grupo de duplicatas (ver agrupar_duplicatas)."""
+    representantes = agrupar_duplicatas(df, por)
+    return df[representantes == np.arange(len(df))]
@@ -0,0 +1,135 @@
+# ===============================================================
+# diario_execucao.py
+# Objetivo: diário persistente das execuções dos scrapers, por par (nicho, cidade)
+# ===============================================================
+#
+# Cada par passa pelos estados pendente -> em_andamento -> concluido | falhou, com o número de
+# linhas gravadas. O diário fica em SQLite (padrão data/diario_scraping.sqlite) e é atualizado a
+# cada transição, então sobrevive a quedas e Ctrl-C. Uma execução nova reinicia os pares como
+# pendentes; com --resume, os pares já concluídos são pulados e os demais (pendentes, falhos ou
+# interrompidos em andamento) são refeitos. No modo 'default', antes de acrescentar as linhas de um
+# par ao CSV de saída, o escritor registra o tamanho do arquivo (posicao_saida): se a execução cair
+# entre a gravação e o concluido, a retomada trunca o arquivo de volta a essa posição antes de
+# refazer o par, em vez de acrescentar as linhas dele duas vezes.
+
+import logging
+import os
+import sqlite3
+import time
+
+CAMINHO_DIARIO_PADRAO = os.path.join("data", "diario_scraping.sqlite")
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+
+class DiarioExecucao:
+    """Diário de tarefas (nicho, cidade) de um scraper em um modo de execução."""
+
+    def __init__(self, scraper: str, modo: str = "default", caminho: str | None = None):
+        self.scraper = scraper
+        self.modo = modo
+        self.caminho = caminho or CAMINHO_DIARIO_PADRAO
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.conn = sqlite3.connect(self.caminho)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tarefas (
+                scraper TEXT NOT NULL,
+                modo TEXT NOT NULL,
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                linhas INTEGER NOT NULL DEFAULT 0,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                erro TEXT,
+                atualizado_em REAL NOT NULL,
+                posicao_saida INTEGER,
+                PRIMARY KEY (scraper, modo, nicho, cidade)
+            );
+        """)
+        colunas = {linha[1] for linha in self.conn.execute("PRAGMA table_info(tarefas)")}
+        if "posicao_saida" not in colunas: # Diários criados antes da coluna existir
+            with self.conn:
+                self.conn.execute("ALTER TABLE tarefas ADD COLUMN posicao_saida INTEGER")
+
+    def preparar(self, pares: list[tuple[str, str]], retomar: bool = False) -> list[tuple[str, str]]:
+        """
+        Registra os pares da execução e retorna os que ainda precisam ser buscados.
+        Sem `retomar`, todos voltam a pendente; com `retomar`, os concluídos são pulados.
+        """
+        agora = time.time()
+        with self.conn:
+            if not retomar:
+                self.conn.execute("DELETE FROM tarefas WHERE scraper = ? AND modo = ?", (self.scraper, self.modo))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tarefas (scraper, modo, nicho, cidade, estado, atualizado_em) VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.scraper, self.modo, nicho, cidade, PENDENTE, agora) for nicho, cidade in pares],
+            )
+        concluidos = {
+            (nicho, cidade) for nicho, cidade in self.conn.execute(
+                "SELECT nicho, cidade FROM tarefas WHERE scraper = ? AND modo = ? AND estado = ?",
+                (self.scraper, self.modo, CONCLUIDO),
+            )
+        }
+        restantes = [par for par in pares if par not in concluidos]
+        if retomar:
+            logging.info(f"⏯️ Retomando execução: {len(pares) - len(restantes)} par(es) já concluído(s), {len(restantes)} restante(s).")
+        return restantes
+
+    def _atualizar(self, nicho: str, cidade: str, estado: str, linhas: int = 0, erro: str | None = None):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tarefas SET estado = ?, linhas = ?, erro = ?, atualizado_em = ?, posicao_saida = NULL, "
+                "tentativas = tentativas + (CASE WHEN ? = ? THEN 1 ELSE 0 END) "
+                "WHERE scraper = ? AND modo = ? AND nicho = ? AND cidade = ?",
+                (estado, linhas, erro, time.time(), estado, EM_ANDAMENTO, self.scraper, self.modo, nicho, cidade),
+            )
+
+    def marcar_em_andamento(self, nicho: str, cidade: str):
+        self._atualizar(nicho, cidade, EM_ANDAMENTO)
+
+    def marcar_concluido(self, nicho: str, cidade: str, linhas: int):
+        self._atualizar(nicho, cidade, CONCLUIDO, linhas=linhas)
+
+    def marcar_falha(self, nicho: str, cidade: str, erro: str):
+        self._atualizar(nicho, cidade, FALHOU, erro=str(erro))
+
+    def registrar_posicao_saida(self, nicho: str, cidade: str, posicao: int):
+        """Registra o tamanho do CSV de saída logo antes de acrescentar as linhas do par em andamento."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tarefas SET posicao_saida = ?, atualizado_em = ? WHERE scraper = ? AND modo = ? AND nicho = ? AND cidade = ?",
+                (posicao, time.time(), self.scraper, self.modo, nicho, cidade),
+            )
+
+    def posicao_saida_interrompida(self) -> int | None:
+        """
+        Posição do CSV de saída em que começou a gravação de um par que ficou em andamento (queda entre
+        a gravação e o concluido); None se nenhuma gravação foi interrompida. As gravações são feitas
+        uma de cada vez, então tudo depois dessa posição pertence aos pares interrompidos.
+        """
+        (posicao,) = self.conn.execute(
+            "SELECT MIN(posicao_saida) FROM tarefas WHERE scraper = ? AND modo = ? AND estado = ? AND posicao_saida IS NOT NULL",
+            (self.scraper, self.modo, EM_ANDAMENTO),
+        ).fetchone()
+        return posicao
+
+    def contagem_por_estado(self) -> dict[str, int]:
+        """Número de pares em cada estado para este scraper e modo."""
+        return dict(self.conn.execute(
+            "SELECT estado, COUNT(*) FROM tarefas WHERE scraper = ? AND modo = ? GROUP BY estado",
+            (self.scraper, self.modo),
+        ).fetchall())
+
+    def fechar(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
@@ -0,0 +1,147 @@
+# ===============================================================
+# esperas.py
+# Objetivo: esperas orientadas a eventos no Playwright, com piso de cortesia configurável
+# ===============================================================
+#
+# Em vez de esperar um tempo aleatório fixo após cada rolagem, busca ou clique, a espera termina
+# no primeiro destes eventos: a quantidade de cartões mudou, o marcador de fim da lista apareceu
+# ou a rede ficou ociosa — sempre limitada por um tempo máximo. O jitter aleatório continua
+# existindo, mas como piso de cortesia separado: a espera dura no mínimo esse tempo.
+# Configuração: SCRAPER_ESPERA_MAXIMA_MS (padrão 7000), SCRAPER_CORTESIA_MS (padrão "300,900")
+# e SCRAPER_REDE_OCIOSA_MS (padrão 1000).
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+
+from extracao_cartoes import SELETORES_LISTA_CARTOES
+
+MARCADOR_FIM_DA_LISTA = "Você chegou ao fim da lista."
+ESPERA_MAXIMA_PADRAO_MS = 7000
+CORTESIA_PADRAO_MS = (300, 900)
+REDE_OCIOSA_PADRAO_MS = 1000
+
+# Verdadeiro quando o total de cartões difere de `totalAnterior` ou o marcador de fim da lista está na página
+JS_LISTA_MUDOU = """({seletoresLista, totalAnterior, marcadorFim}) => {
+    let total = 0;
+    for (const seletor of seletoresLista) {
+        total = document.querySelectorAll(seletor).length;
+        if (total) break;
+    }
+    return total !== totalAnterior || document.body.textContent.includes(marcadorFim);
+}"""
+
+# ---------------------------------------------------
+# 1. Configuração
+# ---------------------------------------------------
+
+def espera_maxima_configurada() -> int:
+    """Tempo máximo (ms) de cada espera por evento (SCRAPER_ESPERA_MAXIMA_MS)."""
+    load_dotenv()
+    return int(os.getenv("SCRAPER_ESPERA_MAXIMA_MS", ESPERA_MAXIMA_PADRAO_MS))
+
+
+def cortesia_configurada() -> tuple[int, int]:
+    """Intervalo (ms) do piso de cortesia aleatório (SCRAPER_CORTESIA_MS, formato "min,max")."""
+    load_dotenv()
+    valor = os.getenv("SCRAPER_CORTESIA_MS")
+    if not valor:
+        return CORTESIA_PADRAO_MS
+    minimo, _, maximo = valor.partition(",")
+    return int(minimo), int(maximo or minimo)
+
+
+def rede_ociosa_configurada() -> int:
+    """Janela (ms) sem requisições pendentes para considerar a rede ociosa (SCRAPER_REDE_OCIOSA_MS)."""
+    load_dotenv()
+    return int(os.getenv("SCRAPER_REDE_OCIOSA_MS", REDE_OCIOSA_PADRAO_MS))
+
+# ---------------------------------------------------
+# 2. Monitor de rede
+# ---------------------------------------------------
+
+class MonitorRede:
+    """
+    Conta as requisições em andamento de uma página. O estado "networkidle" do Playwright só vale
+    para o carregamento inicial; este monitor permite esperar a rede acalmar após cada ação.
+    """
+
+    def __init__(self, page, ociosa_ms: int | None = None):
+        self.ociosa_ms = ociosa_ms if ociosa_ms is not None else rede_ociosa_configurada()
+        self.pendentes = 0
+        self.ultima_atividade = time.monotonic()
+        page.on("request", self._iniciou)
+        page.on("requestfinished", self._terminou)
+        page.on("requestfailed", self._terminou)
+
+    def _iniciou(self, _request):
+        self.pendentes += 1
+        self.ultima_atividade = time.monotonic()
+
+    def _terminou(self, _request):
+        self.pendentes = max(0, self.pendentes - 1)
+        self.ultima_atividade = time.monotonic()
+
+    async def aguardar_ociosa(self):
+        """Retorna quando não há requisições pendentes há `ociosa_ms`, contados a partir desta chamada."""
+        inicio = time.monotonic()
+        janela = self.ociosa_ms / 1000
+        while self.pendentes or time.monotonic() - max(self.ultima_atividade, inicio) < janela:
+            await asyncio.sleep(0.05)
+
+# ---------------------------------------------------
+# 3. Esperas
+# ---------------------------------------------------
+
+async def _primeiro_evento(eventos: dict, limite_s: float) -> str:
+    """Aguarda o primeiro evento concluído com sucesso; retorna seu nome ou "limite" se o tempo máximo estourar."""
+    tarefas = {asyncio.ensure_future(coro): nome for nome, coro in eventos.items()}
+    pendentes = set(tarefas)
+    prazo = time.monotonic() + limite_s
+    try:
+        while pendentes:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            concluidas, pendentes = await asyncio.wait(pendentes, timeout=restante, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in concluidas:
+                if not tarefa.cancelled() and tarefa.exception() is None:
+                    return tarefas[tarefa]
+        return "limite"
+    finally:
+        for tarefa in tarefas:
+            if not tarefa.done():
+                tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+async def aguardar_evento(page, monitor: MonitorRede | None = None, total_anterior: int | None = None,
+                          espera_maxima_ms: int | None = None, cortesia_ms: tuple[int, int] | None = None) -> str:
+    """
+    Espera a lista de cartões mudar (se `total_anterior` for informado), o fim da lista aparecer ou a rede
+    ficar ociosa, até `espera_maxima_ms`. A espera nunca é menor que o piso de cortesia sorteado em `cortesia_ms`.
+    Retorna o motivo: "lista", "rede" ou "limite".
+    """
+    espera_maxima_ms = espera_maxima_ms if espera_maxima_ms is not None else espera_maxima_configurada()
+    minimo, maximo = cortesia_ms if cortesia_ms is not None else cortesia_configurada()
+    inicio = time.monotonic()
+
+    eventos = {}
+    if total_anterior is not None:
+        eventos["lista"] = page.wait_for_function(
+            JS_LISTA_MUDOU,
+            arg={"seletoresLista": SELETORES_LISTA_CARTOES, "totalAnterior": total_anterior, "marcadorFim": MARCADOR_FIM_DA_LISTA},
+            polling=100,
+            timeout=espera_maxima_ms,
+        )
+    if monitor is not None:
+        eventos["rede"] = monitor.aguardar_ociosa()
+
+    piso = asyncio.sleep(random.uniform(minimo, maximo) / 1000)
+    motivo, _ = await asyncio.gather(_primeiro_evento(eventos, espera_maxima_ms / 1000), piso)
+    logging.debug(f"Espera encerrada por '{motivo}' em {time.monotonic() - inicio:.2f}s.")
+    return motivo
@@ -0,0 +1,163 @@
+# ===============================================================
+# esquema_empresas.py
+# Objetivo: esquema único dos registros de empresa (scrapers, saída, consolidação e analisador)
+# ===============================================================
+#
+# Os dois scrapers produzem `Empresa` (dataclass com __slots__) já com os tipos finais:
+# texto ausente vira None (nunca "N/A"), nota é float, reviews é int e coordenadas ausentes
+# são NaN. Em DataFrame, TIPOS_EMPRESA fixa nicho/cidade como category, latitude/longitude
+# como float32 e reviews como int32. Os nomes de coluna canônicos são os da dataclass, em
+# minúsculas; ALIASES_COLUNAS traduz os nomes antigos do scraper Playwright (Endereço,
+# Telefone, Latitude, ...) para que arquivos gravados antes continuem legíveis.
+
+import math
+from dataclasses import dataclass, fields
+
+import pandas as pd
+
+from identificadores import COLUNA_ID, calcular_id_empresa, converter_ids, garantir_id_empresa
+
+TIPOS_EMPRESA = {
+    "id_empresa": "Int64",
+    "place_id": "string",
+    "nicho": "category",
+    "cidade": "category",
+    "nome": "string",
+    "endereco": "string",
+    "telefone": "string",
+    "website": "string",
+    "tipo": "string",
+    "nota": "float64",
+    "reviews": "int32",
+    "descricao": "string",
+    "latitude": "float32",
+    "longitude": "float32",
+}
+
+ALIASES_COLUNAS = {
+    "Endereço": "endereco",
+    "Telefone": "telefone",
+    "Website": "website",
+    "Tipo": "tipo",
+    "Descricao": "descricao",
+    "Latitude": "latitude",
+    "Longitude": "longitude",
+}
+# Para pd.read_csv: ids lidos como texto não passam por float64 quando a coluna tem lacunas
+TIPOS_LEITURA_CSV = {COLUNA_ID: "string"}
+_ZERO_SE_AUSENTE = ("nota", "reviews")
+
+# ---------------------------------------------------
+# 1. Registro
+# ---------------------------------------------------
+
+def _texto(valor) -> str | None:
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    valor = str(valor).strip()
+    return None if valor in ("", "N/A") else valor
+
+
+def _real(valor, padrao: float) -> float:
+    if isinstance(valor, str):
+        valor = valor.replace(",", ".")
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return padrao
+    return padrao if math.isnan(numero) else numero
+
+
+@dataclass(slots=True)
+class Empresa:
+    """Uma empresa encontrada para um par (nicho, cidade), com os campos já normalizados."""
+
+    nicho: str
+    cidade: str
+    nome: str | None
+    endereco: str | None = None
+    telefone: str | None = None
+    website: str | None = None
+    tipo: str | None = None
+    nota: float = 0.0
+    reviews: int = 0
+    descricao: str | None = None
+    latitude: float = math.nan
+    longitude: float = math.nan
+    place_id: str | None = None
+    id_empresa: int | None = None
+
+    def __post_init__(self):
+        self.nome = _texto(self.nome)
+        self.endereco = _texto(self.endereco)
+        self.telefone = _texto(self.telefone)
+        self.website = _texto(self.website)
+        self.tipo = _texto(self.tipo)
+        self.descricao = _texto(self.descricao)
+        self.place_id = _texto(self.place_id)
+        self.nota = _real(self.nota, 0.0)
+        self.reviews = int(_real(self.reviews, 0))
+        self.latitude = _real(self.latitude, math.nan)
+        self.longitude = _real(self.longitude, math.nan)
+        if self.id_empresa is None:
+            self.id_empresa = calcular_id_empresa(
+                self.nome, self.endereco, self.cidade, self.latitude, self.longitude, self.place_id,
+            )
+
+    def como_dict(self) -> dict:
+        """Campos em um dict (ex.: para o cache de buscas, que guarda JSON)."""
+        return {coluna: getattr(self, coluna) for coluna in COLUNAS_EMPRESA}
+
+
+COLUNAS_EMPRESA = [campo.name for campo in fields(Empresa)]
+
+# ---------------------------------------------------
+# 2. DataFrames
+# ---------------------------------------------------
+
+def colunas_com_aliases(colunas: list[str]) -> list[str]:
+    """`colunas` seguidas dos nomes antigos equivalentes, para projeções que também leiam arquivos antigos."""
+    return list(colunas) + [antigo for antigo, novo in ALIASES_COLUNAS.items() if novo in colunas]
+
+
+def padronizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    """Renomeia colunas antigas para os nomes canônicos (se as duas existirem, o nome canônico prevalece)."""
+    for antigo, novo in ALIASES_COLUNAS.items():
+        if antigo not in df.columns:
+            continue
+        if novo in df.columns:
+            df[novo] = df[novo].fillna(df[antigo])
+            df = df.drop(columns=antigo)
+        else:
+            df = df.rename(columns={antigo: novo})
+    return df
+
+
+def tipar_empresas(df: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza os nomes e converte, em uma única passada, as colunas presentes para TIPOS_EMPRESA."""
+    df = padronizar_colunas(df)
+    for coluna, tipo in TIPOS_EMPRESA.items():
+        if coluna not in df.columns or (df[coluna].dtype == tipo and coluna not in _ZERO_SE_AUSENTE):
+            continue
+        if coluna == COLUNA_ID:
+            df[coluna] = converter_ids(df[coluna])
+        elif tipo in ("string", "category"):
+            texto = df[coluna].astype("string").str.strip()
+            df[coluna] = texto.mask(texto.isin(["", "N/A"])).astype(tipo)
+        else:
+            valores = pd.to_numeric(df[coluna], errors="coerce")
+            if coluna in _ZERO_SE_AUSENTE:
+                valores = valores.fillna(0)
+            if tipo == "int32":
+                valores = valores.round()
+            df[coluna] = valores.astype(tipo)
+    return df
+
+
+def para_dataframe(empresas: list) -> pd.DataFrame:
+    """
+    Monta o DataFrame tipado, com todas as colunas de COLUNAS_EMPRESA, a partir de `Empresa`s ou dicts
+    (dicts sem id_empresa recebem o id calculado).
+    """
+    df = pd.DataFrame([e.como_dict() if isinstance(e, Empresa) else e for e in empresas], dtype=object) # Sem inferência: ids com lacunas virariam float64 e perderiam precisão
+    return garantir_id_empresa(tipar_empresas(padronizar_colunas(df).reindex(columns=COLUNAS_EMPRESA)))
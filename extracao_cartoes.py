@@ -0,0 +1,127 @@
+# ===============================================================
+# extracao_cartoes.py
+# Objetivo: extrair todos os cartões de resultados do Google Maps em uma única chamada page.evaluate
+# ===============================================================
+#
+# Os seletores ficam em uma tabela de dados (CAMPOS_CARTAO): para cada campo, uma lista de
+# (seletor CSS, atributo) tentados em ordem; atributo None lê o texto do elemento. O JavaScript
+# apenas coleta os textos brutos de todos os cartões de uma vez; a conversão (nota, reviews,
+# website de anúncio, coordenadas e ID do lugar a partir do link) é feita em Python, e cada cartão
+# vira uma `Empresa` (esquema_empresas.py), que também calcula o id_empresa.
+
+import logging
+import re
+
+from esquema_empresas import Empresa
+
+# Seletores da lista de cartões, tentados em ordem até algum encontrar cartões
+SELETORES_LISTA_CARTOES = [
+    'div[aria-label*="Resultados para"] div.Nv2PK',
+    'div.Nv2PK, div.TFQHme > div > div.Nv2PK',
+    'div[role="article"]',
+]
+
+CAMPOS_CARTAO = {
+    "nome": [("div.qBF1Pd.fontHeadlineSmall", None), ("a.hfpxzc", "aria-label")],
+    "endereco": [("div.W4Efsd > div:nth-child(1) > span:nth-child(3)", None)],
+    "rating": [("span.MW4etd", None)],
+    "reviews": [("span.UY7F9", None)],
+    "telefone": [("span.UsdlK", None)],
+    "website": [('a.lcr4fd.S9kvJb[data-value="Website"]', "href")],
+    "tipo": [("div.W4Efsd > div:nth-child(1) > span:nth-child(1) > span:nth-child(1)", None)],
+    "link": [("a.hfpxzc", "href")],
+}
+
+_JS_LER_CAMPOS = """
+    const lerCampos = (cartao, campos) => {
+        const dados = {};
+        for (const [campo, opcoes] of Object.entries(campos)) {
+            dados[campo] = null;
+            for (const [seletor, atributo] of opcoes) {
+                const elemento = cartao.querySelector(seletor);
+                if (!elemento) continue;
+                const valor = atributo ? elemento.getAttribute(atributo) : elemento.textContent;
+                if (valor && valor.trim()) { dados[campo] = valor.trim(); break; }
+            }
+        }
+        return dados;
+    };
+"""
+
+# Recebe {seletoresLista, campos, inicio} e devolve {total, cartoes}: o total de cartões na lista e
+# os textos brutos apenas dos cartões a partir da posição `inicio`
+JS_EXTRAIR_CARTOES = "({seletoresLista, campos, inicio}) => {" + _JS_LER_CAMPOS + """
+    let cartoes = [];
+    for (const seletor of seletoresLista) {
+        cartoes = document.querySelectorAll(seletor);
+        if (cartoes.length) break;
+    }
+    return {total: cartoes.length, cartoes: Array.from(cartoes).slice(inicio).map(cartao => lerCampos(cartao, campos))};
+}"""
+
+# Mesma extração para um único cartão (elemento já localizado)
+JS_EXTRAIR_CARTAO = "(cartao, campos) => {" + _JS_LER_CAMPOS + """
+    return lerCampos(cartao, campos);
+}"""
+
+_RE_COORDENADAS = re.compile(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)")
+_RE_PLACE_ID = re.compile(r"!19s([A-Za-z0-9_-]+)")
+_RE_FEATURE_ID = re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)")
+
+
+def extrair_place_id(link: str | None) -> str | None:
+    """Retorna o ID estável do lugar a partir do href de a.hfpxzc (place ID ou, na falta dele, o feature ID)."""
+    if not link:
+        return None
+    correspondencia = _RE_PLACE_ID.search(link) or _RE_FEATURE_ID.search(link)
+    return correspondencia.group(1) if correspondencia else None
+
+
+def _numero(texto: str | None, tipo):
+    """Converte '4,6' / '(1.234)' em número; retorna 0 se não houver dígitos."""
+    if not texto:
+        return tipo(0)
+    if tipo is int:
+        digitos = re.sub(r"\D", "", texto)
+        return int(digitos) if digitos else 0
+    correspondencia = re.search(r"\d+(?:[.,]\d+)?", texto)
+    return float(correspondencia.group(0).replace(",", ".")) if correspondencia else 0.0
+
+
+def normalizar_cartao(bruto: dict, nicho: str, cidade: str) -> Empresa:
+    """Converte os textos brutos de um cartão na `Empresa` gravada pelo scraper."""
+    website = bruto.get("website")
+    if website and "/aclk?" in website:
+        website = None
+    link = bruto.get("link")
+    coordenadas = _RE_COORDENADAS.search(link or "")
+
+    empresa = Empresa(
+        nicho=nicho,
+        cidade=cidade,
+        nome=bruto.get("nome"),
+        endereco=(bruto.get("endereco") or "").lstrip("· "),
+        telefone=bruto.get("telefone"),
+        website=website,
+        tipo=bruto.get("tipo"),
+        nota=_numero(bruto.get("rating"), float),
+        reviews=_numero(bruto.get("reviews"), int),
+        latitude=coordenadas.group(1) if coordenadas else None,
+        longitude=coordenadas.group(2) if coordenadas else None,
+        place_id=extrair_place_id(link),
+    )
+    if empresa.nome is None and empresa.endereco is None:
+        logging.warning("  ATENÇÃO: Cartão sem nome e sem endereço.")
+    return empresa
+
+
+async def extrair_cartoes(page, nicho: str, cidade: str, inicio: int = 0) -> tuple[int, list[Empresa]]:
+    """
+    Extrai, com um único page.evaluate, os cartões da lista de resultados a partir da posição `inicio`.
+    Retorna (total de cartões na lista, cartões novos normalizados), para o chamador avançar seu cursor.
+    """
+    resultado = await page.evaluate(
+        JS_EXTRAIR_CARTOES,
+        {"seletoresLista": SELETORES_LISTA_CARTOES, "campos": CAMPOS_CARTAO, "inicio": inicio},
+    )
+    return resultado["total"], [normalizar_cartao(bruto, nicho, cidade) for bruto in resultado["cartoes"]]
@@ -2,14 +2,78 @@ import pandas as pd
 import os
 import re
 
+from armazenamento import ESQUEMA_EMPRESAS, carregar_tabela, concatenar_tabelas
+from deduplicacao import deduplicar_empresas
+from esquema_empresas import tipar_empresas
+from identificadores import COLUNA_ID, garantir_id_empresa
+from ingestao import mapear_em_paralelo, mapear_em_threads
+
+PREFIXO_ARQUIVO = 'dados_empresas_'
+
 def clean_niche_name_for_filename(niche_name):
     # Remove caracteres especiais e substitui espaços por underscores
     cleaned_name = re.sub(r'[^a-zA-Z0-9_\s]', '', niche_name)
     cleaned_name = cleaned_name.replace(' ', '_')
     return cleaned_name
 
-def gerar_arquivos_nichos_campeoes():
-    script_dir = os.path.dirname(__file__)
+def adicionar_nicho_limpo(df):
+    """
+    Adiciona a coluna nicho_limpo (category), limpando cada nicho distinto uma única vez
+    em vez de uma vez por linha.
+    """
+    if 'nicho' in df.columns:
+        nichos = df['nicho'].astype('category')
+        limpos = {nicho: clean_niche_name_for_filename(nicho) for nicho in nichos.cat.categories}
+        df['nicho_limpo'] = nichos.map(limpos).astype('category')
+    return df
+
+def ler_arquivo_cidade_vizinha(file_path):
+    """
+    Lê um arquivo de cidade vizinha e adiciona a coluna nicho_limpo (executado nos processos do pool).
+    Retorna (DataFrame, None) ou (None, mensagem de erro).
+    """
+    filename = os.path.basename(file_path)
+    try:
+        df_cidades_vizinhas = tipar_empresas(carregar_tabela(file_path, esquema=ESQUEMA_EMPRESAS, formato='csv'))
+    except pd.errors.EmptyDataError:
+        return None, f"Aviso: O arquivo {filename} está vazio e foi ignorado."
+    except Exception as e:
+        return None, f"Erro ao ler o arquivo {filename}: {e}"
+    garantir_id_empresa(df_cidades_vizinhas)
+    return adicionar_nicho_limpo(df_cidades_vizinhas), None
+
+def nicho_campeao_do_arquivo(filename, nichos_campeoes):
+    """
+    Retorna o nicho campeão de um arquivo dados_empresas_<nicho>_<cidade>.csv, ou None.
+    Os prefixos do nome (partes separadas por '_') são testados do mais longo ao mais curto
+    contra o set de nichos campeões: uma consulta O(1) por prefixo, em vez de um startswith
+    por nicho campeão.
+    """
+    if not (filename.startswith(PREFIXO_ARQUIVO) and filename.endswith('.csv')):
+        return None
+    partes = clean_niche_name_for_filename(filename[len(PREFIXO_ARQUIVO):-len('.csv')]).split('_')
+    for fim in range(len(partes), 0, -1):
+        prefixo = '_'.join(partes[:fim])
+        if prefixo in nichos_campeoes:
+            return prefixo
+    return None
+
+def arquivos_de_nichos_campeoes(diretorio, nichos_campeoes):
+    """Gera os caminhos dos arquivos de nichos campeões do diretório; os demais são ignorados sem serem lidos."""
+    with os.scandir(diretorio) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and nicho_campeao_do_arquivo(entrada.name, nichos_campeoes):
+                yield entrada.path
+
+def gravar_nicho_campeao(output_dir, nicho, df_nicho):
+    """Grava as oportunidades de um nicho campeão em <nicho>.csv e retorna o caminho."""
+    output_path = os.path.join(output_dir, f"{nicho}.csv")
+    df_nicho.to_csv(output_path, index=False)
+    return output_path
+
+def gerar_arquivos_nichos_campeoes(workers=None, base_dir=None):
+    # base_dir: raiz com data/ e results/ (padrão: o diretório do script)
+    script_dir = base_dir or os.path.dirname(__file__)
     data_dir = os.path.join(script_dir, 'data')
     results_dir = os.path.join(script_dir, 'results')
     nichos_campeoes_path = os.path.join(data_dir, 'nichos_campeoes.csv')
@@ -22,14 +86,17 @@ def gerar_arquivos_nichos_campeoes():
 
     print(f"Lendo nichos campeões de: {nichos_campeoes_path}")
     try:
-        df_nichos_campeoes = pd.read_csv(nichos_campeoes_path)
-        cleaned_champion_niches = df_nichos_campeoes['Nicho'].apply(clean_niche_name_for_filename).tolist()
+        df_nichos_campeoes = pd.read_csv(nichos_campeoes_path, usecols=['Nicho'])
+        cleaned_champion_niches = list(dict.fromkeys(df_nichos_campeoes['Nicho'].apply(clean_niche_name_for_filename)))
         print(f"Nichos campeões lidos: {cleaned_champion_niches}")
+        indice_campeoes = frozenset(cleaned_champion_niches)
     except FileNotFoundError:
         print(f"Erro: O arquivo {nichos_campeoes_path} não foi encontrado.")
         return
 
     todas_oportunidades = []
+    nicho_alvo_original = "Certificação de acessibilidade e laudos para edificações públicas"
+    nicho_alvo_limpo = clean_niche_name_for_filename(nicho_alvo_original)
 
     # Abrir o arquivo de log de depuração
     with open(debug_log_path, 'w') as debug_log:
@@ -37,14 +104,13 @@ def gerar_arquivos_nichos_campeoes():
 
         print(f"Lendo banco de dados de oportunidades de: {dados_empresas_consolidado}")
         try:
-            df_oportunidades_db = pd.read_csv(dados_empresas_consolidado)
-            if 'nicho' in df_oportunidades_db.columns:
-                df_oportunidades_db.loc[:, 'nicho_limpo'] = df_oportunidades_db['nicho'].apply(clean_niche_name_for_filename)
+            df_oportunidades_db = garantir_id_empresa(tipar_empresas(carregar_tabela(dados_empresas_consolidado, esquema=ESQUEMA_EMPRESAS)))
+            adicionar_nicho_limpo(df_oportunidades_db)
+            # Só as linhas de nichos campeões seguem para a deduplicação e a gravação
+            if 'nicho_limpo' in df_oportunidades_db.columns:
+                df_oportunidades_db = df_oportunidades_db[df_oportunidades_db['nicho_limpo'].isin(indice_campeoes)]
             
             # Debug: Imprimir nichos limpos únicos de df_oportunidades_db para o nicho alvo
-            nicho_alvo_original = "Certificação de acessibilidade e laudos para edificações públicas"
-            nicho_alvo_limpo = clean_niche_name_for_filename(nicho_alvo_original)
-            
             df_oportunidades_db_nicho_alvo = df_oportunidades_db[df_oportunidades_db['nicho_limpo'] == nicho_alvo_limpo]
             if not df_oportunidades_db_nicho_alvo.empty:
                 debug_log.write(f"[DEBUG] Nichos limpos únicos de df_oportunidades_db para '{nicho_alvo_original}': {df_oportunidades_db_nicho_alvo['nicho_limpo'].unique().tolist()}\n")
@@ -55,59 +121,52 @@ def gerar_arquivos_nichos_campeoes():
             print(f"Aviso: O arquivo {dados_empresas_consolidado} não foi encontrado. Continuando sem ele.")
         
         print(f"Buscando oportunidades em: {cidades_vizinhas_dir}")
+        arquivos_campeoes = []
         if os.path.exists(cidades_vizinhas_dir):
-            for filename in os.listdir(cidades_vizinhas_dir):
-                if filename.startswith('dados_empresas_') and filename.endswith('.csv'):
-                    file_path = os.path.join(cidades_vizinhas_dir, filename)
-                    
-                    # Extrair o nome do nicho do arquivo de forma mais robusta
-                    core_name = filename[len('dados_empresas_'):-len('.csv')]
-                    core_name_cleaned = clean_niche_name_for_filename(core_name)
-                    nicho_do_arquivo_cleaned = None
-                    for champion_niche in cleaned_champion_niches:
-                        if core_name_cleaned.startswith(champion_niche):
-                            nicho_do_arquivo_cleaned = champion_niche
-                            break
-
-                    if nicho_do_arquivo_cleaned and nicho_do_arquivo_cleaned in cleaned_champion_niches:
-                        try:
-                            df_cidades_vizinhas = pd.read_csv(file_path)
-                            # Adicionar coluna nicho_limpo
-                            if 'nicho' in df_cidades_vizinhas.columns:
-                                df_cidades_vizinhas.loc[:, 'nicho_limpo'] = df_cidades_vizinhas['nicho'].apply(clean_niche_name_for_filename)
-                            
-                            # Debug: Imprimir nichos limpos únicos de df_cidades_vizinhas para o nicho alvo
-                            df_cidades_vizinhas_nicho_alvo = df_cidades_vizinhas[df_cidades_vizinhas['nicho_limpo'] == nicho_alvo_limpo]
-                            if not df_cidades_vizinhas_nicho_alvo.empty:
-                                debug_log.write(f"[DEBUG] Nichos limpos únicos de {filename} para '{nicho_alvo_original}': {df_cidades_vizinhas_nicho_alvo['nicho_limpo'].unique().tolist()}\n")
-                                debug_log.write(f"[DEBUG] Oportunidades de {filename} para '{nicho_alvo_original}': {len(df_cidades_vizinhas_nicho_alvo)}\n")
-
-                            todas_oportunidades.append(df_cidades_vizinhas)
-                            print(f"Adicionado: {file_path}")
-                        except pd.errors.EmptyDataError:
-                            print(f"Aviso: O arquivo {filename} está vazio e foi ignorado.")
-                        except Exception as e:
-                            print(f"Erro ao ler o arquivo {filename}: {e}")
+            arquivos_campeoes = list(arquivos_de_nichos_campeoes(cidades_vizinhas_dir, indice_campeoes))
+
+        # Leitura e limpeza dos arquivos em paralelo; o log e a mesclagem ficam no processo principal
+        for file_path, (df_cidades_vizinhas, erro) in zip(arquivos_campeoes, mapear_em_paralelo(ler_arquivo_cidade_vizinha, arquivos_campeoes, workers)):
+            filename = os.path.basename(file_path)
+            if erro:
+                print(erro)
+                continue
+
+            # Debug: Imprimir nichos limpos únicos de df_cidades_vizinhas para o nicho alvo
+            df_cidades_vizinhas_nicho_alvo = df_cidades_vizinhas[df_cidades_vizinhas['nicho_limpo'] == nicho_alvo_limpo]
+            if not df_cidades_vizinhas_nicho_alvo.empty:
+                debug_log.write(f"[DEBUG] Nichos limpos únicos de {filename} para '{nicho_alvo_original}': {df_cidades_vizinhas_nicho_alvo['nicho_limpo'].unique().tolist()}\n")
+                debug_log.write(f"[DEBUG] Oportunidades de {filename} para '{nicho_alvo_original}': {len(df_cidades_vizinhas_nicho_alvo)}\n")
+
+            todas_oportunidades.append(df_cidades_vizinhas)
+            print(f"Adicionado: {file_path}")
 
         if not todas_oportunidades:
             print("Nenhuma oportunidade encontrada para processar.")
             return
 
-        df_todas_oportunidades = pd.concat(todas_oportunidades, ignore_index=True)
+        df_todas_oportunidades = concatenar_tabelas(todas_oportunidades)
         
-        # Remover duplicatas
-        df_todas_oportunidades.drop_duplicates(subset=['nome', 'endereco', 'cidade'], inplace=True)
+        # Remover duplicatas pelo id estável da empresa (por cidade) e, depois, as de grafia diferente entre fontes
+        df_todas_oportunidades.drop_duplicates(subset=[COLUNA_ID, 'cidade'], inplace=True)
+        df_todas_oportunidades = deduplicar_empresas(df_todas_oportunidades)
         total_oportunidades_unicas = len(df_todas_oportunidades)
         print(f"Total de oportunidades únicas encontradas: {total_oportunidades_unicas}")
 
+        # Uma única passada agrupa as linhas por nicho; cada partição é gravada em uma thread
+        particoes = {
+            nicho: df_nicho
+            for nicho, df_nicho in df_todas_oportunidades.groupby('nicho_limpo', observed=True, sort=False)
+            if nicho in indice_campeoes
+        }
+        caminhos = mapear_em_threads(
+            lambda item: gravar_nicho_campeao(output_nichos_campeoes_dir, *item), particoes.items(), workers,
+        )
+        caminho_por_nicho = dict(zip(particoes, caminhos))
+
         for nicho_campeao_limpo in cleaned_champion_niches:
-            df_nicho = df_todas_oportunidades[df_todas_oportunidades['nicho_limpo'] == nicho_campeao_limpo]
-            
-            if not df_nicho.empty:
-                output_filename = f"{nicho_campeao_limpo}.csv"
-                output_path = os.path.join(output_nichos_campeoes_dir, output_filename)
-                df_nicho.to_csv(output_path, index=False)
-                print(f"Gerado: {output_path} com {len(df_nicho)} oportunidades.")
+            if nicho_campeao_limpo in caminho_por_nicho:
+                print(f"Gerado: {caminho_por_nicho[nicho_campeao_limpo]} com {len(particoes[nicho_campeao_limpo])} oportunidades.")
             else:
                 print(f"Nenhuma oportunidade encontrada para o nicho: {nicho_campeao_limpo}")
 
@@ -5,7 +5,6 @@ import time
 import random
 import json
 import logging
-import datetime
 
 import pandas as pd
 import serpapi
@@ -13,10 +12,14 @@ from serpapi import GoogleSearch
 from dotenv import load_dotenv
 import argparse
 
-PAGE_SIZE = 20
+from armazenamento import carregar_tabela
+from cache_buscas import CacheBuscas
+from diario_execucao import DiarioExecucao
+from esquema_empresas import Empresa
+from replay_scraper import diretorio_gravacao, gravar_resposta_serpapi
+from saida_scraper import EscritorEmpresas, rotacionar_saida_padrao
+from serpapi_async import PAGE_SIZE, buscar_pares, extrair_empresas_serpapi
 
-# Configuração do logger
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def carregar_lista_de_arquivo(nome_arquivo, tipo):
     """Carrega uma lista de um arquivo CSV ou JSON."""
@@ -40,16 +43,42 @@ def carregar_lista_de_arquivo(nome_arquivo, tipo):
 # ----------------------------------------
 # Configurações
 load_dotenv() 
-API_KEY = os.getenv("SERPAPI_API_KEY")
-if not API_KEY:
-    raise ValueError("A variável de ambiente SERPAPI_API_KEY não está definida.")
+# Intervalo (em segundos) de cortesia entre páginas consultadas na SerpAPI
+INTERVALO_ENTRE_PAGINAS = (1, 3)
+
+def obter_api_key() -> str:
+    """
+    Retorna a SERPAPI_API_KEY. A chave só é exigida quando uma busca vai ser feita, então importar
+    o módulo (testes, CLI, outras ferramentas) não falha sem ela.
+    """
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        raise ValueError("A variável de ambiente SERPAPI_API_KEY não está definida.")
+    return api_key
+
+def _consultar_serpapi(params: dict) -> dict:
+    """
+    Consulta a SerpAPI com o cliente oficial. Com SERPAPI_BASE_URL (ex.: o servidor de replay_scraper.py),
+    a consulta vai para o mesmo host; o cliente oficial usa o caminho /search, que ambos atendem.
+    """
+    busca = GoogleSearch(params)
+    base_url = os.getenv("SERPAPI_BASE_URL")
+    if base_url:
+        busca.BACKEND = base_url.rstrip("/").rsplit("/", 1)[0]
+    return busca.get_dict()
 
 # ----------------------------------------
 # FUNÇÃO PRINCIPAL
 # ----------------------------------------
-def buscar_empresas(nicho: str, cidade: str, max_pages: int = 3) -> list[dict]:
-    """Busca empresas no Google Maps usando a SerpAPI com paginação."""
+def buscar_empresas(nicho: str, cidade: str, max_pages: int = 3, cache: CacheBuscas | None = None) -> list[Empresa]:
+    """
+    Busca empresas no Google Maps usando a SerpAPI com paginação.
+    Com `cache`, o JSON bruto de cada página é reaproveitado enquanto estiver dentro do TTL,
+    para nunca pagar duas vezes pela mesma consulta.
+    """
     logging.info(f"🔍 Buscando: {nicho} em {cidade}...")
+    api_key = obter_api_key()
+    gravacao = diretorio_gravacao()
     engines = ["google_local", "google_maps"]
     max_retries = 2
     initial_delay = 1
@@ -67,54 +96,30 @@ def buscar_empresas(nicho: str, cidade: str, max_pages: int = 3) -> list[dict]:
                 "q": f"{nicho} em {cidade}, Rio de Janeiro",
                 "hl": "pt",
                 "gl": "br",
-                "api_key": API_KEY,
+                "api_key": api_key,
                 "start": start_offset,
                 "num": 20,
             }
 
             for attempt in range(max_retries):
                 try:
-                    search = GoogleSearch(params)
-                    results = search.get_dict()
+                    results = cache.obter(engine, nicho, cidade, page) if cache else None
+                    veio_do_cache = results is not None
+                    if not veio_do_cache:
+                        results = _consultar_serpapi(params)
+                        if cache and "error" not in results:
+                            cache.salvar(engine, nicho, cidade, page, results)
+                        if gravacao and "error" not in results:
+                            gravar_resposta_serpapi(gravacao, engine, nicho, cidade, page, results)
                     
                     if "error" in results:
                         logging.warning(
                             f"⚠️ Erro da SerpAPI ({engine}, página {page+1}) para {nicho}: {results['error']} (tentativa {attempt+1}/{max_retries})"
                         )
                     else:
-                        local_results = []
-                        if isinstance(results.get("local_results"), list):
-                            local_results = results.get("local_results")
-                        elif isinstance(results.get("local_results"), dict):
-                            local_results = results["local_results"].get("places", [])
-                        elif "places_results" in results:
-                            local_results = results["places_results"]
-
-                        if local_results:
-                            empresas_pagina = []
-                            for empresa in local_results:
-                                nome_empresa = empresa.get("title")
-                                if not nome_empresa:
-                                    logging.warning(f"⚠️ Empresa sem nome encontrada e ignorada em {cidade}, nicho {nicho} (página {page+1}).")
-                                    continue
-
-                                nota_empresa = pd.to_numeric(empresa.get("rating"), errors="coerce")
-                                reviews_empresa = pd.to_numeric(empresa.get("reviews"), errors="coerce")
-
-                                empresas_pagina.append({
-                                    "nicho": nicho,
-                                    "cidade": cidade,
-                                    "nome": nome_empresa,
-                                    "endereco": empresa.get("address"),
-                                    "telefone": empresa.get("phone"),
-                                    "website": empresa.get("website"),
-                                    "tipo": empresa.get("type"),
-                                    "nota": nota_empresa if not pd.isna(nota_empresa) else 0,
-                                    "reviews": reviews_empresa if not pd.isna(reviews_empresa) else 0,
-                                    "Descricao": empresa.get("description"),
-                                    "Latitude": empresa.get("gps_coordinates", {}).get("latitude"),
-                                    "Longitude": empresa.get("gps_coordinates", {}).get("longitude"),
-                                })
+                        empresas_pagina = extrair_empresas_serpapi(results, nicho, cidade, page)
+
+                        if empresas_pagina:
                             all_empresas.extend(empresas_pagina)
                             logging.info(f"✅ {len(empresas_pagina)} empresas encontradas com engine '{engine}' na página {page+1}.")
                             
@@ -122,12 +127,13 @@ def buscar_empresas(nicho: str, cidade: str, max_pages: int = 3) -> list[dict]:
                                 logging.info(f"Menos de {PAGE_SIZE} resultados na página {page+1}. Assumindo que não há mais páginas para o engine '{engine}'.")
                                 should_stop_pagination = True
                                 break
-                            if not search.get_dict().get("serpapi_pagination", {}).get("next_link") and not search.get_dict().get("serpapi_pagination", {}).get("next"):
+                            paginacao = results.get("serpapi_pagination", {})
+                            if not paginacao.get("next_link") and not paginacao.get("next"):
                                 logging.info(f"Fim da paginação para {nicho} em {cidade} com engine '{engine}'.")
                                 should_stop_pagination = True
                                 break
-                            else:
-                                sleep_time_page = random.uniform(1, 3)
+                            elif not veio_do_cache:
+                                sleep_time_page = random.uniform(*INTERVALO_ENTRE_PAGINAS)
                                 logging.info(f"Aguardando {sleep_time_page:.2f}s antes da próxima página...")
                                 time.sleep(sleep_time_page)
                             break 
@@ -159,7 +165,7 @@ def buscar_empresas(nicho: str, cidade: str, max_pages: int = 3) -> list[dict]:
 # ----------------------------------------
 # EXECUÇÃO PRINCIPAL
 # ----------------------------------------
-def main():
+def main(argv: list[str] | None = None):
     """
     Função principal para orquestrar a busca de empresas no Google Maps.
     Carrega cidades e nichos, itera sobre eles, busca empresas e salva os dados.
@@ -167,11 +173,25 @@ def main():
     parser = argparse.ArgumentParser(description="Scraper de empresas do Google Maps.")
     parser.add_argument("--mode", type=str, default="default",
                         help="Modo de execução: 'default' para cidades.csv e nichos.csv, 'expansao' para melhores_oportunidades.db.csv e cidades_vizinhas.csv.")
-    args = parser.parse_args()
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignora o cache de buscas e consulta a SerpAPI novamente (o cache é atualizado).")
+    parser.add_argument("--cache-ttl-horas", type=float, default=None,
+                        help="Validade do cache de buscas em horas (padrão: CACHE_BUSCAS_TTL_HORAS ou 168).")
+    parser.add_argument("--async", dest="assincrono", action="store_true",
+                        help="Busca os pares em paralelo com o cliente assíncrono (pool HTTP + rate limit).")
+    parser.add_argument("--concorrencia", type=int, default=None,
+                        help="Pares simultâneos no modo --async (padrão: SERPAPI_CONCORRENCIA ou 4).")
+    parser.add_argument("--req-por-segundo", type=float, default=None,
+                        help="Limite de requisições por segundo no modo --async (padrão: SERPAPI_REQ_POR_SEGUNDO ou 1).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma a última execução do mesmo modo, pulando os pares já concluídos no diário.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    api_key = obter_api_key() # Falha antes de carregar listas ou rotacionar a saída
 
     if args.mode == "expansao":
         cidades = carregar_lista_de_arquivo("cidades_vizinhas", "cidades vizinhas")
-        nichos_df = pd.read_csv(os.path.join(os.getcwd(), "data", "melhores_oportunidades.db.csv"))
+        nichos_df = carregar_tabela(os.path.join(os.getcwd(), "data", "melhores_oportunidades.db.csv"), colunas=["nicho"])
         nichos = nichos_df["nicho"].tolist()
         logging.info("Modo 'expansao' ativado. Carregando nichos de melhores_oportunidades.db.csv e cidades de cidades_vizinhas.csv.")
     else:
@@ -187,64 +207,60 @@ def main():
         logging.error("❌ A lista de nichos está vazia. Verifique o arquivo de nichos.")
         return
 
-    todas_empresas = []
+    pares = [(nicho, cidade) for cidade in cidades for nicho in nichos]
+    diario = DiarioExecucao("serpapi", args.mode)
+    pares = diario.preparar(pares, retomar=args.resume)
+    if args.mode != "expansao" and not args.resume:
+        rotacionar_saida_padrao()
 
-    for cidade in cidades:
-        for nicho in nichos:
+    escritor = EscritorEmpresas(args.mode, diario=diario)
+    if args.resume:
+        escritor.desfazer_gravacao_interrompida()
+    cache = CacheBuscas(ttl_horas=args.cache_ttl_horas, refresh=args.refresh)
+
+    def ao_iniciar(nicho, cidade):
+        diario.marcar_em_andamento(nicho, cidade)
+
+    def ao_concluir(nicho, cidade, dados, erro=None):
+        """Grava as empresas do par assim que ele termina e registra o resultado no diário."""
+        if erro is not None:
+            diario.marcar_falha(nicho, cidade, erro)
+        elif not dados:
+            diario.marcar_falha(nicho, cidade, "nenhuma empresa encontrada")
+        else:
+            linhas = escritor.escrever_par(nicho, cidade, dados)
+            diario.marcar_concluido(nicho, cidade, linhas)
+
+    if args.assincrono:
+        buscar_pares(pares, api_key, max_pages=5, cache=cache, concorrencia=args.concorrencia,
+                     req_por_segundo=args.req_por_segundo, ao_iniciar=ao_iniciar, ao_concluir=ao_concluir)
+    else:
+        for nicho, cidade in pares:
+            ao_iniciar(nicho, cidade)
             try:
                 logging.info(f"Iniciando busca para o nicho '{nicho}' na cidade '{cidade}'.")
-                dados = buscar_empresas(nicho, cidade, max_pages=5)
-                todas_empresas.extend(dados)
-                
-                sleep_time = random.uniform(5, 9) 
-                logging.info(f"Aguardando {sleep_time:.2f} segundos antes da próxima requisição para evitar bloqueio...")
-                time.sleep(sleep_time)
+                falhas_antes = cache.falhas
+                dados = buscar_empresas(nicho, cidade, max_pages=5, cache=cache)
+                ao_concluir(nicho, cidade, dados)
+
+                if cache.falhas > falhas_antes:
+                    sleep_time = random.uniform(5, 9) 
+                    logging.info(f"Aguardando {sleep_time:.2f} segundos antes da próxima requisição para evitar bloqueio...")
+                    time.sleep(sleep_time)
             except Exception as e:
                 logging.error(f"⚠️ Erro ao buscar empresas para o nicho '{nicho}' na cidade '{cidade}': {e}")
+                ao_concluir(nicho, cidade, [], e)
+    cache.fechar()
+    logging.info(f"💾 Cache de buscas: {cache.acertos} acerto(s), {cache.falhas} consulta(s) à SerpAPI.")
+    logging.info(f"📒 Diário da execução: {diario.contagem_por_estado()}")
+    diario.fechar()
 
-    df = pd.DataFrame(todas_empresas)
-
-    if not df.empty:
-        for col in ["nota", "reviews"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-        # Salvar CSV
-        if args.mode == "expansao":
-            for cidade_salvar in df["cidade"].unique():
-                for nicho_salvar in df["nicho"].unique():
-                    df_filtrado = df[(df["cidade"] == cidade_salvar) & (df["nicho"] == nicho_salvar)]
-                    if not df_filtrado.empty:
-                        nicho_sanitizado = nicho_salvar.replace(" ", "_").replace("/", "_").replace("\\", "_").replace(":", "_").replace("*", "_").replace("?", "_").replace("\"", "_").replace("<", "_").replace(">", "_").replace("|", "_")
-                        cidade_sanitizada = cidade_salvar.replace(" ", "_").replace("/", "_").replace("\\", "_").replace(":", "_").replace("*", "_").replace("?", "_").replace("\"", "_").replace("<", "_").replace(">", "_").replace("|", "_")
-                        output_filename = f"dados_empresas_{nicho_sanitizado}_{cidade_sanitizada}.csv"
-                        output_path = os.path.join(os.getcwd(), "results", "csv", output_filename)
-                        df_filtrado.to_csv(output_path, index=False, encoding="utf-8-sig")
-                        logging.info(f"\n✅ Dados para '{nicho_salvar}' em '{cidade_salvar}' salvos em '{output_path}' com {len(df_filtrado)} registros.")
-        else:
-            output_path = os.path.join(os.getcwd(), "results", "csv", "dados_empresas_googlemaps.csv")
-            if os.path.exists(output_path):
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                new_name = os.path.join(os.getcwd(), "results", "csv", f"dados_empresas_googlemaps_sub_{timestamp}.csv")
-                os.rename(output_path, new_name)
-                logging.info(f"Arquivo existente renomeado para {new_name}")
-
-            df.to_csv(output_path, index=False, encoding="utf-8-sig")
-            logging.info(f"\n✅ Dados salvos em '{output_path}' com {len(df)} registros.")
-
-        resumo = df.groupby(["cidade", "nicho"]).agg({
-            "nome": "count",
-            "nota": "mean",
-            "reviews": "sum"
-        }).rename(columns={
-            "nome": "quantidade_empresas",
-            "nota": "nota_media",
-            "reviews": "total_reviews"
-        })
-
+    if escritor.linhas_escritas:
+        resumo = escritor.resumo()
         logging.info("\n📊 Resumo inicial:")
         logging.info(resumo)
     else:
-        logging.warning("Nenhum dado de empresa foi coletado. Nenhum arquivo CSV será gerado.")
+        logging.warning("Nenhum dado de empresa foi coletado nesta execução.")
 
 if __name__ == "__main__":
     main()
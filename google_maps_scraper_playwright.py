@@ -8,11 +8,27 @@ import os
 import json
 import pandas as pd
 import argparse
-import datetime
 
-# Configuração de logging
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='scraper_debug.log', filemode='w')
+from armazenamento import carregar_tabela
+from cache_buscas import CacheBuscas
+from esperas import MonitorRede, aguardar_evento
+from diario_execucao import DiarioExecucao
+from saida_scraper import EscritorEmpresas, rotacionar_saida_padrao, sanitizar_nome_arquivo
+from perfil_navegador import PerfilNavegador, abrir_navegador, novo_contexto, perfil_configurado
+from extracao_cartoes import CAMPOS_CARTAO, JS_EXTRAIR_CARTAO, extrair_cartoes, normalizar_cartao
+from replay_scraper import diretorio_gravacao, gravar_pagina_maps
+from dotenv import load_dotenv
+
+# Intervalo (em segundos) de cortesia entre buscas consecutivas de um mesmo worker
+INTERVALO_ENTRE_BUSCAS = (5, 9)
+# Chave de engine usada no cache de buscas para os resultados extraídos pelo Playwright
+ENGINE_CACHE = "playwright"
+URL_GOOGLE_MAPS_PADRAO = "https://www.google.com/maps"
+
+def url_google_maps_configurada() -> str:
+    """URL aberta no início de cada busca (GOOGLE_MAPS_URL; ex.: o servidor de replay_scraper.py)."""
+    load_dotenv()
+    return os.getenv("GOOGLE_MAPS_URL", URL_GOOGLE_MAPS_PADRAO)
 
 def carregar_lista_de_arquivo(nome_arquivo, tipo):
     """Carrega uma lista de um arquivo CSV ou JSON."""
@@ -33,262 +49,274 @@ def carregar_lista_de_arquivo(nome_arquivo, tipo):
 
 async def extract_business_data(page, card_locator, card_index, nicho, cidade):
     """
-    Extrai nome, endereço, rating e reviews de um cartão de negócios.
+    Extrai os dados de um único cartão de negócios com uma chamada evaluate (mesma tabela de seletores do modo em lote).
     """
-    nome = "N/A"
-    endereco = "N/A"
-    rating = 0.0
-    reviews = 0.0
-    telefone = "N/A"
-    website = "N/A"
-    tipo = "N/A"
-    descricao = "N/A"
-    latitude = "N/A"
-    longitude = "N/A"
-
     logging.info(f"Tentando extrair dados para o cartão {card_index}...")
+    bruto = await card_locator.evaluate(JS_EXTRAIR_CARTAO, CAMPOS_CARTAO)
+    return normalizar_cartao(bruto, nicho, cidade)
 
+async def _executar_busca(page, nicho: str, cidade: str):
+    """
+    Executa a busca do nicho na cidade em uma página já aberta e extrai as empresas da lista de resultados.
+    """
+    logging.info(f"Navegando para o Google Maps para buscar '{nicho}' em '{cidade}'...")
+    monitor = MonitorRede(page)
+    search_box_selector = 'input#searchboxinput'
+    await page.goto(url_google_maps_configurada())
+    await page.wait_for_selector(search_box_selector, timeout=30000)
 
-    # Tentativas para extrair o nome
-    try:
-        nome = await card_locator.locator('div.qBF1Pd.fontHeadlineSmall').text_content() or \
-               await card_locator.locator('a.hfpxzc').get_attribute('aria-label')
-        logging.info(f"  Nome encontrado: {nome}")
-    except Exception:
-        nome = "N/A"
-        logging.warning(f"  Cartão {card_index}: Nome não encontrado.")
-
-    # Tentativas para extrair o endereço
-    try:
-        endereco = await card_locator.locator('div.W4Efsd > div:nth-child(1) > span:nth-child(3)').text_content()
-        logging.info(f"  Endereço encontrado: {endereco}")
-    except Exception:
-        endereco = "N/A"
-        logging.warning(f"  Cartão {card_index}: Endereço não encontrado.")
-
-    # Tentativas para extrair o rating
-    try:
-        rating_text = await card_locator.locator('span.MW4etd').text_content()
-        rating = float(rating_text.replace(',', '.')) if rating_text else 0.0
-        logging.info(f"  Rating encontrado: {rating}")
-    except Exception:
-        rating = 0.0
-        logging.warning(f"  Cartão {card_index}: Rating não encontrado.")
-
-    # Tentativas para extrair o número de reviews
+    # Aceitar cookies, se o pop-up aparecer
     try:
-        reviews_text = await card_locator.locator('span.UY7F9').text_content()
-        reviews = int(reviews_text.strip('()')) if reviews_text else 0
-        logging.info(f"  Reviews encontrado: {reviews}")
-    except Exception:
-        reviews = 0
-        logging.warning(f"  Cartão {card_index}: Reviews não encontrado.")
-
-    # Tentativas para extrair o telefone
+        await page.click('button[aria-label="Aceitar tudo"]', timeout=5000)
+        logging.info("Cookies aceitos.")
+        await aguardar_evento(page, monitor)
+    except:
+        logging.info("Pop-up de cookies não encontrado ou já aceito.")
+
+    # Localizar a barra de pesquisa e digitar a cidade primeiro
+    await page.fill(search_box_selector, cidade)
+    await page.press(search_box_selector, "Enter")
+    await aguardar_evento(page, monitor)
+
+    # Limpar a barra de pesquisa e digitar o nicho
+    await page.fill(search_box_selector, nicho)
+    await page.press(search_box_selector, "Enter")
+
+    logging.info("Busca realizada. Aguardando resultados...")
     try:
-        telefone = await card_locator.locator('span.UsdlK').text_content()
-        logging.info(f"  Telefone encontrado: {telefone}")
-    except Exception:
-        telefone = "N/A"
-        logging.warning(f"  Cartão {card_index}: Telefone não encontrado.")
-
-    # Tentativas para extrair o website
-    try:
-        website_locator = card_locator.locator('a.lcr4fd.S9kvJb[data-value="Website"]')
-        website_href = await website_locator.get_attribute('href')
-        if website_href and "/aclk?" not in website_href:
-            website = website_href
+        # Aumentar o timeout para dar mais tempo para a página carregar
+        await page.wait_for_selector('div[role="main"]', timeout=30000) 
+        await aguardar_evento(page, monitor, total_anterior=0) # Até os primeiros cartões aparecerem
+    except Exception as e:
+        logging.error(f"Erro ao aguardar o seletor de resultados: {e}")
+        await page.screenshot(path="error_screenshot.png")
+        logging.info("Captura de tela salva como error_screenshot.png para depuração.")
+        return []
+
+
+    # Encontrar a área de resultados rolável
+    scrollable_element = page.locator('div[role="main"] div[aria-label*="Resultados"]').first
+    if not await scrollable_element.is_visible():
+        logging.error("Elemento rolável não encontrado ou não visível.")
+        await page.screenshot(path="error_scrollable_element.png")
+        return []
+
+    empresas_encontradas = []
+    processed_business_ids = set() # id_empresa das empresas já processadas
+    cursor = 0 # Posição, na lista de cartões, do primeiro cartão ainda não extraído
+    last_scroll_height = -1
+    no_new_businesses_count = 0
+    max_no_new_businesses = 2 # Aumentar o limite de vezes que podemos não encontrar novas empresas
+
+    while True:
+        logging.info(f"Empresas visíveis antes da rolagem: {cursor}")
+
+        # Rolar para o final do elemento rolável em incrementos maiores
+        await scrollable_element.evaluate("element => element.scrollBy(0, 1000)") # Rolar 1000px para baixo
+        await aguardar_evento(page, monitor, total_anterior=cursor)
+
+        current_scroll_height = await scrollable_element.evaluate("element => element.scrollHeight")
+
+        # Extrair apenas os cartões que apareceram desde a última rolagem, em uma única ida ao navegador
+        total_cartoes, novos_cartoes = await extrair_cartoes(page, nicho, cidade, inicio=cursor)
+        if total_cartoes < cursor:
+            # A lista foi recriada (ex.: após "Mais resultados"); reextrai do início e deduplica pelo ID
+            logging.info("Lista de resultados recriada. Reiniciando o cursor de cartões.")
+            total_cartoes, novos_cartoes = await extrair_cartoes(page, nicho, cidade, inicio=0)
+        inicio_novos = total_cartoes - len(novos_cartoes)
+        cursor = total_cartoes
+        logging.info(f"Empresas visíveis após rolagem: {total_cartoes}")
+
+        # Verificar se o número de empresas visíveis aumentou
+        if novos_cartoes:
+            logging.info(f"Novas empresas visíveis detectadas: {len(novos_cartoes)}")
+            no_new_businesses_count = 0
         else:
-            website = "N/A"
-        logging.info(f"  Website encontrado: {website}")
-    except Exception:
-        website = "N/A"
-        logging.warning(f"  Cartão {card_index}: Website não encontrado ou é um link de anúncio.")
+            no_new_businesses_count += 1
+            logging.info(f"Nenhuma nova empresa visível detectada. Contador: {no_new_businesses_count}/{max_no_new_businesses}")
+            if no_new_businesses_count >= max_no_new_businesses:
+                logging.info("Limite de não encontrar novas empresas visíveis atingido. Parando a rolagem.")
+                break
+
+        initial_processed_business_ids_count = len(processed_business_ids)
+        for i, data in enumerate(novos_cartoes, start=inicio_novos):
+            if data.id_empresa not in processed_business_ids:
+                empresas_encontradas.append(data)
+                processed_business_ids.add(data.id_empresa)
+                logging.info(f"  Cartão {i} (ID: {data.id_empresa}) - NOVO. Adicionado.")
+            else:
+                logging.info(f"  Cartão {i} (ID: {data.id_empresa}) - JÁ PROCESSADO. Ignorando.")
+
+        # Atualizar o contador de não encontrar novas empresas com base em empresas únicas
+        if len(processed_business_ids) > initial_processed_business_ids_count:
+            logging.info(f"Novas empresas únicas detectadas nesta rolagem. Resetando contador.")
+            no_new_businesses_count = 0
+        else:
+            no_new_businesses_count += 1
+            logging.info(f"Nenhuma nova empresa única detectada. Contador: {no_new_businesses_count}/{max_no_new_businesses}")
+            if no_new_businesses_count >= max_no_new_businesses:
+                logging.info("Limite de não encontrar novas empresas únicas atingido. Parando a rolagem.")
+                break
+
+        # Verificar se o texto de "fim da lista" apareceu
+        if await page.locator('text="Você chegou ao fim da lista."').is_visible():
+            logging.info("Texto 'Você chegou ao fim da lista.' encontrado. Parando a rolagem.")
+            break
+        
+        # Verificar se um botão "Mais resultados" ou similar apareceu
+        more_results_button = page.locator('button[aria-label*="Mais resultados"]')
+        if await more_results_button.is_visible():
+            logging.info("Botão 'Mais resultados' encontrado. Clicando para carregar mais.")
+            await more_results_button.click()
+            await aguardar_evento(page, monitor, total_anterior=cursor)
+            no_new_businesses_count = 0 
+            continue
+
+        if current_scroll_height == last_scroll_height:
+            logging.info("Fim da rolagem. Nenhuma nova altura de rolagem detectada. Parando a rolagem.")
+            break
+        
+        last_scroll_height = current_scroll_height
+
+    return empresas_encontradas
+
+
+def _depuracao_ativa() -> bool:
+    return logging.getLogger().isEnabledFor(logging.DEBUG)
+
+
+async def _salvar_html_depuracao(page, nicho: str, cidade: str):
+    """
+    Salva o conteúdo HTML da página para depuração (só em falhas ou com log em nível DEBUG), um arquivo
+    por par, para que workers falhando ao mesmo tempo não sobrescrevam o HTML uns dos outros.
+    """
+    nome = f"debug_page_content_{sanitizar_nome_arquivo(nicho)}_{sanitizar_nome_arquivo(cidade)}.html"
+    debug_html_path = os.path.join("results", nome)
+    os.makedirs(os.path.dirname(debug_html_path), exist_ok=True)
+    with open(debug_html_path, "w", encoding="utf-8") as f:
+        f.write(await page.content())
+    logging.info(f"Conteúdo HTML da página salvo em {debug_html_path} para depuração.")
 
-    # Tentativas para extrair o tipo de negócio
-    try:
-        tipo = await card_locator.locator('div.W4Efsd > div:nth-child(1) > span:nth-child(1) > span:nth-child(1)').text_content()
-        logging.info(f"  Tipo de negócio encontrado: {tipo}")
-    except Exception:
-        tipo = "N/A"
-        logging.warning(f"  Cartão {card_index}: Tipo de negócio não encontrado.")
-
-
-    if nome == "N/A" and endereco == "N/A" and rating == "N/A" and reviews == "N/A":
-        logging.warning(f"  ATENÇÃO: Nenhuma informação extraída para o cartão {card_index}.")
-
-    unique_id = hash(f"{nome}-{endereco}") # Gerar um ID único baseado no nome e endereço
-    return {
-        "nicho": nicho,
-        "cidade": cidade,
-        "nome": nome,
-        "Endereço": endereco,
-        "Telefone": telefone,
-        "Website": website,
-        "Tipo": tipo,
-        "nota": rating,
-        "reviews": reviews,
-        "Descricao": descricao,
-        "Latitude": latitude,
-        "Longitude": longitude,
-        "unique_id": unique_id,
-    }
-
-async def buscar_google_maps(nicho: str, cidade: str):
+
+async def buscar_google_maps(nicho: str, cidade: str, perfil: PerfilNavegador | None = None):
     """
     Abre o Google Maps, realiza uma busca pelo nicho e cidade fornecidos e extrai informações das empresas.
     """
+    perfil = perfil or perfil_configurado()
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False, args=["--start-maximized"]) # headless=False para ver o navegador em ação
-        context = await browser.new_context(no_viewport=True)
-        page = await context.new_page()
-
+        browser = await abrir_navegador(p, perfil)
+        context = await novo_contexto(browser, perfil)
         try:
-            logging.info(f"Navegando para o Google Maps para buscar '{nicho}' em '{cidade}'...")
-            await page.goto("https://www.google.com/maps")
-            await page.wait_for_timeout(random.randint(2000, 5000))
+            return await buscar_google_maps_no_contexto(context, nicho, cidade)
+        finally:
+            await browser.close()
+            logging.info("Navegador fechado.")
+
 
-            # Aceitar cookies, se o pop-up aparecer
+async def buscar_google_maps_no_contexto(context, nicho: str, cidade: str):
+    """
+    Realiza a busca em uma nova página de um BrowserContext já existente, sem abrir um novo navegador.
+    O HTML da página só é salvo quando a busca falha ou não retorna empresas, ou com log em nível DEBUG;
+    com SCRAPER_GRAVAR_REPLAY, a página de cada busca bem-sucedida é gravada para o replay.
+    """
+    page = await context.new_page()
+    dados = None
+    try:
+        dados = await _executar_busca(page, nicho, cidade)
+        gravacao = diretorio_gravacao()
+        if dados and gravacao:
+            gravar_pagina_maps(gravacao, nicho, cidade, await page.content())
+        return dados
+    finally:
+        if not dados or _depuracao_ativa():
+            await _salvar_html_depuracao(page, nicho, cidade)
+        await page.close()
+
+
+async def _worker_de_busca(worker_id: int, browser, fila: asyncio.Queue, ao_concluir, cache: CacheBuscas | None = None,
+                           perfil: PerfilNavegador | None = None, ao_iniciar=None):
+    """
+    Consome pares (nicho, cidade) da fila compartilhada. Cada worker mantém o seu próprio BrowserContext
+    (isolado dos demais workers) durante toda a execução e abre uma página nova por par; o contexto só é
+    recriado depois de uma busca que falhou, para não herdar o estado de uma página quebrada.
+    Cada worker aplica seu próprio intervalo de cortesia entre as buscas.
+    `ao_iniciar(nicho, cidade)` e `ao_concluir(nicho, cidade, dados, erro)` são chamados a cada par.
+    """
+    perfil = perfil or perfil_configurado()
+    context = None
+    try:
+        while True:
             try:
-                await page.click('button[aria-label="Aceitar tudo"]', timeout=5000)
-                logging.info("Cookies aceitos.")
-                await page.wait_for_timeout(random.randint(1000, 3000)) 
-            except:
-                logging.info("Pop-up de cookies não encontrado ou já aceito.")
-
-            # Localizar a barra de pesquisa e digitar a cidade primeiro
-            search_box_selector = 'input#searchboxinput'
-            await page.fill(search_box_selector, cidade)
-            await page.press(search_box_selector, "Enter")
-            await page.wait_for_timeout(random.randint(3000, 6000)) 
-
-            # Limpar a barra de pesquisa e digitar o nicho
-            await page.fill(search_box_selector, nicho)
-            await page.press(search_box_selector, "Enter")
-            await page.wait_for_timeout(random.randint(3000, 6000))
-
-            logging.info("Busca realizada. Aguardando resultados...")
+                nicho, cidade = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            if ao_iniciar:
+                ao_iniciar(nicho, cidade)
+            dados = cache.obter(ENGINE_CACHE, nicho, cidade, 0) if cache else None
+            if dados is not None:
+                ao_concluir(nicho, cidade, dados, None)
+                fila.task_done()
+                continue
+
+            dados, erro = [], None
             try:
-                # Aumentar o timeout para dar mais tempo para a página carregar
-                await page.wait_for_selector('div[role="main"]', timeout=30000) 
-                await page.wait_for_timeout(random.randint(2000, 4000)) 
+                if context is None:
+                    context = await novo_contexto(browser, perfil)
+                logging.info(f"[worker {worker_id}] Iniciando busca para o nicho '{nicho}' na cidade '{cidade}'.")
+                dados = await buscar_google_maps_no_contexto(context, nicho, cidade)
+                if cache and dados:
+                    cache.salvar(ENGINE_CACHE, nicho, cidade, 0, [empresa.como_dict() for empresa in dados])
             except Exception as e:
-                logging.error(f"Erro ao aguardar o seletor de resultados: {e}")
-                await page.screenshot(path="error_screenshot.png")
-                logging.info("Captura de tela salva como error_screenshot.png para depuração.")
-                return []
-
-
-            # Encontrar a área de resultados rolável
-            scrollable_element = page.locator('div[role="main"] div[aria-label*="Resultados"]').first
-            if not await scrollable_element.is_visible():
-                logging.error("Elemento rolável não encontrado ou não visível.")
-                await page.screenshot(path="error_scrollable_element.png")
-                return []
-
-            empresas_encontradas = []
-            processed_business_ids = set() # Para armazenar IDs únicos de empresas já processadas
-            last_scroll_height = -1
-            no_new_businesses_count = 0
-            max_no_new_businesses = 2 # Aumentar o limite de vezes que podemos não encontrar novas empresas
-
-            while True:
-                # Registrar o número de empresas visíveis antes da rolagem
-                previous_business_cards_count = len(await page.locator('div.Nv2PK, div.TFQHme > div > div.Nv2PK').all())
-                if not previous_business_cards_count:
-                    previous_business_cards_count = len(await page.locator('div[role="article"]').all())
-                logging.info(f"Empresas visíveis antes da rolagem: {previous_business_cards_count}")
-
-                # Rolar para o final do elemento rolável em incrementos maiores
-                await scrollable_element.evaluate("element => element.scrollBy(0, 1000)") # Rolar 1000px para baixo
-                await page.wait_for_timeout(random.randint(3000, 7000)) 
-
-                current_scroll_height = await scrollable_element.evaluate("element => element.scrollHeight")
-
-                # Obter todos os cartões de negócios visíveis na página atual
-                results_container = page.locator('div[aria-label*="Resultados para"]')
-                if await results_container.count() > 0:
-                    logging.debug(f"Contêiner de resultados encontrado com aria-label: {await results_container.get_attribute('aria-label')}")
-                    # Obter todos os cartões de negócios visíveis na página atual dentro do contêiner
-                    business_cards = await results_container.locator('div.Nv2PK').all()
-                    logging.debug(f"Business cards found with new selector (div[aria-label*=\"Resultados para\"] div.Nv2PK): {len(business_cards)}")
-                else:
-                    logging.warning("Contêiner de resultados com aria-label não encontrado. Usando seletores alternativos.")
-                    business_cards = await page.locator('div.Nv2PK, div.TFQHme > div > div.Nv2PK').all()
-                    if not business_cards:
-                        business_cards = await page.locator('div[role="article"]').all()
-                    logging.debug(f"Business cards found with fallback selectors: {len(business_cards)}")
-                logging.info(f"Empresas visíveis após rolagem: {len(business_cards)}")
-
-                # Verificar se o número de empresas visíveis aumentou
-                if len(business_cards) > previous_business_cards_count:
-                    logging.info(f"Novas empresas visíveis detectadas: {len(business_cards) - previous_business_cards_count}")
-                    no_new_businesses_count = 0
-                else:
-                    no_new_businesses_count += 1
-                    logging.info(f"Nenhuma nova empresa visível detectada. Contador: {no_new_businesses_count}/{max_no_new_businesses}")
-                    if no_new_businesses_count >= max_no_new_businesses:
-                        logging.info("Limite de não encontrar novas empresas visíveis atingido. Parando a rolagem.")
-                        break
-
-                new_businesses_found_in_scroll = False
-                initial_processed_business_ids_count = len(processed_business_ids)
-                new_businesses_found_in_scroll = False
-                for i, card in enumerate(business_cards):
-                    data = await extract_business_data(page, card, i, nicho, cidade)
-                    if data["unique_id"] not in processed_business_ids:
-                        empresas_encontradas.append(data)
-                        processed_business_ids.add(data["unique_id"])
-                        new_businesses_found_in_scroll = True
-                        logging.info(f"  Cartão {i} (ID: {data["unique_id"]}) - NOVO. Adicionado.")
-                    else:
-                        logging.info(f"  Cartão {i} (ID: {data["unique_id"]}) - JÁ PROCESSADO. Ignorando.")
-
-                # Atualizar o contador de não encontrar novas empresas com base em empresas únicas
-                if len(processed_business_ids) > initial_processed_business_ids_count:
-                    logging.info(f"Novas empresas únicas detectadas nesta rolagem. Resetando contador.")
-                    no_new_businesses_count = 0
-                else:
-                    no_new_businesses_count += 1
-                    logging.info(f"Nenhuma nova empresa única detectada. Contador: {no_new_businesses_count}/{max_no_new_businesses}")
-                    if no_new_businesses_count >= max_no_new_businesses:
-                        logging.info("Limite de não encontrar novas empresas únicas atingido. Parando a rolagem.")
-                        break
-
-                # Verificar se o texto de "fim da lista" apareceu
-                if await page.locator('text="Você chegou ao fim da lista."').is_visible():
-                    logging.info("Texto 'Você chegou ao fim da lista.' encontrado. Parando a rolagem.")
-                    break
-                
-                # Verificar se um botão "Mais resultados" ou similar apareceu
-                more_results_button = page.locator('button[aria-label*="Mais resultados"]')
-                if await more_results_button.is_visible():
-                    logging.info("Botão 'Mais resultados' encontrado. Clicando para carregar mais.")
-                    await more_results_button.click()
-                    await page.wait_for_timeout(random.randint(3000, 6000))
-                    no_new_businesses_count = 0 
-                    continue
-
-                if current_scroll_height == last_scroll_height:
-                    logging.info("Fim da rolagem. Nenhuma nova altura de rolagem detectada. Parando a rolagem.")
-                    break
-                
-                last_scroll_height = current_scroll_height
+                logging.error(f"⚠️ [worker {worker_id}] Erro ao buscar empresas para o nicho '{nicho}' na cidade '{cidade}': {e}")
+                erro = e
+                if context is not None:
+                    await context.close()
+                    context = None
+            finally:
+                fila.task_done()
+            ao_concluir(nicho, cidade, dados, erro)
+
+            if not fila.empty():
+                sleep_time = random.uniform(*INTERVALO_ENTRE_BUSCAS)
+                logging.info(f"[worker {worker_id}] Aguardando {sleep_time:.2f} segundos antes da próxima requisição para evitar bloqueio...")
+                await asyncio.sleep(sleep_time)
+    finally:
+        if context is not None:
+            await context.close()
+
+
+async def executar_pool_de_buscas(pares: list, workers: int, cache: CacheBuscas | None = None,
+                                  perfil: PerfilNavegador | None = None, ao_iniciar=None, ao_concluir=None):
+    """
+    Executa as buscas de todos os pares (nicho, cidade) com um único navegador de longa duração
+    e N BrowserContexts isolados consumindo uma fila asyncio compartilhada.
+    Sem `ao_concluir`, devolve a lista de todas as empresas; com ele, cada par é entregue ao
+    callback assim que termina e nada é acumulado em memória.
+    """
+    fila = asyncio.Queue()
+    for par in pares:
+        fila.put_nowait(par)
 
-            return empresas_encontradas
+    resultados = []
+    if ao_concluir is None:
+        ao_concluir = lambda nicho, cidade, dados, erro: resultados.extend(dados)
+    async with async_playwright() as p:
+        perfil = perfil or perfil_configurado()
+        browser = await abrir_navegador(p, perfil)
+        logging.info(f"Navegador iniciado para o pool com {workers} worker(s) e {len(pares)} par(es).")
+        try:
+            await asyncio.gather(*(
+                _worker_de_busca(worker_id, browser, fila, ao_concluir, cache, perfil, ao_iniciar)
+                for worker_id in range(workers)
+            ))
         finally:
-            # Salvar o conteúdo HTML da página para depuração
-            debug_html_path = os.path.join("results", "debug_page_content.html")
-            os.makedirs(os.path.dirname(debug_html_path), exist_ok=True)
-            with open(debug_html_path, "w", encoding="utf-8") as f:
-                f.write(await page.content())
-            logging.info(f"Conteúdo HTML da página salvo em {debug_html_path} para depuração.")
             await browser.close()
-            logging.info("Navegador fechado.")
-        return empresas_encontradas
+            logging.info("Navegador do pool fechado.")
+    return resultados
 
 
-def main():
+def main(argv: list[str] | None = None):
     """
     Função principal para orquestrar a busca de empresas no Google Maps usando Playwright.
     Carrega cidades e nichos, itera sobre eles, busca empresas e salva os dados.
@@ -296,11 +324,29 @@ def main():
     parser = argparse.ArgumentParser(description="Scraper de empresas do Google Maps usando Playwright.")
     parser.add_argument("--mode", type=str, default="default",
                         help="Modo de execução: 'default' para cidades.csv e nichos.csv, 'expansao' para melhores_oportunidades.db.csv e cidades_vizinhas.csv.")
-    args = parser.parse_args()
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Número de BrowserContexts paralelos em um único navegador. 0 mantém o modo sequencial (um navegador por busca).")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignora o cache de buscas e refaz o scraping (o cache é atualizado).")
+    parser.add_argument("--cache-ttl-horas", type=float, default=None,
+                        help="Validade do cache de buscas em horas (padrão: CACHE_BUSCAS_TTL_HORAS ou 168).")
+    parser.add_argument("--visivel", action="store_true",
+                        help="Abre o navegador visível e maximizado, sem bloquear imagens, fontes e tiles (depuração).")
+    parser.add_argument("--debug", action="store_true",
+                        help="Log em nível DEBUG; salva o HTML de todas as buscas em results/debug_page_content_<nicho>_<cidade>.html.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma a última execução do mesmo modo, pulando os pares já concluídos no diário.")
+    args = parser.parse_args(argv)
+
+    # Configurado só na execução: importar o módulo (CLI, testes, benchmarks) não apaga o scraper_debug.log
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='scraper_debug.log', filemode='w')
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    perfil = perfil_configurado(visivel=args.visivel)
 
     if args.mode == "expansao":
         cidades = carregar_lista_de_arquivo("cidades_vizinhas", "cidades vizinhas")
-        nichos_df = pd.read_csv(os.path.join(os.getcwd(), "data", "melhores_oportunidades.db.csv"))
+        nichos_df = carregar_tabela(os.path.join(os.getcwd(), "data", "melhores_oportunidades.db.csv"), colunas=["nicho"])
         nichos = nichos_df["nicho"].tolist()
         logging.info("Modo 'expansao' ativado. Carregando nichos de melhores_oportunidades.db.csv e cidades de cidades_vizinhas.csv.")
     else:
@@ -316,71 +362,65 @@ def main():
         logging.error("❌ A lista de nichos está vazia. Verifique o arquivo de nichos.")
         return
 
-    todas_empresas = []
+    pares = [(nicho, cidade) for cidade in cidades for nicho in nichos]
+    diario = DiarioExecucao("playwright", args.mode)
+    pares = diario.preparar(pares, retomar=args.resume)
+    if args.mode != "expansao" and not args.resume:
+        rotacionar_saida_padrao()
+
+    escritor = EscritorEmpresas(args.mode, diario=diario)
+    if args.resume:
+        escritor.desfazer_gravacao_interrompida()
+    cache = CacheBuscas(ttl_horas=args.cache_ttl_horas, refresh=args.refresh)
+
+    def ao_iniciar(nicho, cidade):
+        diario.marcar_em_andamento(nicho, cidade)
+
+    def ao_concluir(nicho, cidade, dados, erro=None):
+        """Grava as empresas do par assim que ele termina e registra o resultado no diário."""
+        if erro is not None:
+            diario.marcar_falha(nicho, cidade, erro)
+        elif not dados:
+            diario.marcar_falha(nicho, cidade, "nenhuma empresa encontrada")
+        else:
+            linhas = escritor.escrever_par(nicho, cidade, dados)
+            diario.marcar_concluido(nicho, cidade, linhas)
 
-    for cidade in cidades:
-        for nicho in nichos:
+    if args.workers > 0:
+        logging.info(f"Modo pool ativado com {args.workers} worker(s) para {len(pares)} pares (nicho, cidade).")
+        asyncio.run(executar_pool_de_buscas(pares, args.workers, cache, perfil, ao_iniciar, ao_concluir))
+    else:
+        for nicho, cidade in pares:
+            ao_iniciar(nicho, cidade)
             try:
+                dados = cache.obter(ENGINE_CACHE, nicho, cidade, 0)
+                if dados is not None:
+                    ao_concluir(nicho, cidade, dados)
+                    continue
+
                 logging.info(f"Iniciando busca para o nicho '{nicho}' na cidade '{cidade}'.")
-                dados = asyncio.run(buscar_google_maps(nicho, cidade))
-                todas_empresas.extend(dados)
-                
-                sleep_time = random.uniform(5, 9) 
+                dados = asyncio.run(buscar_google_maps(nicho, cidade, perfil))
+                if dados:
+                    cache.salvar(ENGINE_CACHE, nicho, cidade, 0, [empresa.como_dict() for empresa in dados])
+                ao_concluir(nicho, cidade, dados)
+
+                sleep_time = random.uniform(*INTERVALO_ENTRE_BUSCAS)
                 logging.info(f"Aguardando {sleep_time:.2f} segundos antes da próxima requisição para evitar bloqueio...")
                 time.sleep(sleep_time)
             except Exception as e:
                 logging.error(f"⚠️ Erro ao buscar empresas para o nicho '{nicho}' na cidade '{cidade}': {e}")
-
-    df = pd.DataFrame(todas_empresas)
-
-    # Garante que as colunas estejam na ordem correta, adicionando as que podem estar faltando
-    expected_columns = ["nicho", "cidade", "nome", "Endereço", "Telefone", "Website", "Tipo", "nota", "reviews", "Descricao", "Latitude", "Longitude"]
-    for col in expected_columns:
-        if col not in df.columns:
-            df[col] = "N/A"
-    df = df[expected_columns]
-
-    if not df.empty:
-        for col in ["nota", "reviews"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-        # Salvar CSV
-        if args.mode == "expansao":
-            for cidade_salvar in df["cidade"].unique():
-                for nicho_salvar in df["nicho"].unique():
-                    df_filtrado = df[(df["cidade"] == cidade_salvar) & (df["nicho"] == nicho_salvar)]
-                    if not df_filtrado.empty:
-                        nicho_sanitizado = nicho_salvar.replace(" ", "_").replace("/", "_").replace("\\", "_").replace(":", "_").replace("*", "_").replace("?", "_").replace("\"", "_").replace("<", "_").replace(">", "_").replace("|", "_")
-                        cidade_sanitizada = cidade_salvar.replace(" ", "_").replace("/", "_").replace("\\", "_").replace(":", "_").replace("*", "_").replace("?", "_").replace("\"", "_").replace("<", "_").replace(">", "_").replace("|", "_")
-                        output_filename = f"dados_empresas_{nicho_sanitizado}_{cidade_sanitizada}.csv"
-                        output_path = os.path.join(os.getcwd(), "results", "csv", output_filename)
-                        df_filtrado.to_csv(output_path, index=False, encoding="utf-8-sig")
-                        logging.info(f"\n✅ Dados para '{nicho_salvar}' em '{cidade_salvar}' salvos em '{output_path}' com {len(df_filtrado)} registros.")
-        else:
-            output_path = os.path.join(os.getcwd(), "results", "csv", "dados_empresas_googlemaps.csv")
-            if os.path.exists(output_path):
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                new_name = os.path.join(os.getcwd(), "results", "csv", f"dados_empresas_googlemaps_sub_{timestamp}.csv")
-                os.rename(output_path, new_name)
-                logging.info(f"Arquivo existente renomeado para {new_name}")
-
-            df.to_csv(output_path, index=False, encoding="utf-8-sig")
-            logging.info(f"\n✅ Dados salvos em '{output_path}' com {len(df)} registros.")
-
-        resumo = df.groupby(["cidade", "nicho"]).agg({
-            "nome": "count",
-            "nota": "mean",
-            "reviews": "sum"
-        }).rename(columns={
-            "nome": "quantidade_empresas",
-            "nota": "nota_media",
-            "reviews": "total_reviews"
-        })
-
+                ao_concluir(nicho, cidade, [], e)
+    cache.fechar()
+    logging.info(f"💾 Cache de buscas: {cache.acertos} acerto(s), {cache.falhas} busca(s) no Google Maps.")
+    logging.info(f"📒 Diário da execução: {diario.contagem_por_estado()}")
+    diario.fechar()
+
+    if escritor.linhas_escritas:
+        resumo = escritor.resumo()
         logging.info("\n📊 Resumo inicial:")
         logging.info(resumo)
     else:
-        logging.warning("Nenhum dado de empresa foi coletado. Nenhum arquivo CSV será gerado.")
+        logging.warning("Nenhum dado de empresa foi coletado nesta execução.")
 
 if __name__ == "__main__":
 
@@ -0,0 +1,97 @@
+# ===============================================================
+# identificadores.py
+# Objetivo: ID estável (64 bits) por empresa, igual entre execuções e entre scrapers
+# ===============================================================
+#
+# O id_empresa é o digest blake2b de 8 bytes (inteiro com sinal, cabe em int64) de:
+#   - "place:<place_id>" quando o ID do lugar no Google Maps é conhecido, ou
+#   - nome, endereço e cidade normalizados (minúsculas, sem acentos nem pontuação) e as
+#     coordenadas arredondadas em 4 casas (~11 m).
+# Ao contrário de hash(), o resultado não depende do processo, então pode ser gravado no CSV
+# e usado como chave única de deduplicação e de junção nas etapas seguintes.
+
+import hashlib
+import re
+import unicodedata
+
+import pandas as pd
+
+COLUNA_ID = "id_empresa"
+_RE_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+# Nomes alternativos de cada campo nos arquivos dos dois scrapers
+COLUNAS_ENDERECO = ("endereco", "Endereço")
+_COLUNAS_LATITUDE = ("Latitude", "latitude")
+_COLUNAS_LONGITUDE = ("Longitude", "longitude")
+
+
+def normalizar_texto(texto) -> str:
+    """Minúsculas, sem acentos e com qualquer sequência não alfanumérica trocada por um espaço."""
+    if texto is None or texto is pd.NA or (isinstance(texto, float) and texto != texto) or texto == "N/A":
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii").lower()
+    return _RE_NAO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def _coordenada(valor) -> str:
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return ""
+    return "" if numero != numero else f"{numero:.4f}"
+
+
+def calcular_id_empresa(nome, endereco=None, cidade=None, latitude=None, longitude=None, place_id=None) -> int:
+    """Retorna o id_empresa (int64) da empresa; o place_id, quando informado, tem prioridade."""
+    if isinstance(place_id, str) and place_id:
+        chave = f"place:{place_id}"
+    else:
+        chave = "|".join((
+            normalizar_texto(nome), normalizar_texto(endereco), normalizar_texto(cidade),
+            _coordenada(latitude), _coordenada(longitude),
+        ))
+    return int.from_bytes(hashlib.blake2b(chave.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def primeira_coluna(df: pd.DataFrame, nomes) -> pd.Series:
+    for nome in nomes:
+        if nome in df.columns:
+            return df[nome]
+    return pd.Series([None] * len(df), index=df.index, dtype="object")
+
+
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def converter_ids(serie: pd.Series) -> pd.Series:
+    """Converte uma coluna de ids para Int64 sem passar por float64, que perderia precisão em 64 bits."""
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return serie.astype("Int64")
+    if pd.api.types.is_float_dtype(serie.dtype): # Já lida como float (ex.: CSV com ids vazios)
+        return serie.where(serie.abs() < 2**63).round().astype("Int64")
+    return pd.Series(pd.array([_inteiro(v) for v in serie], dtype="Int64"), index=serie.index)
+
+
+def garantir_id_empresa(df: pd.DataFrame) -> pd.DataFrame:
+    """Preenche a coluna id_empresa (Int64) nas linhas em que ela não existe ou está vazia."""
+    if COLUNA_ID in df.columns:
+        ids = converter_ids(df[COLUNA_ID])
+    else:
+        ids = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    faltantes = ids.isna().to_numpy()
+    valores = ids.to_numpy(dtype="int64", na_value=0)
+    if faltantes.any():
+        parte = df.loc[faltantes]
+        valores[faltantes] = [
+            calcular_id_empresa(nome, endereco, cidade, latitude, longitude, place_id)
+            for nome, endereco, cidade, latitude, longitude, place_id in zip(
+                primeira_coluna(parte, ("nome",)), primeira_coluna(parte, COLUNAS_ENDERECO),
+                primeira_coluna(parte, ("cidade",)), primeira_coluna(parte, _COLUNAS_LATITUDE),
+                primeira_coluna(parte, _COLUNAS_LONGITUDE), primeira_coluna(parte, ("place_id",)),
+            )
+        ]
+    df[COLUNA_ID] = pd.array(valores, dtype="Int64")
+    return df
@@ -0,0 +1,63 @@
+# ===============================================================
+# ingestao.py
+# Objetivo: leitura e limpeza de arquivos em paralelo (ProcessPoolExecutor) e gravação em threads
+# ===============================================================
+#
+# O número de processos vem do argumento `workers` ou da variável OPORTUNIDADES_WORKERS
+# (padrão: número de CPUs). Com 1 worker, ou com um único arquivo, tudo roda no processo
+# atual, sem o custo de criar o pool. As funções passadas ao pool devem ser de nível de
+# módulo (picklable) e devolver resultados compactos (agregados ou DataFrames já limpos),
+# que são mesclados no processo pai. Gravações (I/O, sem trabalho de CPU relevante) usam
+# threads em `mapear_em_threads`, que não precisam serializar os DataFrames.
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from dotenv import load_dotenv
+
+
+def workers_configurados(workers: int | None = None) -> int:
+    """Retorna o número de processos de ingestão: argumento explícito, OPORTUNIDADES_WORKERS ou nº de CPUs."""
+    if workers is None:
+        load_dotenv()
+        valor = os.getenv("OPORTUNIDADES_WORKERS")
+        workers = int(valor) if valor else (os.cpu_count() or 1)
+    return max(1, int(workers))
+
+
+def mapear_em_paralelo(funcao, itens, workers: int | None = None, janela: int | None = None):
+    """
+    Aplica `funcao` a cada item em um pool de processos e devolve os resultados na ordem dos itens.
+    No máximo `janela` tarefas (padrão: 2 x workers) ficam pendentes ao mesmo tempo, então o pai
+    nunca acumula mais do que alguns resultados ainda não consumidos. `itens` pode ser um gerador
+    (ex.: as partes de um CSV lido com chunksize): ele é consumido só à medida que a janela anda.
+    """
+    workers = workers_configurados(workers)
+    if hasattr(itens, "__len__"):
+        workers = min(workers, len(itens))
+    if workers <= 1:
+        for item in itens:
+            yield funcao(item)
+        return
+
+    janela = janela or workers * 2
+    iterador = iter(itens)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendentes = deque(executor.submit(funcao, item) for item in islice(iterador, janela))
+        while pendentes:
+            resultado = pendentes.popleft().result()
+            for item in islice(iterador, 1):
+                pendentes.append(executor.submit(funcao, item))
+            yield resultado
+
+
+def mapear_em_threads(funcao, itens, workers: int | None = None) -> list:
+    """Aplica `funcao` a cada item em um pool de threads e retorna a lista de resultados, na ordem dos itens."""
+    itens = list(itens)
+    workers = min(workers_configurados(workers), len(itens))
+    if workers <= 1:
+        return [funcao(item) for item in itens]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(funcao, itens))
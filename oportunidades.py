@@ -0,0 +1,109 @@
+# ===============================================================
+# oportunidades.py
+# Objetivo: ponto de entrada único do pipeline (scrape, analyze, consolidate, report, champions, pipeline)
+# ===============================================================
+#
+# Só argparse é importado no início: cada subcomando importa o seu módulo (e, com ele, pandas,
+# matplotlib, Playwright, ...) apenas quando é executado, então `--help` e os passos curtos que o
+# cron encadeia não pagam a importação do pipeline inteiro. A configuração (ex.: SERPAPI_API_KEY)
+# também só é validada pelo subcomando que precisa dela.
+#
+# Argumentos que o subcomando não conhece são repassados ao main() do módulo:
+#   python oportunidades.py scrape --mode expansao --resume
+#   python oportunidades.py scrape --engine playwright --workers 4
+#   python oportunidades.py analyze --completo
+#   python oportunidades.py consolidate
+#   python oportunidades.py report --graficos
+#   python oportunidades.py champions
+#   python oportunidades.py pipeline --simular
+
+import argparse
+import sys
+
+# ---------------------------------------------------
+# 1. Subcomandos (cada um importa o seu módulo só quando executado)
+# ---------------------------------------------------
+
+def _scrape(args, repassados):
+    if args.engine == "playwright":
+        from google_maps_scraper_playwright import main
+    else:
+        from google_maps_scraper import main
+    return main(repassados)
+
+
+def _analyze(args, repassados):
+    from analisador_oportunidades import main
+    return main(repassados)
+
+
+def _consolidate(args, repassados):
+    from consolidar import main
+    return main()
+
+
+def _report(args, repassados):
+    from relatorio_comparativo_multicitadino import main
+    main()
+    if args.graficos:
+        from visualizar_comparativo_citadino import main as gerar_graficos
+        gerar_graficos()
+
+
+def _champions(args, repassados):
+    from filtrar_nichos_campeoes import gerar_arquivos_nichos_campeoes
+    gerar_arquivos_nichos_campeoes(workers=args.workers)
+
+
+def _pipeline(args, repassados):
+    from orquestrador import main
+    return main(repassados)
+
+# ---------------------------------------------------
+# 2. Linha de comando
+# ---------------------------------------------------
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="oportunidades", description="Pipeline de oportunidades de negócios locais.")
+    subparsers = parser.add_subparsers(dest="comando", required=True, metavar="{scrape,analyze,consolidate,report,champions,pipeline}")
+
+    # Sem -h próprio: `scrape --help` e `analyze --help` mostram a ajuda completa do módulo
+    scrape = subparsers.add_parser("scrape", add_help=False,
+                                   help="Coleta empresas no Google Maps (demais argumentos vão para o scraper).")
+    scrape.add_argument("--engine", choices=("serpapi", "playwright"), default="serpapi",
+                        help="Scraper usado: SerpAPI (google_maps_scraper.py) ou Playwright (google_maps_scraper_playwright.py).")
+    scrape.set_defaults(executar=_scrape, repassa_argumentos=True)
+
+    analyze = subparsers.add_parser("analyze", add_help=False,
+                                    help="Gera o ranking de oportunidades (demais argumentos vão para o analisador).")
+    analyze.set_defaults(executar=_analyze, repassa_argumentos=True)
+
+    consolidate = subparsers.add_parser("consolidate", help="Consolida os CSVs de empresas e o banco de oportunidades.")
+    consolidate.set_defaults(executar=_consolidate, repassa_argumentos=False)
+
+    report = subparsers.add_parser("report", help="Gera o relatório comparativo multicitadino.")
+    report.add_argument("--graficos", action="store_true",
+                        help="Gera também os gráficos e o nichos_campeoes.csv (visualizar_comparativo_citadino.py).")
+    report.set_defaults(executar=_report, repassa_argumentos=False)
+
+    champions = subparsers.add_parser("champions", help="Gera os arquivos de oportunidades dos nichos campeões.")
+    champions.add_argument("--workers", type=int, default=None,
+                           help="Processos para ler os arquivos em paralelo (padrão: OPORTUNIDADES_WORKERS ou nº de CPUs).")
+    champions.set_defaults(executar=_champions, repassa_argumentos=False)
+
+    pipeline = subparsers.add_parser("pipeline", add_help=False,
+                                     help="Executa as etapas como um DAG, pulando as que estão em dia (ver orquestrador.py).")
+    pipeline.set_defaults(executar=_pipeline, repassa_argumentos=True)
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    parser = criar_parser()
+    args, repassados = parser.parse_known_args(argv)
+    if repassados and not args.repassa_argumentos:
+        parser.error(f"argumentos não reconhecidos para '{args.comando}': {' '.join(repassados)}")
+    return args.executar(args, repassados) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# ===============================================================
+# orquestrador.py
+# Objetivo: executar o pipeline de ponta a ponta como um DAG, pulando etapas já em dia
+# ===============================================================
+#
+# Cada etapa declara as entradas e saídas (caminhos ou padrões glob, relativos ao diretório de
+# trabalho) e as etapas de que depende. Como no make, uma etapa é pulada quando todas as saídas
+# existem e nenhuma entrada é nova ou tem hash SHA-256 diferente do registrado na última execução
+# bem-sucedida (data/estado_pipeline.json); entradas apagadas desde então são ignoradas. O hash
+# de um arquivo só é recalculado se o tamanho ou o mtime mudaram. As entradas são registradas
+# depois da execução, porque algumas etapas reescrevem as próprias entradas (ex.: o consolidar
+# reordena o oportunidades.db.csv).
+#
+# Cada etapa roda em um processo próprio (python oportunidades.py <subcomando> ou o script do
+# passo); etapas cujas dependências terminaram rodam em paralelo (ex.: relatório comparativo e
+# gráficos). Se uma etapa falha, as que dependem dela não rodam e as demais seguem. O tempo, o
+# status e o motivo de cada etapa vão para data/log_pipeline.csv.
+#
+#   python orquestrador.py                        # analyze -> consolidate -> report | charts -> champions
+#   python orquestrador.py --incluir-scrape       # começa pela coleta (SerpAPI)
+#   python orquestrador.py --etapas report charts --forcar
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+
+DIRETORIO_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+CAMINHO_ESTADO = os.path.join("data", "estado_pipeline.json")
+CAMINHO_LOG = os.path.join("data", "log_pipeline.csv")
+COLUNAS_LOG = ["timestamp_execucao", "etapa", "status", "motivo", "tempo_execucao_segundos", "num_arquivos_entrada"]
+
+EXECUTADA = "executada"
+PULADA = "pulada"
+FALHOU = "falhou"
+BLOQUEADA = "bloqueada"
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """Uma etapa do pipeline: comando (argumentos para o Python), entradas, saídas e dependências."""
+
+    nome: str
+    comando: tuple[str, ...]
+    entradas: tuple[str, ...] = ()
+    saidas: tuple[str, ...] = ()
+    depende_de: tuple[str, ...] = ()
+    opcional: bool = False # Só roda se pedida explicitamente (ex.: scrape, que consome créditos da API)
+
+
+ETAPAS = [
+    Etapa("scrape", ("oportunidades.py", "scrape"),
+          entradas=("input/cidades.csv", "input/cidades.json", "input/nichos.csv", "input/nichos.json"),
+          saidas=("results/csv/dados_empresas_googlemaps.csv",), opcional=True),
+    Etapa("analyze", ("oportunidades.py", "analyze"),
+          entradas=("results/csv/dados_empresas_*.csv",),
+          saidas=("data/oportunidades.sqlite",), depende_de=("scrape",)),
+    # O analyze só faz upsert no SQLite; o consolidate regenera a visão oportunidades.db.csv dele
+    Etapa("consolidate", ("oportunidades.py", "consolidate"),
+          entradas=("results/csv/dados_empresas_googlemaps_sub_*.csv", "data/oportunidades.sqlite",
+                    "data/oportunidades.db.csv"),
+          saidas=("data/melhores_oportunidades.db.csv",), depende_de=("analyze",)),
+    Etapa("report", ("oportunidades.py", "report"),
+          entradas=("data/oportunidades.db.csv",),
+          saidas=("data/relatorio_comparativo_multicitadino.csv",), depende_de=("consolidate",)),
+    Etapa("charts", ("visualizar_comparativo_citadino.py",),
+          entradas=("data/oportunidades.db.csv",),
+          saidas=("data/imagens/mapa_nichos_consistencia_score.png",), depende_de=("consolidate",)),
+    # Os nichos campeões são escolhidos pelos gráficos (nichos_campeoes.csv), então este passo espera por eles
+    Etapa("champions", ("oportunidades.py", "champions"),
+          entradas=("data/nichos_campeoes.csv", "results/consolidados/dados_empresas_googlemaps_master.csv",
+                    "results/cidadesVizinhas/dados_empresas_*.csv"),
+          depende_de=("charts", "consolidate")),
+]
+
+# ---------------------------------------------------
+# 1. Estado (hash das entradas)
+# ---------------------------------------------------
+
+def calcular_hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo, lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def expandir_caminhos(padroes) -> list[str]:
+    """Arquivos existentes que casam com os caminhos/padrões, em ordem e sem repetição."""
+    return sorted({caminho for padrao in padroes for caminho in glob.glob(padrao) if os.path.isfile(caminho)})
+
+
+class EstadoPipeline:
+    """Hashes das entradas de cada etapa na última execução bem-sucedida, com cache por (tamanho, mtime)."""
+
+    def __init__(self, caminho: str = CAMINHO_ESTADO):
+        self.caminho = caminho
+        self.etapas = {}
+        self._arquivos = {} # caminho -> {"tamanho", "mtime_ns", "sha256"}
+        if os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            self.etapas = dados.get("etapas", {})
+            self._arquivos = dados.get("arquivos", {})
+
+    def hash_arquivo(self, caminho: str) -> str:
+        stat = os.stat(caminho)
+        entrada = self._arquivos.get(caminho)
+        if entrada and entrada["tamanho"] == stat.st_size and entrada["mtime_ns"] == stat.st_mtime_ns:
+            return entrada["sha256"]
+        sha256 = calcular_hash_arquivo(caminho)
+        self._arquivos[caminho] = {"tamanho": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        return sha256
+
+    def hashes_entradas(self, etapa: Etapa) -> dict[str, str]:
+        return {caminho: self.hash_arquivo(caminho) for caminho in expandir_caminhos(etapa.entradas)}
+
+    def motivo_para_executar(self, etapa: Etapa) -> str | None:
+        """Por que a etapa precisa rodar, ou None se está em dia."""
+        registro = self.etapas.get(etapa.nome)
+        if registro is None:
+            return "nunca executada"
+        faltando = [saida for saida in etapa.saidas if not expandir_caminhos([saida])]
+        if faltando:
+            return f"saída ausente: {faltando[0]}"
+        # Entradas que sumiram não contam: o consolidar apaga os _sub_*.csv que o analyze já processou
+        # (e cujas linhas o upsert mantém), então só arquivos novos ou alterados exigem nova execução
+        anteriores, atuais = registro["entradas"], self.hashes_entradas(etapa)
+        alteradas = sorted(c for c in atuais if anteriores.get(c) != atuais[c])
+        if alteradas:
+            return f"{len(alteradas)} entrada(s) alterada(s), ex.: {alteradas[0]}"
+        return None
+
+    def registrar(self, etapa: Etapa):
+        self.etapas[etapa.nome] = {
+            "entradas": self.hashes_entradas(etapa),
+            "concluida_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def salvar(self):
+        """Grava o estado de forma atômica (arquivo temporário + rename)."""
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        tmp_file = f"{self.caminho}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"versao": 1, "etapas": self.etapas, "arquivos": self._arquivos}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.caminho)
+
+# ---------------------------------------------------
+# 2. Log de execução
+# ---------------------------------------------------
+
+def registrar_log_pipeline(etapa: str, status: str, motivo: str, tempo_execucao: float, num_arquivos_entrada: int,
+                           log_file_path: str = CAMINHO_LOG):
+    """Acrescenta uma linha por etapa ao data/log_pipeline.csv (como o log_consolidacao.csv do consolidar)."""
+    novo = not os.path.exists(log_file_path)
+    diretorio = os.path.dirname(log_file_path)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    with open(log_file_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if novo:
+            writer.writerow(COLUNAS_LOG)
+        writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), etapa, status, motivo,
+                         f"{tempo_execucao:.3f}", num_arquivos_entrada])
+
+# ---------------------------------------------------
+# 3. Execução do DAG
+# ---------------------------------------------------
+
+def selecionar_etapas(nomes: list[str] | None = None, incluir_scrape: bool = False, etapas: list[Etapa] = ETAPAS) -> list[Etapa]:
+    """Etapas pedidas (padrão: todas as não opcionais), na ordem do DAG; dependências fora da seleção são ignoradas."""
+    conhecidas = {etapa.nome for etapa in etapas}
+    desconhecidas = set(nomes or ()) - conhecidas
+    if desconhecidas:
+        raise ValueError(f"Etapa(s) desconhecida(s): {', '.join(sorted(desconhecidas))}. Disponíveis: {', '.join(conhecidas)}.")
+    if nomes:
+        return [etapa for etapa in etapas if etapa.nome in nomes]
+    return [etapa for etapa in etapas if not etapa.opcional or (etapa.nome == "scrape" and incluir_scrape)]
+
+
+def _executar_comando(etapa: Etapa) -> tuple[int, float]:
+    inicio = time.perf_counter()
+    comando = [sys.executable, os.path.join(DIRETORIO_SCRIPTS, etapa.comando[0]), *etapa.comando[1:]]
+    retorno = subprocess.run(comando).returncode
+    return retorno, time.perf_counter() - inicio
+
+
+def executar_pipeline(etapas: list[Etapa], forcar: bool = False, paralelo: int = 2, simular: bool = False,
+                      estado: EstadoPipeline | None = None, executar=_executar_comando,
+                      log_file_path: str = CAMINHO_LOG) -> dict[str, str]:
+    """
+    Executa as etapas respeitando as dependências; etapas prontas rodam em paralelo (até `paralelo`).
+    Retorna {etapa: status}. `executar(etapa) -> (código de saída, segundos)` pode ser trocado nos testes.
+    """
+    estado = estado or EstadoPipeline()
+    selecionadas = {etapa.nome: etapa for etapa in etapas}
+    dependencias = {nome: [d for d in etapa.depende_de if d in selecionadas] for nome, etapa in selecionadas.items()}
+    # Uma etapa pulada não força as seguintes: cada uma decide pelos hashes das próprias entradas
+    status = {}
+
+    def registrar(nome, situacao, motivo, segundos=0.0):
+        status[nome] = situacao
+        num_entradas = len(expandir_caminhos(selecionadas[nome].entradas))
+        if not simular:
+            registrar_log_pipeline(nome, situacao, motivo, segundos, num_entradas, log_file_path)
+        icone = {EXECUTADA: "✅", PULADA: "⏭️", FALHOU: "❌", BLOQUEADA: "⛔"}[situacao]
+        logging.info(f"{icone} {nome}: {situacao}{f' ({motivo})' if motivo else ''}{f' em {segundos:.2f}s' if segundos else ''}")
+
+    with ThreadPoolExecutor(max_workers=max(1, paralelo)) as executor:
+        em_execucao = {}
+        while len(status) < len(selecionadas):
+            andamento = len(status) + len(em_execucao)
+            for nome, etapa in selecionadas.items():
+                if nome in status or nome in em_execucao.values():
+                    continue
+                deps = dependencias[nome]
+                if any(status.get(d) in (FALHOU, BLOQUEADA) for d in deps):
+                    registrar(nome, BLOQUEADA, "dependência falhou")
+                    continue
+                if not all(d in status for d in deps):
+                    continue
+
+                motivo = "--forcar" if forcar else estado.motivo_para_executar(etapa)
+                if motivo is None:
+                    registrar(nome, PULADA, "entradas inalteradas")
+                elif simular:
+                    registrar(nome, PULADA, f"simulação: executaria ({motivo})")
+                else:
+                    logging.info(f"▶️ {nome}: executando ({motivo})")
+                    em_execucao[executor.submit(executar, etapa)] = nome
+
+            if not em_execucao:
+                if len(status) == andamento:
+                    raise ValueError(f"Dependências circulares entre as etapas: {sorted(set(selecionadas) - set(status))}")
+                continue
+            concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                nome = em_execucao.pop(futuro)
+                try:
+                    retorno, segundos = futuro.result()
+                except Exception as e:
+                    retorno, segundos = f"{type(e).__name__}: {e}", 0.0
+                if retorno == 0:
+                    estado.registrar(selecionadas[nome])
+                    estado.salvar()
+                    registrar(nome, EXECUTADA, "", segundos)
+                else:
+                    registrar(nome, FALHOU, f"código de saída {retorno}", segundos)
+    return status
+
+# ---------------------------------------------------
+# 4. Execução principal
+# ---------------------------------------------------
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Executa o pipeline de oportunidades como um DAG, pulando etapas em dia.")
+    parser.add_argument("--etapas", nargs="+", default=None,
+                        help=f"Etapas a executar (padrão: todas exceto scrape). Disponíveis: {', '.join(e.nome for e in ETAPAS)}.")
+    parser.add_argument("--incluir-scrape", action="store_true", help="Inclui a coleta (scrape) no início do pipeline.")
+    parser.add_argument("--forcar", action="store_true", help="Executa as etapas mesmo com as entradas inalteradas.")
+    parser.add_argument("--paralelo", type=int, default=2, help="Etapas independentes executadas ao mesmo tempo (padrão: 2).")
+    parser.add_argument("--simular", action="store_true", help="Só mostra o que seria executado (dry-run).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        etapas = selecionar_etapas(args.etapas, args.incluir_scrape)
+    except ValueError as e:
+        parser.error(str(e))
+
+    inicio = time.perf_counter()
+    status = executar_pipeline(etapas, forcar=args.forcar, paralelo=args.paralelo, simular=args.simular)
+    logging.info(f"🏁 Pipeline concluído em {time.perf_counter() - inicio:.2f}s: {status}")
+    return 1 if any(s in (FALHOU, BLOQUEADA) for s in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
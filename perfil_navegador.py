@@ -0,0 +1,84 @@
+# ===============================================================
+# perfil_navegador.py
+# Objetivo: perfil enxuto do Chromium para o scraper (headless, viewport fixo, recursos bloqueados)
+# ===============================================================
+#
+# Perfil de produção (padrão): headless, viewport pequeno e fixo e bloqueio de imagens, fontes,
+# mídia e tiles do mapa via context.route — a lista de resultados continua funcionando, mas cada
+# contexto consome bem menos memória e banda. O perfil visível (--visivel) reproduz o
+# comportamento antigo: janela maximizada, sem bloqueios, útil para depurar seletores.
+# Configuração: SCRAPER_HEADLESS (padrão 1), SCRAPER_BLOQUEAR_RECURSOS (padrão 1),
+# SCRAPER_VIEWPORT (padrão "1024x768").
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+TIPOS_BLOQUEADOS = frozenset({"image", "font", "media"})
+# Tiles do mapa (vetoriais e de satélite), Street View e miniaturas das fotos dos lugares
+_RE_URL_BLOQUEADA = re.compile(
+    r"/maps/vt[/?]|/kh[/?]|khms\d*\.google|streetviewpixels|/maps/preview/(?:photo|image)|googleusercontent\.com/p/"
+)
+
+
+@dataclass
+class PerfilNavegador:
+    headless: bool = True
+    viewport: tuple[int, int] | None = (1024, 768)
+    bloquear_recursos: bool = True
+
+    @property
+    def argumentos(self) -> list[str]:
+        return [] if self.viewport else ["--start-maximized"]
+
+    def opcoes_contexto(self) -> dict:
+        if self.viewport is None:
+            return {"no_viewport": True}
+        largura, altura = self.viewport
+        return {"viewport": {"width": largura, "height": altura}}
+
+
+def _ativado(variavel: str, padrao: str = "1") -> bool:
+    return os.getenv(variavel, padrao).strip().lower() in ("1", "true", "sim", "yes")
+
+
+def perfil_configurado(visivel: bool = False) -> PerfilNavegador:
+    """Perfil de produção a partir do ambiente; com `visivel`, janela maximizada sem bloqueios."""
+    if visivel:
+        return PerfilNavegador(headless=False, viewport=None, bloquear_recursos=False)
+    load_dotenv()
+    largura, _, altura = os.getenv("SCRAPER_VIEWPORT", "1024x768").lower().partition("x")
+    return PerfilNavegador(
+        headless=_ativado("SCRAPER_HEADLESS"),
+        viewport=(int(largura), int(altura)),
+        bloquear_recursos=_ativado("SCRAPER_BLOQUEAR_RECURSOS"),
+    )
+
+
+def deve_bloquear(tipo_recurso: str, url: str) -> bool:
+    """Indica se a requisição é dispensável para extrair a lista de resultados."""
+    return tipo_recurso in TIPOS_BLOQUEADOS or bool(_RE_URL_BLOQUEADA.search(url))
+
+
+async def _rotear(route):
+    if deve_bloquear(route.request.resource_type, route.request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def abrir_navegador(playwright, perfil: PerfilNavegador):
+    """Inicia o Chromium com o perfil informado."""
+    logging.info(f"Iniciando Chromium (headless={perfil.headless}, viewport={perfil.viewport}, bloqueio={perfil.bloquear_recursos}).")
+    return await playwright.chromium.launch(headless=perfil.headless, args=perfil.argumentos)
+
+
+async def novo_contexto(browser, perfil: PerfilNavegador):
+    """Cria um BrowserContext com o viewport do perfil e, se ativado, o bloqueio de recursos em todas as páginas."""
+    context = await browser.new_context(**perfil.opcoes_contexto())
+    if perfil.bloquear_recursos:
+        await context.route("**/*", _rotear)
+    return context
@@ -1,17 +1,18 @@
 # Objetivo: gerar visualizações e insights automáticos do ranking de oportunidades
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
 import datetime
 
+from armazenamento import ESQUEMA_OPORTUNIDADES, carregar_tabela
+from banco_oportunidades import garantir_visao
+
 # ---------------------------------------------------
 # 1. Ler dados
 # ---------------------------------------------------
-df = pd.read_csv("data/oportunidades.db.csv")
-
-# Garantir que o score é numérico
-df["score_oportunidade"] = pd.to_numeric(df["score_oportunidade"], errors="coerce")
+# O esquema já entrega o score como float64 e cidade/nicho/classificação como category
+garantir_visao("data/oportunidades.db.csv")
+df = carregar_tabela("data/oportunidades.db.csv", esquema=ESQUEMA_OPORTUNIDADES)
 
 # ---------------------------------------------------
 # 2. Gráfico principal
@@ -0,0 +1,267 @@
+# ===============================================================
+# replay_scraper.py
+# Objetivo: gravar respostas da SerpAPI e páginas do Google Maps e servi-las localmente (replay)
+# ===============================================================
+#
+# Gravação: com SCRAPER_GRAVAR_REPLAY=<diretório> no ambiente, os dois scrapers salvam cada resposta
+# válida da SerpAPI (JSON por engine/página) e, no Playwright, o HTML da lista de resultados já
+# rolada (o mesmo conteúdo de results/debug_page_content_<nicho>_<cidade>.html). `exportar-cache`
+# aproveita o JSON bruto que já está em data/cache_buscas.sqlite, sem nenhuma consulta nova.
+# Layout do diretório:
+#   serpapi/<engine>/<nicho>_<cidade>_<pagina>.json
+#   maps/<nicho>_<cidade>.html
+#
+# Replay: ServidorReplay é um servidor aiohttp local que responde no lugar da SerpAPI (/search e
+# /search.json, com os mesmos parâmetros) e do Google Maps (/maps: caixa de busca que carrega a
+# lista gravada do par digitado), com latência aleatória e injeção de erros configuráveis.
+# Os scrapers apontam para ele com SERPAPI_BASE_URL e GOOGLE_MAPS_URL.
+#
+#   python replay_scraper.py exportar-cache --destino tests/fixtures/replay
+#   python replay_scraper.py servir --diretorio tests/fixtures/replay --latencia-ms 50,200 --taxa-erros 0.05
+#
+# A vazão dos scrapers contra o replay é medida por benchmarks/vazao_scrapers.py.
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+
+from dotenv import load_dotenv
+
+from saida_scraper import sanitizar_nome_arquivo
+
+PAGE_SIZE = 20
+SUFIXO_CONSULTA = ", Rio de Janeiro"
+# Resposta da SerpAPI quando a consulta não tem resultados (usada para pares não gravados)
+ERRO_SEM_RESULTADOS = "Google hasn't returned any results for this query."
+ERRO_INJETADO = "Replay: erro injetado."
+# Página do Maps sem lista de resultados (par não gravado ou erro injetado)
+HTML_SEM_RESULTADOS = '<!DOCTYPE html><html><body><div role="main"></div></body></html>'
+
+# Imita só o que _executar_busca usa: o pop-up de cookies, a caixa de busca (cidade, Enter, nicho,
+# Enter) e a lista de resultados, que é trocada pela div[role="main"] gravada do par buscado.
+HTML_MAPS = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head><meta charset="utf-8"><title>Google Maps (replay)</title></head>
+<body>
+<button aria-label="Aceitar tudo" onclick="this.remove()">Aceitar tudo</button>
+<input id="searchboxinput" autocomplete="off">
+<div id="conteudo"></div>
+<script>
+const consultas = [];
+document.getElementById("searchboxinput").addEventListener("keydown", async (evento) => {
+    if (evento.key !== "Enter") return;
+    consultas.push(evento.target.value);
+    if (consultas.length < 2) return;
+    const [cidade, nicho] = consultas.slice(-2);
+    const resposta = await fetch(`/maps/busca?cidade=${encodeURIComponent(cidade)}&nicho=${encodeURIComponent(nicho)}`);
+    const pagina = new DOMParser().parseFromString(await resposta.text(), "text/html");
+    const main = pagina.querySelector('div[role="main"]');
+    document.getElementById("conteudo").replaceChildren(...(main ? [document.importNode(main, true)] : []));
+});
+</script>
+</body>
+</html>
+"""
+
+# ---------------------------------------------------
+# 1. Gravação
+# ---------------------------------------------------
+
+def diretorio_gravacao() -> str | None:
+    """Diretório em que os scrapers gravam as respostas (SCRAPER_GRAVAR_REPLAY); None desativa a gravação."""
+    load_dotenv()
+    return os.getenv("SCRAPER_GRAVAR_REPLAY") or None
+
+
+def caminho_serpapi(diretorio: str, engine: str, nicho: str, cidade: str, pagina: int) -> str:
+    nome = f"{sanitizar_nome_arquivo(nicho)}_{sanitizar_nome_arquivo(cidade)}_{int(pagina)}.json"
+    return os.path.join(diretorio, "serpapi", engine, nome)
+
+
+def caminho_maps(diretorio: str, nicho: str, cidade: str) -> str:
+    return os.path.join(diretorio, "maps", f"{sanitizar_nome_arquivo(nicho)}_{sanitizar_nome_arquivo(cidade)}.html")
+
+
+def _gravar(caminho: str, conteudo: str):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def gravar_resposta_serpapi(diretorio: str, engine: str, nicho: str, cidade: str, pagina: int, results: dict) -> str:
+    """Grava o JSON bruto de uma página da SerpAPI."""
+    caminho = caminho_serpapi(diretorio, engine, nicho, cidade, pagina)
+    _gravar(caminho, json.dumps(results, ensure_ascii=False))
+    return caminho
+
+
+def gravar_pagina_maps(diretorio: str, nicho: str, cidade: str, html: str) -> str:
+    """Grava o HTML da página de resultados do Maps (depois da rolagem, com todos os cartões)."""
+    caminho = caminho_maps(diretorio, nicho, cidade)
+    _gravar(caminho, html)
+    logging.info(f"📼 Replay: página do Maps gravada em {caminho}.")
+    return caminho
+
+
+def exportar_cache(cache, diretorio: str) -> int:
+    """Grava como fixtures as respostas da SerpAPI guardadas no cache de buscas; retorna quantas foram gravadas."""
+    from serpapi_async import ENGINES
+
+    total = 0
+    for engine, nicho, cidade, pagina, valor in cache.entradas(ENGINES):
+        if isinstance(valor, dict) and "error" not in valor:
+            gravar_resposta_serpapi(diretorio, engine, nicho, cidade, pagina, valor)
+            total += 1
+    return total
+
+# ---------------------------------------------------
+# 2. Servidor de replay
+# ---------------------------------------------------
+
+def nicho_cidade_da_consulta(q: str) -> tuple[str, str]:
+    """Recupera (nicho, cidade) de q = "<nicho> em <cidade>, Rio de Janeiro", o formato dos scrapers."""
+    if q.endswith(SUFIXO_CONSULTA):
+        q = q[:-len(SUFIXO_CONSULTA)]
+    nicho, _, cidade = q.rpartition(" em ")
+    return nicho, cidade
+
+
+class ServidorReplay:
+    """
+    Servidor HTTP local com as respostas gravadas em `diretorio`. Use com `async with`; `url_serpapi`
+    e `url_maps` ficam disponíveis após a entrada. Cada requisição espera um tempo sorteado em
+    `latencia_ms` (min, max) e falha com probabilidade `taxa_erros` (HTTP 503). Pares não gravados
+    respondem como uma busca sem resultados.
+    """
+
+    def __init__(self, diretorio: str, latencia_ms: tuple[float, float] = (0, 0), taxa_erros: float = 0.0,
+                 semente: int | None = None, host: str = "127.0.0.1", porta: int = 0):
+        self.diretorio = diretorio
+        self.latencia_ms = latencia_ms
+        self.taxa_erros = taxa_erros
+        self.host = host
+        self.porta = porta
+        self.requisicoes = 0
+        self.erros_injetados = 0
+        self.nao_gravadas = 0
+        self._aleatorio = random.Random(semente)
+        self._runner = None
+
+    async def _simular_rede(self) -> bool:
+        """Aplica a latência e sorteia a injeção de erro; retorna True se a requisição deve falhar."""
+        self.requisicoes += 1
+        minimo, maximo = self.latencia_ms
+        if maximo > 0:
+            await asyncio.sleep(self._aleatorio.uniform(minimo, maximo) / 1000)
+        if self.taxa_erros and self._aleatorio.random() < self.taxa_erros:
+            self.erros_injetados += 1
+            return True
+        return False
+
+    async def _serpapi(self, request):
+        from aiohttp import web
+
+        if await self._simular_rede():
+            return web.json_response({"error": ERRO_INJETADO}, status=503)
+        params = request.query
+        nicho, cidade = nicho_cidade_da_consulta(params.get("q", ""))
+        pagina = int(params.get("start", 0)) // PAGE_SIZE
+        caminho = caminho_serpapi(self.diretorio, params.get("engine", ""), nicho, cidade, pagina)
+        if not os.path.exists(caminho):
+            self.nao_gravadas += 1
+            return web.json_response({"error": ERRO_SEM_RESULTADOS})
+        with open(caminho, "rb") as f:
+            return web.Response(body=f.read(), content_type="application/json")
+
+    async def _maps(self, request):
+        from aiohttp import web
+
+        return web.Response(text=HTML_MAPS, content_type="text/html")
+
+    async def _maps_busca(self, request):
+        from aiohttp import web
+
+        if await self._simular_rede():
+            return web.Response(text=HTML_SEM_RESULTADOS, content_type="text/html", status=503)
+        caminho = caminho_maps(self.diretorio, request.query.get("nicho", ""), request.query.get("cidade", ""))
+        if not os.path.exists(caminho):
+            self.nao_gravadas += 1
+            return web.Response(text=HTML_SEM_RESULTADOS, content_type="text/html")
+        with open(caminho, "r", encoding="utf-8") as f:
+            return web.Response(text=f.read(), content_type="text/html")
+
+    async def __aenter__(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/search", self._serpapi)
+        app.router.add_get("/search.json", self._serpapi)
+        app.router.add_get("/maps", self._maps)
+        app.router.add_get("/maps/busca", self._maps_busca)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.porta)
+        await site.start()
+        self.porta = self._runner.addresses[0][1]
+        base = f"http://{self.host}:{self.porta}"
+        self.url_serpapi = f"{base}/search.json"
+        self.url_maps = f"{base}/maps"
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._runner.cleanup()
+
+# ---------------------------------------------------
+# 3. Linha de comando
+# ---------------------------------------------------
+
+def _intervalo_ms(valor: str) -> tuple[float, float]:
+    minimo, _, maximo = valor.partition(",")
+    return float(minimo), float(maximo or minimo)
+
+
+async def _servir(args):
+    async with ServidorReplay(args.diretorio, args.latencia_ms, args.taxa_erros, args.semente, args.host, args.porta) as servidor:
+        print(f"SERPAPI_BASE_URL={servidor.url_serpapi}")
+        print(f"GOOGLE_MAPS_URL={servidor.url_maps}")
+        print("Servindo o replay (Ctrl-C para encerrar)...")
+        await asyncio.Event().wait()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Gravação e replay local das respostas dos scrapers.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    servir = subparsers.add_parser("servir", help="Serve as respostas gravadas no lugar da SerpAPI e do Google Maps.")
+    servir.add_argument("--diretorio", default=os.path.join("tests", "fixtures", "replay"), help="Diretório das gravações.")
+    servir.add_argument("--host", default="127.0.0.1")
+    servir.add_argument("--porta", type=int, default=8765)
+    servir.add_argument("--latencia-ms", type=_intervalo_ms, default=(0, 0), help='Latência por requisição, "min,max" em ms.')
+    servir.add_argument("--taxa-erros", type=float, default=0.0, help="Probabilidade de responder HTTP 503.")
+    servir.add_argument("--semente", type=int, default=None, help="Semente da latência e dos erros sorteados.")
+
+    exportar = subparsers.add_parser("exportar-cache", help="Grava as respostas da SerpAPI do cache de buscas como fixtures.")
+    exportar.add_argument("--cache", default=None, help="Caminho do cache (padrão: data/cache_buscas.sqlite).")
+    exportar.add_argument("--destino", default=os.path.join("tests", "fixtures", "replay"), help="Diretório das gravações.")
+    args = parser.parse_args(argv)
+
+    if args.comando == "servir":
+        try:
+            asyncio.run(_servir(args))
+        except KeyboardInterrupt:
+            pass
+    else:
+        from cache_buscas import CacheBuscas
+
+        with CacheBuscas(args.cache) as cache:
+            total = exportar_cache(cache, args.destino)
+        print(f"{total} resposta(s) da SerpAPI gravada(s) em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# ===============================================================
+# saida_scraper.py
+# Objetivo: gravar os resultados dos scrapers par a par, assim que cada (nicho, cidade) termina
+# ===============================================================
+#
+# Modo 'default': as linhas de cada par são acrescentadas a results/csv/dados_empresas_googlemaps.csv
+# (o arquivo anterior é renomeado para dados_empresas_googlemaps_sub_<timestamp>.csv no início de
+# uma execução nova; com --resume o arquivo atual continua recebendo linhas). Se o cabeçalho do
+# arquivo existente não tiver todas as colunas canônicas (ex.: id_empresa e place_id num CSV antigo),
+# ele também é rotacionado, em vez de as colunas novas serem descartadas no acréscimo.
+# Modo 'expansao': cada par é gravado no seu próprio dados_empresas_<nicho>_<cidade>.csv.
+# EscritorEmpresas junta as duas coisas: grava cada par assim que chega e mantém contadores
+# acumulados por (cidade, nicho) para o resumo final, sem guardar as linhas em memória. Com um
+# DiarioExecucao, registra a posição do arquivo antes de cada acréscimo, para que a retomada desfaça
+# a gravação de um par interrompido antes do concluido (ver diario_execucao.py).
+
+import datetime
+import logging
+import os
+
+import pandas as pd
+
+from esquema_empresas import ALIASES_COLUNAS, para_dataframe
+
+DIRETORIO_SAIDA = os.path.join("results", "csv")
+ARQUIVO_SAIDA_PADRAO = "dados_empresas_googlemaps.csv"
+_CARACTERES_INVALIDOS = ' /\\:*?"<>|'
+
+
+def sanitizar_nome_arquivo(texto: str) -> str:
+    """Troca espaços e caracteres inválidos em nomes de arquivo por '_'."""
+    return texto.translate(str.maketrans(_CARACTERES_INVALIDOS, "_" * len(_CARACTERES_INVALIDOS)))
+
+
+def caminho_saida_padrao() -> str:
+    return os.path.join(os.getcwd(), DIRETORIO_SAIDA, ARQUIVO_SAIDA_PADRAO)
+
+
+def caminho_saida_par(nicho: str, cidade: str) -> str:
+    nome = f"dados_empresas_{sanitizar_nome_arquivo(nicho)}_{sanitizar_nome_arquivo(cidade)}.csv"
+    return os.path.join(os.getcwd(), DIRETORIO_SAIDA, nome)
+
+
+def rotacionar_saida_padrao():
+    """Renomeia o arquivo de saída existente para dados_empresas_googlemaps_sub_<timestamp>.csv."""
+    output_path = caminho_saida_padrao()
+    if os.path.exists(output_path):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        new_name = os.path.join(os.path.dirname(output_path), f"dados_empresas_googlemaps_sub_{timestamp}.csv")
+        os.rename(output_path, new_name)
+        logging.info(f"Arquivo existente renomeado para {new_name}")
+
+
+def truncar_saida_padrao(posicao: int | None) -> bool:
+    """
+    Desfaz uma gravação interrompida: trunca o arquivo de saída de volta a `posicao` (o tamanho dele
+    antes do acréscimo). Posição 0 é um arquivo criado pela própria gravação, que é removido.
+    Retorna True se algo foi desfeito.
+    """
+    output_path = caminho_saida_padrao()
+    if posicao is None or not os.path.exists(output_path) or os.path.getsize(output_path) <= posicao:
+        return False
+    if posicao == 0:
+        os.remove(output_path)
+    else:
+        with open(output_path, "r+b") as f:
+            f.truncate(posicao)
+    logging.warning(f"↩️ Gravação interrompida desfeita: '{output_path}' truncado para {posicao} byte(s).")
+    return True
+
+
+def _colunas_do_arquivo_existente(output_path: str, colunas_df) -> list[str] | None:
+    """
+    Colunas (canônicas) do arquivo de saída existente, para acrescentar linhas na mesma ordem. Retorna
+    None se o arquivo não existe ou se foi rotacionado por não ter alguma das colunas de `colunas_df`.
+    """
+    if not os.path.exists(output_path):
+        return None
+    # Cabeçalhos antigos (Endereço, Telefone, ...) recebem as colunas canônicas equivalentes
+    colunas_existentes = pd.read_csv(output_path, nrows=0, encoding="utf-8-sig").columns
+    colunas = [ALIASES_COLUNAS.get(coluna, coluna) for coluna in colunas_existentes]
+    faltando = [coluna for coluna in colunas_df if coluna not in colunas]
+    if faltando:
+        logging.warning(f"⚠️ '{output_path}' não tem as colunas {faltando}; o arquivo será rotacionado.")
+        rotacionar_saida_padrao()
+        return None
+    return colunas
+
+
+def preparar_empresas(dados: list, colunas: list[str] | None = None) -> pd.DataFrame:
+    """
+    Monta o DataFrame tipado de um par (ver esquema_empresas.para_dataframe) a partir de `Empresa`s ou
+    de dicts (ex.: linhas antigas do cache), opcionalmente restrito a `colunas`, nessa ordem.
+    """
+    df = para_dataframe(dados)
+    return df if colunas is None else df[colunas]
+
+
+def gravar_empresas_do_par(df: pd.DataFrame, nicho: str, cidade: str, modo: str, ao_posicionar=None) -> str:
+    """
+    Grava as empresas de um par no arquivo do modo de execução e retorna o caminho gravado. No modo
+    'default', `ao_posicionar(posicao)` é chamado com o tamanho do arquivo logo antes do acréscimo.
+    """
+    if modo == "expansao":
+        output_path = caminho_saida_par(nicho, cidade)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    else:
+        output_path = caminho_saida_padrao()
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        colunas = _colunas_do_arquivo_existente(output_path, df.columns)
+        if ao_posicionar is not None:
+            ao_posicionar(os.path.getsize(output_path) if colunas is not None else 0)
+        if colunas is not None:
+            df.reindex(columns=colunas).to_csv(output_path, mode="a", header=False, index=False, encoding="utf-8")
+        else:
+            df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    logging.info(f"✅ {len(df)} registro(s) de '{nicho}' em '{cidade}' gravados em '{output_path}'.")
+    return output_path
+
+
+class EscritorEmpresas:
+    """
+    Destino em streaming dos scrapers: cada par é gravado ao chegar e só contadores por (cidade, nicho)
+    ficam em memória, então o consumo não cresce com o tamanho da execução.
+    """
+
+    def __init__(self, modo: str, colunas: list[str] | None = None, diario=None):
+        self.modo = modo
+        self.colunas = colunas
+        self.diario = diario
+        self.linhas_escritas = 0
+        # (cidade, nicho) -> [quantidade de empresas, soma das notas, soma das reviews]
+        self._contadores = {}
+
+    def escrever_par(self, nicho: str, cidade: str, dados: list) -> int:
+        """Grava as empresas de um par, atualiza os contadores e retorna o número de linhas gravadas."""
+        df = preparar_empresas(dados, self.colunas)
+        ao_posicionar = None
+        if self.diario is not None:
+            ao_posicionar = lambda posicao: self.diario.registrar_posicao_saida(nicho, cidade, posicao)
+        gravar_empresas_do_par(df, nicho, cidade, self.modo, ao_posicionar)
+        contador = self._contadores.setdefault((cidade, nicho), [0, 0.0, 0.0])
+        contador[0] += len(df)
+        contador[1] += float(df["nota"].sum())
+        contador[2] += float(df["reviews"].sum())
+        self.linhas_escritas += len(df)
+        return len(df)
+
+    def desfazer_gravacao_interrompida(self) -> bool:
+        """Na retomada, trunca a saída do modo 'default' até antes do par interrompido no meio da gravação."""
+        if self.diario is None or self.modo == "expansao":
+            return False # No modo 'expansao' o arquivo do par é regravado inteiro
+        return truncar_saida_padrao(self.diario.posicao_saida_interrompida())
+
+    def resumo(self) -> pd.DataFrame:
+        """Resumo por (cidade, nicho) — quantidade de empresas, nota média e total de reviews — a partir dos contadores."""
+        if not self._contadores:
+            return pd.DataFrame(columns=["quantidade_empresas", "nota_media", "total_reviews"])
+        indice = pd.MultiIndex.from_tuples(sorted(self._contadores), names=["cidade", "nicho"])
+        valores = [self._contadores[chave] for chave in indice]
+        resumo = pd.DataFrame(valores, index=indice, columns=["quantidade_empresas", "soma_notas", "total_reviews"])
+        resumo["nota_media"] = resumo["soma_notas"] / resumo["quantidade_empresas"]
+        return resumo[["quantidade_empresas", "nota_media", "total_reviews"]]
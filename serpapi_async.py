@@ -0,0 +1,253 @@
+# ===============================================================
+# serpapi_async.py
+# Objetivo: cliente assíncrono da SerpAPI com concorrência limitada e rate limit compartilhado
+# ===============================================================
+#
+# Todas as buscas compartilham uma única sessão HTTP (pool de conexões) e um token bucket
+# ajustado ao plano da SerpAPI. Os pares (nicho, cidade) rodam em paralelo até o limite de
+# concorrência; dentro de um par as páginas seguem em sequência, porque só a página anterior
+# diz se existe próxima (buscar páginas "no escuro" gastaria consultas pagas à toa).
+# Configuração: SERPAPI_BASE_URL, SERPAPI_CONCORRENCIA (padrão 4) e SERPAPI_REQ_POR_SEGUNDO (padrão 1).
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+
+from esquema_empresas import Empresa
+from replay_scraper import diretorio_gravacao, gravar_resposta_serpapi
+
+URL_SERPAPI_PADRAO = "https://serpapi.com/search.json"
+ENGINES = ["google_local", "google_maps"]
+PAGE_SIZE = 20
+CONCORRENCIA_PADRAO = 4
+REQ_POR_SEGUNDO_PADRAO = 1.0
+
+# ---------------------------------------------------
+# 1. Parser compartilhado (síncrono e assíncrono)
+# ---------------------------------------------------
+
+def extrair_empresas_serpapi(results: dict, nicho: str, cidade: str, pagina: int = 0) -> list[Empresa]:
+    """Converte a resposta JSON da SerpAPI (local_results ou places_results) nas linhas de empresa do pipeline."""
+    local_results = []
+    if isinstance(results.get("local_results"), list):
+        local_results = results.get("local_results")
+    elif isinstance(results.get("local_results"), dict):
+        local_results = results["local_results"].get("places", [])
+    elif "places_results" in results:
+        local_results = results["places_results"]
+
+    empresas = []
+    for empresa in local_results:
+        nome_empresa = empresa.get("title")
+        if not nome_empresa:
+            logging.warning(f"⚠️ Empresa sem nome encontrada e ignorada em {cidade}, nicho {nicho} (página {pagina+1}).")
+            continue
+
+        coordenadas = empresa.get("gps_coordinates", {})
+        empresas.append(Empresa(
+            nicho=nicho,
+            cidade=cidade,
+            nome=nome_empresa,
+            endereco=empresa.get("address"),
+            telefone=empresa.get("phone"),
+            website=empresa.get("website"),
+            tipo=empresa.get("type"),
+            nota=empresa.get("rating"),
+            reviews=empresa.get("reviews"),
+            descricao=empresa.get("description"),
+            latitude=coordenadas.get("latitude"),
+            longitude=coordenadas.get("longitude"),
+            place_id=empresa.get("place_id"),
+        ))
+    return empresas
+
+
+def tem_proxima_pagina(results: dict, quantidade: int) -> bool:
+    """Indica se vale buscar a próxima página: página cheia e link de paginação presente."""
+    if quantidade < PAGE_SIZE:
+        return False
+    paginacao = results.get("serpapi_pagination", {})
+    return bool(paginacao.get("next_link") or paginacao.get("next"))
+
+# ---------------------------------------------------
+# 2. Rate limit
+# ---------------------------------------------------
+
+class TokenBucket:
+    """Token bucket assíncrono: até `capacidade` requisições em rajada, repostas a `taxa` por segundo."""
+
+    def __init__(self, taxa: float, capacidade: float | None = None):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade if capacidade is not None else max(1.0, self.taxa))
+        self.tokens = self.capacidade
+        self.ultima_reposicao = time.monotonic()
+        self._trava = asyncio.Lock()
+
+    async def adquirir(self):
+        """Espera até haver um token disponível e o consome."""
+        async with self._trava:
+            while True:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultima_reposicao) * self.taxa)
+                self.ultima_reposicao = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.taxa)
+
+# ---------------------------------------------------
+# 3. Cliente
+# ---------------------------------------------------
+
+class ClienteSerpApiAsync:
+    """Sessão HTTP compartilhada com a SerpAPI. Use com `async with`."""
+
+    def __init__(self, api_key: str, base_url: str | None = None, concorrencia: int | None = None,
+                 req_por_segundo: float | None = None, max_retries: int = 2, atraso_inicial: float = 1.0):
+        load_dotenv()
+        self.api_key = api_key
+        self.base_url = base_url or os.getenv("SERPAPI_BASE_URL", URL_SERPAPI_PADRAO)
+        self.concorrencia = int(concorrencia or os.getenv("SERPAPI_CONCORRENCIA", CONCORRENCIA_PADRAO))
+        taxa = float(req_por_segundo or os.getenv("SERPAPI_REQ_POR_SEGUNDO", REQ_POR_SEGUNDO_PADRAO))
+        self.limitador = TokenBucket(taxa)
+        self.max_retries = max_retries
+        self.atraso_inicial = atraso_inicial
+        self.requisicoes = 0
+        self.gravacao = diretorio_gravacao()
+        self._sessao = None
+
+    async def __aenter__(self):
+        import aiohttp # Só o modo --async usa aiohttp; o import custa ~270 ms na partida do scrape síncrono
+
+        conector = aiohttp.TCPConnector(limit=self.concorrencia)
+        self._sessao = aiohttp.ClientSession(connector=conector, timeout=aiohttp.ClientTimeout(total=60))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._sessao.close()
+
+    async def consultar(self, params: dict) -> dict:
+        """Faz uma consulta (respeitando o rate limit) e devolve o JSON; erros HTTP viram {"error": ...}."""
+        import aiohttp
+
+        await self.limitador.adquirir()
+        self.requisicoes += 1
+        async with self._sessao.get(self.base_url, params={**params, "api_key": self.api_key}) as resposta:
+            try:
+                dados = await resposta.json(content_type=None)
+            except (aiohttp.ContentTypeError, ValueError):
+                dados = {}
+            if resposta.status >= 400 and "error" not in dados:
+                dados = {"error": f"HTTP {resposta.status}"}
+            return dados
+
+    async def buscar_empresas(self, nicho: str, cidade: str, max_pages: int = 3, cache=None) -> list[Empresa]:
+        """Versão assíncrona de `google_maps_scraper.buscar_empresas`: paginação, retries e fallback de engine."""
+        logging.info(f"🔍 Buscando: {nicho} em {cidade}...")
+        all_empresas = []
+
+        for engine in ENGINES:
+            for page in range(max_pages):
+                params = {
+                    "engine": engine,
+                    "q": f"{nicho} em {cidade}, Rio de Janeiro",
+                    "hl": "pt",
+                    "gl": "br",
+                    "start": page * PAGE_SIZE,
+                    "num": PAGE_SIZE,
+                }
+                results = await self._obter_pagina(engine, nicho, cidade, page, params, cache)
+                if results is None:
+                    logging.warning(f"⚠️ Todas as tentativas com {engine} falharam para a página {page+1}, tentando engine alternativa...")
+                    break
+
+                empresas_pagina = extrair_empresas_serpapi(results, nicho, cidade, page)
+                if not empresas_pagina:
+                    logging.warning(f"⚠️ Nenhum resultado retornado ({engine}, página {page+1}) para {nicho} em {cidade}")
+                    break
+                all_empresas.extend(empresas_pagina)
+                logging.info(f"✅ {len(empresas_pagina)} empresas encontradas com engine '{engine}' na página {page+1} ({nicho} em {cidade}).")
+                if not tem_proxima_pagina(results, len(empresas_pagina)):
+                    break
+
+            if all_empresas:
+                break
+
+        if not all_empresas:
+            logging.error(f"❌ Falha total para {nicho} em {cidade} (ambas as engines e todas as páginas).")
+        return all_empresas
+
+    async def _obter_pagina(self, engine, nicho, cidade, page, params, cache):
+        """Lê a página do cache ou da API (com backoff exponencial). Retorna None se todas as tentativas falharem."""
+        if cache:
+            results = cache.obter(engine, nicho, cidade, page)
+            if results is not None:
+                return results
+
+        import aiohttp
+
+        for attempt in range(self.max_retries):
+            try:
+                results = await self.consultar(params)
+                if "error" not in results:
+                    if cache:
+                        cache.salvar(engine, nicho, cidade, page, results)
+                    if self.gravacao:
+                        gravar_resposta_serpapi(self.gravacao, engine, nicho, cidade, page, results)
+                    return results
+                logging.warning(
+                    f"⚠️ Erro da SerpAPI ({engine}, página {page+1}) para {nicho}: {results['error']} (tentativa {attempt+1}/{self.max_retries})"
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"⚠️ Erro ao chamar SerpAPI ({engine}, página {page+1}) tentativa {attempt+1}: {e}")
+
+            delay = self.atraso_inicial * (2 ** attempt) + random.uniform(0, self.atraso_inicial)
+            await asyncio.sleep(delay)
+        return None
+
+# ---------------------------------------------------
+# 4. Execução em lote
+# ---------------------------------------------------
+
+async def buscar_pares_async(pares: list[tuple[str, str]], api_key: str, max_pages: int = 3, cache=None,
+                             base_url: str | None = None, concorrencia: int | None = None,
+                             req_por_segundo: float | None = None, ao_iniciar=None, ao_concluir=None,
+                             **opcoes_cliente) -> list[Empresa]:
+    """
+    Busca todos os pares (nicho, cidade) com no máximo `concorrencia` pares em andamento.
+    A falha de um par é registrada e não derruba os demais. `ao_iniciar(nicho, cidade)` é chamado
+    no início de cada par. Sem `ao_concluir`, as empresas voltam em uma lista na ordem de `pares`;
+    com `ao_concluir(nicho, cidade, empresas, erro)`, cada par é entregue ao callback assim que
+    termina e nada é acumulado (a lista devolvida fica vazia).
+    """
+    async with ClienteSerpApiAsync(api_key, base_url, concorrencia, req_por_segundo, **opcoes_cliente) as cliente:
+        semaforo = asyncio.Semaphore(cliente.concorrencia)
+
+        async def buscar_par(nicho, cidade):
+            async with semaforo:
+                if ao_iniciar:
+                    ao_iniciar(nicho, cidade)
+                erro = None
+                try:
+                    empresas = await cliente.buscar_empresas(nicho, cidade, max_pages=max_pages, cache=cache)
+                except Exception as e:
+                    logging.error(f"⚠️ Erro ao buscar empresas para o nicho '{nicho}' na cidade '{cidade}': {e}")
+                    empresas, erro = [], e
+                if ao_concluir:
+                    ao_concluir(nicho, cidade, empresas, erro)
+                    return []
+                return empresas
+
+        resultados = await asyncio.gather(*(buscar_par(nicho, cidade) for nicho, cidade in pares))
+        logging.info(f"🌐 SerpAPI: {cliente.requisicoes} requisição(ões) para {len(pares)} par(es).")
+
+    return [empresa for empresas in resultados for empresa in empresas]
+
+
+def buscar_pares(pares: list[tuple[str, str]], api_key: str, **opcoes) -> list[Empresa]:
+    """Atalho síncrono para `buscar_pares_async`."""
+    return asyncio.run(buscar_pares_async(pares, api_key, **opcoes))
@@ -1,11 +1,20 @@
 import unittest
+import numpy as np
 import pandas as pd
 import sys
 import os
+import shutil
+import tempfile
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from analisador_oportunidades import calcular_score, classificar, gerar_metricas, carregar_dados
+from analisador_oportunidades import (
+    calcular_score, classificar, gerar_metricas, carregar_dados,
+    calcular_scores_vetorizado, classificar_vetorizado, analisar_diretorio, caminho_manifesto,
+)
+import analisador_oportunidades
+from banco_oportunidades import garantir_visao
 
 class TestAnalisadorOportunidades(unittest.TestCase):
 
@@ -81,6 +90,38 @@ class TestAnalisadorOportunidades(unittest.TestCase):
         self.assertEqual(resumo_df[(resumo_df["cidade"] == "CidadeA") & (resumo_df["nicho"] == "NichoY")]["total_reviews"].iloc[0], 20)
         self.assertAlmostEqual(resumo_df[(resumo_df["cidade"] == "CidadeA") & (resumo_df["nicho"] == "NichoY")]["pct_baixa_qualidade"].iloc[0], 0.0)
 
+    def test_scores_vetorizados_equivalem_a_referencia(self):
+        pesos = {"demanda": 0.4, "concorrencia": 0.3, "satisfacao": 0.3}
+        limites = {"alta": 0.66, "media": 0.4}
+        rng = np.random.default_rng(42)
+        n = 5000
+        resumo = pd.DataFrame({
+            "total_reviews": rng.integers(0, 200, n).astype(float),
+            "empresas": rng.integers(1, 40, n),
+            "nota_media": np.round(rng.uniform(0, 5, n), 2),
+        })
+        resumo.loc[::50, "nota_media"] = np.nan
+        resumo.loc[::70, "nota_media"] = 0
+
+        esperado_scores = resumo.apply(lambda r: calcular_score(r, pesos), axis=1).to_numpy()
+        esperado_classes = [classificar(s, limites) for s in esperado_scores]
+
+        scores = calcular_scores_vetorizado(resumo, pesos)
+        np.testing.assert_array_equal(scores, esperado_scores)
+        self.assertEqual(classificar_vetorizado(scores, limites).tolist(), esperado_classes)
+
+    def test_gerar_metricas_pct_sem_reviews(self):
+        df = pd.DataFrame({
+            "cidade": ["CidadeA"] * 4,
+            "nicho": ["NichoX"] * 4,
+            "nome": ["E1", "E2", "E3", "E4"],
+            "nota": [5, 3.9, np.nan, 4],
+            "reviews": [0, np.nan, 10, 20],
+        })
+        resumo_df = gerar_metricas(df)
+        self.assertAlmostEqual(resumo_df["pct_sem_reviews"].iloc[0], 50.0)
+        self.assertAlmostEqual(resumo_df["pct_baixa_qualidade"].iloc[0], 25.0)
+
     def test_carregar_dados(self):
         # Criar um arquivo CSV temporário para teste
         test_csv_content = """
@@ -121,5 +162,61 @@ CidadeA,NichoX,Empresa1
         os.remove(test_file_path)
         os.remove(test_file_path_missing_cols)
 
+
+class TestAnalisadorIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.base_path, "csv")
+        os.makedirs(self.input_dir)
+        self.db_file = os.path.join(self.base_path, "data", "oportunidades.db.csv")
+        self.pesos = {"demanda": 0.4, "concorrencia": 0.3, "satisfacao": 0.3}
+        self.limites = {"alta": 0.66, "media": 0.4}
+        self.escrever("dados_empresas_a.csv", "cidade,nicho,nome,nota,reviews\nCidadeA,NichoX,E1,4.5,10\nCidadeA,NichoX,E2,3.0,5\n")
+        self.escrever("dados_empresas_b.csv", "cidade,nicho,nome,nota,reviews\nCidadeB,NichoY,E3,5.0,40\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def escrever(self, filename, content):
+        with open(os.path.join(self.input_dir, filename), "w", encoding="utf-8-sig") as f:
+            f.write(content)
+
+    def analisar(self):
+        with patch("analisador_oportunidades.carregar_dados", wraps=analisador_oportunidades.carregar_dados) as mock_carregar:
+            resumo = analisar_diretorio(self.input_dir, self.db_file, self.pesos, self.limites, workers=1)
+        return resumo, mock_carregar.call_count
+
+    def test_reprocessa_apenas_arquivos_alterados(self):
+        resumo, chamadas = self.analisar()
+        self.assertEqual(chamadas, 2)
+        self.assertEqual(len(resumo), 2)
+        self.assertTrue(os.path.exists(caminho_manifesto(self.db_file)))
+
+        resumo, chamadas = self.analisar()
+        self.assertEqual(chamadas, 0)
+        self.assertEqual(len(resumo), 2) # Agregados reaproveitados do manifesto
+
+        self.escrever("dados_empresas_b.csv", "cidade,nicho,nome,nota,reviews\nCidadeB,NichoY,E3,5.0,40\nCidadeB,NichoY,E4,2.0,0\n")
+        resumo, chamadas = self.analisar()
+        self.assertEqual(chamadas, 1)
+        self.assertIsNotNone(garantir_visao(self.db_file)) # O upsert deixou a visão desatualizada
+        db = pd.read_csv(self.db_file)
+        self.assertEqual(len(db), 2)
+        self.assertEqual(db[db["cidade"] == "CidadeB"]["empresas"].iloc[0], 2)
+
+    def test_carga_paralela_equivale_a_serial(self):
+        serial = analisar_diretorio(self.input_dir, self.db_file, self.pesos, self.limites, completo=True, workers=1)
+        paralelo = analisar_diretorio(self.input_dir, self.db_file, self.pesos, self.limites, completo=True, workers=2)
+        pd.testing.assert_frame_equal(serial.reset_index(drop=True), paralelo.reset_index(drop=True))
+
+    def test_arquivo_removido_sai_do_manifesto(self):
+        self.analisar()
+        os.remove(os.path.join(self.input_dir, "dados_empresas_a.csv"))
+        resumo, chamadas = self.analisar()
+        self.assertEqual(chamadas, 0)
+        self.assertEqual(resumo["cidade"].tolist(), ["CidadeB"])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import unittest
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from armazenamento import (
+    ESQUEMA_EMPRESAS, ESQUEMA_OPORTUNIDADES, carregar_tabela, carregar_tabela_em_partes, concatenar_tabelas,
+    existe_tabela, formato_configurado, relatar_memoria, resolver_caminho, salvar_tabela,
+)
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+
+class TestArmazenamento(unittest.TestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.base_path, "data", "oportunidades.db.csv")
+        self.df = pd.DataFrame({
+            "cidade": ["CidadeA", "CidadeB"],
+            "nicho": ["NichoX", "NichoY"],
+            "empresas": [3, 1],
+            "nota_media": [4.5, 3.0],
+            "total_reviews": [10, 0],
+            "score_oportunidade": [0.7, 0.3],
+            "classificacao": ["Alta", "Baixa"],
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def test_resolver_caminho(self):
+        self.assertEqual(resolver_caminho("data/oportunidades.db.csv", "csv"), "data/oportunidades.db.csv")
+        self.assertEqual(resolver_caminho("data/oportunidades.db.csv", "parquet"), "data/oportunidades.db.parquet")
+
+    def test_formato_invalido(self):
+        with patch.dict(os.environ, {"OPORTUNIDADES_FORMATO": "xlsx"}):
+            with self.assertRaises(ValueError):
+                formato_configurado()
+
+    def test_csv_com_esquema_e_projecao(self):
+        salvar_tabela(self.df, self.caminho, esquema=ESQUEMA_OPORTUNIDADES, formato="csv")
+        df = carregar_tabela(self.caminho, colunas=["nicho", "score_oportunidade", "inexistente"],
+                             esquema=ESQUEMA_OPORTUNIDADES, formato="csv")
+        self.assertEqual(list(df.columns), ["nicho", "score_oportunidade"])
+        self.assertEqual(str(df["score_oportunidade"].dtype), "float64")
+        self.assertEqual(str(df["nicho"].dtype), "category")
+
+    def test_csv_empresas_com_dtypes_na_leitura(self):
+        pd.DataFrame({
+            "nicho": ["Pizzaria"] * 3, "cidade": ["Niterói"] * 3, "nome": ["A", "B", "C"],
+            "reviews": [10, 20, 30], "latitude": [-22.9, -22.8, -22.7],
+            "id_empresa": pd.array([9007199254740993, None, 3], dtype="Int64"),
+        }).pipe(salvar_tabela, self.caminho, formato="csv")
+        with self.assertLogs(level="INFO") as logs:
+            df = carregar_tabela(self.caminho, esquema=ESQUEMA_EMPRESAS, formato="csv")
+        self.assertEqual(str(df["cidade"].dtype), "category")
+        self.assertEqual(str(df["latitude"].dtype), "float32")
+        self.assertEqual(df["id_empresa"].iloc[0], 9007199254740993) # Sem passar por float64
+        self.assertTrue(any("🧮" in linha for linha in logs.output))
+
+    def test_relatar_memoria_categorias_economizam(self):
+        df = pd.DataFrame({"cidade": pd.Series(["Niterói", "São Gonçalo"] * 500, dtype="category")})
+        with self.assertLogs(level="INFO"):
+            atual, sem_otimizacao = relatar_memoria(df, "teste")
+        self.assertLess(atual, sem_otimizacao)
+
+    def test_concatenar_tabelas_preserva_category(self):
+        a = pd.DataFrame({"nicho": pd.Series(["Pizzaria"], dtype="category"), "n": [1]})
+        b = pd.DataFrame({"nicho": pd.Series(["Padaria"], dtype="category"), "n": [2]})
+        df = concatenar_tabelas([a, b])
+        self.assertEqual(str(df["nicho"].dtype), "category")
+        self.assertEqual(df["nicho"].tolist(), ["Pizzaria", "Padaria"])
+
+    def test_tabela_inexistente(self):
+        self.assertFalse(existe_tabela(self.caminho, formato="csv"))
+        with self.assertRaises(FileNotFoundError):
+            carregar_tabela(self.caminho, formato="csv")
+
+    @unittest.skipUnless(PYARROW_DISPONIVEL, "pyarrow não instalado")
+    def test_parquet_com_projecao_e_exportacao_csv(self):
+        caminho_fisico = salvar_tabela(self.df, self.caminho, esquema=ESQUEMA_OPORTUNIDADES,
+                                       formato="parquet", exportar_csv=True)
+        self.assertTrue(caminho_fisico.endswith(".parquet"))
+        self.assertTrue(os.path.exists(caminho_fisico))
+        self.assertTrue(os.path.exists(self.caminho))
+
+        df = carregar_tabela(self.caminho, colunas=["nicho", "cidade", "score_oportunidade", "classificacao"],
+                             esquema=ESQUEMA_OPORTUNIDADES, formato="parquet")
+        self.assertEqual(list(df.columns), ["nicho", "cidade", "score_oportunidade", "classificacao"])
+        self.assertNotIn("empresas", df.columns)
+        self.assertEqual(df["classificacao"].tolist(), ["Alta", "Baixa"])
+
+    @unittest.skipUnless(PYARROW_DISPONIVEL, "pyarrow não instalado")
+    def test_parquet_le_csv_existente_como_alternativa(self):
+        salvar_tabela(self.df, self.caminho, formato="csv")
+        df = carregar_tabela(self.caminho, esquema=ESQUEMA_OPORTUNIDADES, formato="parquet")
+        self.assertEqual(len(df), 2)
+        self.assertEqual(str(df["empresas"].dtype), "Int64")
+
+    def test_carregar_em_partes(self):
+        for formato in ("csv", "parquet") if PYARROW_DISPONIVEL else ("csv",):
+            salvar_tabela(self.df, self.caminho, esquema=ESQUEMA_OPORTUNIDADES, formato=formato)
+            partes = list(carregar_tabela_em_partes(self.caminho, 1, colunas=["nicho", "empresas"],
+                                                    esquema=ESQUEMA_OPORTUNIDADES, formato=formato))
+            self.assertEqual([len(parte) for parte in partes], [1, 1])
+            self.assertEqual(list(partes[0].columns), ["nicho", "empresas"])
+            self.assertEqual(str(partes[1]["empresas"].dtype), "Int64")
+            self.assertEqual(pd.concat(partes)["nicho"].astype(str).tolist(), ["NichoX", "NichoY"])
+        with self.assertRaises(FileNotFoundError):
+            next(carregar_tabela_em_partes(os.path.join(self.base_path, "inexistente.csv"), 1, formato="csv"))
+
+
+if __name__ == '__main__':
+    unittest.main()
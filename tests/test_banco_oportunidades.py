@@ -0,0 +1,96 @@
+import unittest
+import pandas as pd
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from banco_oportunidades import (
+    abrir_banco, caminho_sqlite, contar_oportunidades, exportar_visao, garantir_visao, oportunidades_por_nicho,
+    registrar_execucao, top_oportunidades, upsert_oportunidades, visao_em_dia,
+)
+
+
+class TestBancoOportunidades(unittest.TestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.base_path, "data", "oportunidades.db.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def oportunidades(self, linhas):
+        return pd.DataFrame(linhas, columns=["cidade", "nicho", "empresas", "score_oportunidade", "classificacao"])
+
+    def test_upsert_atualiza_por_cidade_e_nicho(self):
+        with closing(abrir_banco(self.db_file)) as conn:
+            upsert_oportunidades(conn, self.oportunidades([
+                ("CidadeA", "NichoX", 3, 0.7, "Alta"),
+                ("CidadeB", "NichoX", 5, 0.5, "Média"),
+            ]))
+            upsert_oportunidades(conn, self.oportunidades([
+                ("CidadeA", "NichoX", 4, 0.3, "Baixa"),
+                ("CidadeA", "NichoY", 1, 0.9, "Alta"),
+            ]))
+            self.assertEqual(contar_oportunidades(conn), 3)
+
+            por_nicho = oportunidades_por_nicho(conn, "NichoX")
+            self.assertEqual(por_nicho["cidade"].tolist(), ["CidadeB", "CidadeA"])
+            self.assertEqual(por_nicho[por_nicho["cidade"] == "CidadeA"]["empresas"].iloc[0], 4)
+
+            top = top_oportunidades(conn, n=2)
+            self.assertEqual(top["nicho"].tolist(), ["NichoY", "NichoX"])
+            self.assertEqual(len(top_oportunidades(conn, n=10, classificacao="Alta")), 1)
+
+            historico = conn.execute("SELECT COUNT(*) FROM historico_oportunidades").fetchone()[0]
+            self.assertEqual(historico, 4)
+
+    def test_historico_append_only(self):
+        with closing(abrir_banco(self.db_file)) as conn:
+            upsert_oportunidades(conn, self.oportunidades([("CidadeA", "NichoX", 3, 0.7, "Alta")]))
+            registrar_execucao(conn, "teste", ["CidadeA"], ["NichoX"], 1)
+            with self.assertRaises(sqlite3.IntegrityError):
+                with conn:
+                    conn.execute("DELETE FROM historico_oportunidades")
+            with self.assertRaises(sqlite3.IntegrityError):
+                with conn:
+                    conn.execute("UPDATE historico_execucoes SET novas_entradas = 0")
+
+    def test_importa_csv_legado_e_exporta_visao(self):
+        os.makedirs(os.path.dirname(self.db_file))
+        self.oportunidades([
+            ("CidadeA", "NichoX", 3, 0.4, "Média"),
+            ("CidadeB", "NichoY", 2, 0.8, "Alta"),
+        ]).to_csv(self.db_file, index=False, encoding="utf-8-sig")
+
+        with closing(abrir_banco(self.db_file)) as conn:
+            self.assertEqual(contar_oportunidades(conn), 2)
+            exportar_visao(conn, self.db_file)
+
+        self.assertTrue(os.path.exists(caminho_sqlite(self.db_file)))
+        visao = pd.read_csv(self.db_file)
+        self.assertEqual(visao["nicho"].tolist(), ["NichoY", "NichoX"]) # Ordenada por score
+
+    def test_visao_regenerada_so_quando_desatualizada(self):
+        self.assertIsNone(garantir_visao(self.db_file)) # Sem SQLite, nada a exportar
+        with closing(abrir_banco(self.db_file)) as conn:
+            upsert_oportunidades(conn, self.oportunidades([("CidadeA", "NichoX", 3, 0.7, "Alta")]))
+            self.assertFalse(os.path.exists(self.db_file)) # O upsert não regrava a visão
+            self.assertFalse(visao_em_dia(conn, self.db_file))
+
+        self.assertIsNotNone(garantir_visao(self.db_file))
+        self.assertIsNone(garantir_visao(self.db_file))
+        with closing(abrir_banco(self.db_file)) as conn:
+            upsert_oportunidades(conn, self.oportunidades([("CidadeB", "NichoX", 5, 0.5, "Média")]))
+        self.assertEqual(len(pd.read_csv(self.db_file)), 1)
+        self.assertIsNotNone(garantir_visao(self.db_file))
+        self.assertEqual(len(pd.read_csv(self.db_file)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
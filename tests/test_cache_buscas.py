@@ -0,0 +1,71 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache_buscas import CacheBuscas
+
+
+class TestCacheBuscas(unittest.TestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.base_path, "cache.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def test_acerto_e_falha(self):
+        with CacheBuscas(self.caminho, ttl_horas=1) as cache:
+            self.assertIsNone(cache.obter("google_local", "NichoX", "CidadeA", 0))
+            cache.salvar("google_local", "NichoX", "CidadeA", 0, {"local_results": [{"title": "Empresa1"}]})
+            self.assertEqual(cache.obter("google_local", "NichoX", "CidadeA", 0), {"local_results": [{"title": "Empresa1"}]})
+            self.assertIsNone(cache.obter("google_local", "NichoX", "CidadeA", 1)) # Outra página
+            self.assertEqual((cache.acertos, cache.falhas), (1, 2))
+
+        # Persistente entre instâncias
+        with CacheBuscas(self.caminho, ttl_horas=1) as cache:
+            self.assertIsNotNone(cache.obter("google_local", "NichoX", "CidadeA", 0))
+
+    def test_expira_pelo_ttl(self):
+        with CacheBuscas(self.caminho, ttl_horas=1) as cache:
+            with patch("cache_buscas.time.time", return_value=1_000_000):
+                cache.salvar("playwright", "NichoX", "CidadeA", 0, [1, 2])
+            with patch("cache_buscas.time.time", return_value=1_000_000 + 3599):
+                self.assertEqual(cache.obter("playwright", "NichoX", "CidadeA", 0), [1, 2])
+            with patch("cache_buscas.time.time", return_value=1_000_000 + 3601):
+                self.assertIsNone(cache.obter("playwright", "NichoX", "CidadeA", 0))
+
+    def test_refresh_ignora_leitura_mas_atualiza(self):
+        with CacheBuscas(self.caminho) as cache:
+            cache.salvar("playwright", "NichoX", "CidadeA", 0, ["antigo"])
+        with CacheBuscas(self.caminho, refresh=True) as cache:
+            self.assertIsNone(cache.obter("playwright", "NichoX", "CidadeA", 0))
+            cache.salvar("playwright", "NichoX", "CidadeA", 0, ["novo"])
+        with CacheBuscas(self.caminho) as cache:
+            self.assertEqual(cache.obter("playwright", "NichoX", "CidadeA", 0), ["novo"])
+
+    def test_despejo_lru_por_tamanho(self):
+        valor = "x" * 400
+        with CacheBuscas(self.caminho, max_mb=1000 / (1024 * 1024)) as cache:
+            with patch("cache_buscas.time.time", return_value=100):
+                cache.salvar("playwright", "N1", "C", 0, valor)
+            with patch("cache_buscas.time.time", return_value=200):
+                cache.salvar("playwright", "N2", "C", 0, valor)
+            with patch("cache_buscas.time.time", return_value=300):
+                cache.obter("playwright", "N1", "C", 0) # N1 passa a ser o mais recente
+            with patch("cache_buscas.time.time", return_value=400):
+                cache.salvar("playwright", "N3", "C", 0, valor)
+
+            with patch("cache_buscas.time.time", return_value=500):
+                self.assertIsNotNone(cache.obter("playwright", "N1", "C", 0))
+                self.assertIsNone(cache.obter("playwright", "N2", "C", 0))
+                self.assertIsNotNone(cache.obter("playwright", "N3", "C", 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
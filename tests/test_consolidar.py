@@ -7,7 +7,7 @@ from unittest.mock import patch, mock_open
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from consolidar import consolidar_dados_empresas_googlemaps, organizar_oportunidades_db, criar_nichos_especificos, limpar_arquivos_antigos, registrar_log_consolidacao
+from consolidar import _faixas_do_arquivo, consolidar_dados_empresas_googlemaps, consolidar_em_streaming, organizar_oportunidades_db, criar_nichos_especificos, limpar_arquivos_antigos, registrar_log_consolidacao
 
 class TestConsolidar(unittest.TestCase):
 
@@ -40,11 +40,105 @@ class TestConsolidar(unittest.TestCase):
             f.write(content)
 
     def test_consolidar_dados_empresas_googlemaps(self):
-        df_master = consolidar_dados_empresas_googlemaps(self.results_path, self.consolidated_path)
-        self.assertIsInstance(df_master, pd.DataFrame)
-        self.assertFalse(df_master.empty)
-        self.assertEqual(len(df_master), 3) # 4 registros, 1 duplicata
-        self.assertTrue(os.path.exists(os.path.join(self.consolidated_path, "dados_empresas_googlemaps_master.csv")))
+        master_path = consolidar_dados_empresas_googlemaps(self.results_path, self.consolidated_path)
+        self.assertEqual(master_path, os.path.join(self.consolidated_path, "dados_empresas_googlemaps_master.csv"))
+        self.assertEqual(len(pd.read_csv(master_path)), 3) # 4 registros, 1 duplicata
+
+    def test_consolidar_sem_arquivos(self):
+        for f in os.listdir(self.csv_path):
+            os.remove(os.path.join(self.csv_path, f))
+        self.assertIsNone(consolidar_dados_empresas_googlemaps(self.results_path, self.consolidated_path))
+
+    def test_consolidar_em_streaming_relatorio_por_arquivo(self):
+        arquivos = [os.path.join(self.csv_path, f"dados_empresas_googlemaps_sub_{i}.csv") for i in (1, 2)]
+        output_path = os.path.join(self.consolidated_path, "master_streaming.csv")
+        # chunksize=1 força a deduplicação entre partes do mesmo arquivo e entre arquivos
+        estatisticas = consolidar_em_streaming(arquivos, output_path, chunksize=1)
+
+        self.assertEqual(estatisticas[0], {"arquivo": "dados_empresas_googlemaps_sub_1.csv", "linhas_lidas": 2, "linhas_adicionadas": 2, "duplicatas_removidas": 0, "duplicatas_aproximadas": 0})
+        self.assertEqual(estatisticas[1], {"arquivo": "dados_empresas_googlemaps_sub_2.csv", "linhas_lidas": 2, "linhas_adicionadas": 1, "duplicatas_removidas": 1, "duplicatas_aproximadas": 0})
+        df_master = pd.read_csv(output_path)
+        self.assertEqual(df_master["nome"].tolist(), ["Empresa1", "Empresa2", "Empresa3"])
+
+        # Leitura paralela: mesmo resultado e mesmas estatísticas
+        estatisticas_paralelas = consolidar_em_streaming(arquivos, output_path, workers=2)
+        self.assertEqual(estatisticas_paralelas, estatisticas)
+        self.assertEqual(pd.read_csv(output_path)["nome"].tolist(), ["Empresa1", "Empresa2", "Empresa3"])
+
+    def test_mesmo_place_id_em_duas_cidades(self):
+        # O id_empresa vindo do place_id não depende da cidade; cada cidade mantém a sua linha
+        self.create_test_csv("dados_empresas_googlemaps_sub_3.csv", "cidade,nicho,nome,place_id\n"
+                             "Niterói,NichoX,Rede1,ChIJ1\nSão Gonçalo,NichoX,Rede1,ChIJ1\nNiterói,NichoX,Rede1 Centro,ChIJ1")
+        output_path = os.path.join(self.consolidated_path, "master_place_id.csv")
+        estatisticas = consolidar_em_streaming([os.path.join(self.csv_path, "dados_empresas_googlemaps_sub_3.csv")], output_path)
+
+        self.assertEqual(estatisticas[0]["duplicatas_removidas"], 1)
+        df_master = pd.read_csv(output_path)
+        self.assertEqual(df_master["cidade"].tolist(), ["Niterói", "São Gonçalo"])
+        self.assertEqual(df_master["id_empresa"].nunique(), 1)
+
+    def test_deduplicacao_aproximada_por_particao(self):
+        self.create_test_csv("dados_empresas_googlemaps_sub_3.csv", "cidade,nicho,nome,telefone\n"
+                             "Niterói,Padaria,Padaria São João Ltda,(21) 99999-1234\nNiterói,Bar,Bar do Zé,\n"
+                             "Maricá,Padaria,Padaria São João,(21) 99999-1234\n")
+        self.create_test_csv("dados_empresas_googlemaps_sub_4.csv", "cidade,nicho,nome,Telefone\n"
+                             "niteroi,Padaria,PADARIA SAO JOAO,21 99999-1234\nNiterói,Padaria,Padaria São João Ltda,(21) 99999-1234\n"
+                             "Niterói,Bar,Bar do Ze,\n")
+        arquivos = [os.path.join(self.csv_path, f"dados_empresas_googlemaps_sub_{i}.csv") for i in (3, 4)]
+        output_path = os.path.join(self.consolidated_path, "master_aproximado.csv")
+
+        # Uma partição equivale a deduplicar o master inteiro; com várias, o resultado é o mesmo
+        resultados = []
+        for particoes in (1, 64):
+            estatisticas = consolidar_em_streaming(arquivos, output_path, aproximada=True, particoes=particoes)
+            df_master = pd.read_csv(output_path)
+            resultados.append(sorted(zip(df_master["cidade"], df_master["nome"])))
+            self.assertEqual([(e["linhas_adicionadas"], e["duplicatas_removidas"], e["duplicatas_aproximadas"]) for e in estatisticas],
+                             [(3, 0, 0), (0, 3, 1)]) # "Bar do Ze" e a 2ª Padaria já caem na exata (mesmo id)
+        self.assertEqual(resultados[0], resultados[1])
+        # A Padaria de Maricá é outra cidade: não se une à de Niterói
+        self.assertEqual(resultados[0], [("Maricá", "Padaria São João"), ("Niterói", "Bar do Zé"), ("Niterói", "Padaria São João Ltda")])
+        self.assertFalse([f for f in os.listdir(self.consolidated_path) if f.startswith(".particoes_")]) # Partições temporárias removidas
+
+    def test_faixas_respeitam_campos_entre_aspas(self):
+        self.create_test_csv("dados_empresas_googlemaps_sub_3.csv", 'cidade,nicho,nome,descricao\n'
+                             'CidadeA,NichoX,Empresa4,"linha 1\nlinha 2 ""citada"""\nCidadeA,NichoX,Empresa5,ok\n'
+                             'CidadeB,NichoX,Empresa6,"fim\n"\n')
+        caminho = os.path.join(self.csv_path, "dados_empresas_googlemaps_sub_3.csv")
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+        for bloco in (3, 2**20): # Blocos de leitura pequenos: quebras e aspas na divisa entre blocos
+            with patch("consolidar._BLOCO_LEITURA", bloco):
+                _, faixas = _faixas_do_arquivo(caminho, 1)
+            self.assertEqual([conteudo[inicio:fim].count(b"Empresa") for inicio, fim in faixas], [1, 1, 1])
+
+        output_path = os.path.join(self.consolidated_path, "master_faixas.csv")
+        consolidar_em_streaming([caminho], output_path, tamanho_faixa=1, workers=2)
+        df_master = pd.read_csv(output_path)
+        self.assertEqual(df_master["nome"].tolist(), ["Empresa4", "Empresa5", "Empresa6"])
+        self.assertEqual(df_master["descricao"].tolist(), ['linha 1\nlinha 2 "citada"', "ok", "fim\n"])
+
+    def test_leitura_paralela_nos_workers(self):
+        # Com mais de um worker, o pai só divide os arquivos em faixas: nenhum CSV é interpretado nele
+        arquivos = [os.path.join(self.csv_path, f"dados_empresas_googlemaps_sub_{i}.csv") for i in (1, 2)]
+        output_path = os.path.join(self.consolidated_path, "master_paralelo.csv")
+        leituras = []
+        read_csv = pd.read_csv
+        pai = os.getpid()
+
+        def read_csv_registrando(caminho, **opcoes):
+            if "nrows" not in opcoes and os.getpid() == pai: # Ignora a leitura só do cabeçalho
+                leituras.append(opcoes.get("chunksize"))
+            return read_csv(caminho, **opcoes)
+
+        with patch("consolidar.pd.read_csv", side_effect=read_csv_registrando):
+            estatisticas = consolidar_em_streaming(arquivos, output_path, chunksize=1, workers=2, tamanho_faixa=1)
+            self.assertEqual(leituras, [])
+            consolidar_em_streaming(arquivos, output_path, chunksize=1, workers=1, tamanho_faixa=1)
+            self.assertEqual(leituras, [1] * 4) # Serial: uma leitura por faixa (um registro cada), com chunksize
+
+        self.assertEqual([e["linhas_adicionadas"] for e in estatisticas], [2, 1])
+        self.assertEqual(pd.read_csv(output_path)["nome"].tolist(), ["Empresa1", "Empresa2", "Empresa3"])
 
     def test_organizar_oportunidades_db(self):
         df_oportunidades_sorted, df_melhores_oportunidades = organizar_oportunidades_db(self.data_path)
@@ -55,10 +149,17 @@ class TestConsolidar(unittest.TestCase):
         self.assertTrue(os.path.exists(os.path.join(self.data_path, "melhores_oportunidades.db.csv")))
 
     def test_criar_nichos_especificos(self):
-        df_oportunidades = pd.DataFrame({"cidade": ["CidadeA"], "nicho": ["NichoX"], "score_oportunidade": [0.7]})
-        df_empresas_master = pd.DataFrame({"cidade": ["CidadeA"], "nicho": ["NichoX"], "nome": ["Empresa1"]})
-        criar_nichos_especificos(df_oportunidades, df_empresas_master, self.consolidated_path)
-        self.assertTrue(os.path.exists(os.path.join(self.especificos_path, "NichoX_empresas_googlemaps.csv")))
+        df_oportunidades = pd.DataFrame({"cidade": ["CidadeA", "CidadeA", "CidadeA"], "nicho": ["NichoX", "NichoY", "NichoZ"],
+                                         "score_oportunidade": [0.7, 0.3, 0.9]})
+        master_path = os.path.join(self.consolidated_path, "master.csv")
+        pd.DataFrame({"cidade": ["CidadeA", "CidadeB", "CidadeA"], "nicho": ["NichoX", "NichoY", "NichoX"],
+                      "nome": ["Empresa1", "Empresa2", "Empresa3"]}).to_csv(master_path, index=False)
+        # chunksize=1: cada parte do master acrescenta as suas linhas ao arquivo do nicho
+        criar_nichos_especificos(df_oportunidades, master_path, self.consolidated_path, chunksize=1)
+        df_nicho = pd.read_csv(os.path.join(self.especificos_path, "NichoX_empresas_googlemaps.csv"))
+        self.assertEqual(df_nicho["nome"].tolist(), ["Empresa1", "Empresa3"])
+        self.assertFalse(os.path.exists(os.path.join(self.especificos_path, "NichoY_empresas_googlemaps.csv"))) # Score baixo
+        self.assertTrue(pd.read_csv(os.path.join(self.especificos_path, "NichoZ_empresas_googlemaps.csv")).empty)
 
     def test_limpar_arquivos_antigos(self):
         # Criar arquivos para serem limpos (correspondendo ao padrão de busca da função)
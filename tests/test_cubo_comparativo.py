@@ -0,0 +1,132 @@
+import unittest
+import numpy as np
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import closing
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from armazenamento import ESQUEMA_OPORTUNIDADES, salvar_tabela
+from banco_oportunidades import abrir_banco, upsert_oportunidades
+from cubo_comparativo import CuboComparativo, atualizar_cubo, caminho_cubo, carregar_cubo
+from relatorio_comparativo_multicitadino import gerar_relatorio_comparativo
+
+
+class TestCuboComparativo(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.df = pd.DataFrame({
+            "cidade": ["Niterói", "Maricá", "Niterói", "Maricá", "Itaboraí"],
+            "nicho": ["Pizzaria", "Pizzaria", "Padaria", "Padaria", "Pizzaria"],
+            "score_oportunidade": [0.8, 0.6, 0.5, 0.3, 0.7],
+            "classificacao": ["Alta", "Média", "Média", "Baixa", "Alta"],
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def _referencia(self, df):
+        # Cálculo original, com groupby sobre o banco inteiro
+        relatorio = df.groupby("nicho").agg(
+            media=("score_oportunidade", "mean"),
+            desvio=("score_oportunidade", "std"),
+            alta=("classificacao", lambda x: (x == "Alta").sum()),
+            cidades=("cidade", "nunique"),
+        )
+        relatorio["desvio"] = relatorio["desvio"].fillna(0)
+        relatorio["replicabilidade"] = relatorio["alta"] / relatorio["cidades"] * 100
+        return relatorio
+
+    def test_relatorio_igual_ao_groupby(self):
+        relatorio = CuboComparativo.de_dataframe(self.df).relatorio().set_index("Nicho")
+        referencia = self._referencia(self.df)
+        for nicho in referencia.index:
+            self.assertAlmostEqual(relatorio.loc[nicho, "Média do score"], round(referencia.loc[nicho, "media"], 2))
+            self.assertAlmostEqual(relatorio.loc[nicho, "Desvio padrão"], round(referencia.loc[nicho, "desvio"], 2))
+            self.assertAlmostEqual(relatorio.loc[nicho, "Replicabilidade (%)"], round(referencia.loc[nicho, "replicabilidade"], 2))
+            self.assertEqual(relatorio.loc[nicho, "Nº de cidades analisadas"], referencia.loc[nicho, "cidades"])
+        self.assertEqual(relatorio.index[0], "Pizzaria")
+
+    def test_upsert_atualiza_agregados(self):
+        cubo = CuboComparativo(capacidade_nichos=1, capacidade_cidades=1)
+        cubo.upsert_dataframe(self.df)
+        cubo.upsert("Maricá", "Padaria", 0.9, "Alta") # Substitui o par existente
+        cubo.upsert("São Gonçalo", "Padaria", 0.6, "Média") # Par novo
+
+        df_esperado = pd.concat([self.df.iloc[[0, 1, 2, 4]], pd.DataFrame({
+            "cidade": ["Maricá", "São Gonçalo"], "nicho": ["Padaria", "Padaria"],
+            "score_oportunidade": [0.9, 0.6], "classificacao": ["Alta", "Média"],
+        })])
+        referencia = self._referencia(df_esperado).loc["Padaria"]
+        metricas = cubo.metricas_nicho("Padaria")
+        self.assertEqual(metricas["num_cidades"], 3)
+        self.assertAlmostEqual(metricas["media"], referencia["media"], places=6)
+        self.assertAlmostEqual(metricas["desvio_padrao"], referencia["desvio"], places=6)
+        self.assertAlmostEqual(metricas["replicabilidade_pct"], referencia["replicabilidade"], places=6)
+
+    def test_matriz_igual_ao_pivot(self):
+        matriz = CuboComparativo.de_dataframe(self.df).matriz()
+        pivot = self.df.pivot_table(index="nicho", columns="cidade", values="score_oportunidade", aggfunc="mean")
+        self.assertEqual(matriz.dtypes.iloc[0], np.float32)
+        np.testing.assert_allclose(matriz.to_numpy(), pivot.to_numpy(), rtol=1e-6)
+        self.assertEqual(list(matriz.index), list(pivot.index))
+        self.assertEqual(list(matriz.columns), list(pivot.columns))
+
+    def test_salvar_e_carregar(self):
+        caminho = os.path.join(self.diretorio, "cubo.npz")
+        cubo = CuboComparativo.de_dataframe(self.df)
+        cubo.salvar(caminho)
+        carregado = CuboComparativo.carregar(caminho)
+        pd.testing.assert_frame_equal(carregado.relatorio(), cubo.relatorio())
+        carregado.upsert("Niterói", "Sorveteria", 0.4, "Baixa")
+        self.assertEqual(len(carregado), len(self.df) + 1)
+
+    def test_carregar_cubo_reconstroi_a_partir_da_visao(self):
+        db_file = os.path.join(self.diretorio, "oportunidades.db.csv")
+        self.assertEqual(len(carregar_cubo(db_file)), 0)
+        salvar_tabela(self.df, db_file, esquema=ESQUEMA_OPORTUNIDADES, formato="csv")
+        cubo = carregar_cubo(db_file)
+        self.assertEqual(len(cubo), len(self.df))
+        self.assertTrue(os.path.exists(caminho_cubo(db_file)))
+
+    def test_carregar_cubo_detecta_upsert_sem_visao(self):
+        db_file = os.path.join(self.diretorio, "oportunidades.db.csv")
+        with closing(abrir_banco(db_file)) as conn:
+            upsert_oportunidades(conn, self.df)
+        self.assertEqual(len(carregar_cubo(db_file)), len(self.df))
+        # Upsert feito direto no SQLite, sem exportar a visão nem atualizar o cubo
+        with closing(abrir_banco(db_file)) as conn:
+            upsert_oportunidades(conn, pd.DataFrame({
+                "cidade": ["São Gonçalo"], "nicho": ["Padaria"], "score_oportunidade": [0.9], "classificacao": ["Alta"],
+            }))
+        cubo = carregar_cubo(db_file)
+        self.assertEqual(len(cubo), len(self.df) + 1)
+        self.assertEqual(cubo.metricas_nicho("Padaria")["num_cidades"], 3)
+
+    def test_atualizar_cubo_mantem_versao(self):
+        db_file = os.path.join(self.diretorio, "oportunidades.db.csv")
+        with closing(abrir_banco(db_file)) as conn:
+            upsert_oportunidades(conn, self.df)
+        cubo = carregar_cubo(db_file)
+        df_novo = pd.DataFrame({"cidade": ["Niterói"], "nicho": ["Sorveteria"], "score_oportunidade": [0.4], "classificacao": ["Baixa"]})
+        with closing(abrir_banco(db_file)) as conn:
+            upsert_oportunidades(conn, df_novo)
+        atualizar_cubo(db_file, df_novo, cubo)
+        with patch("cubo_comparativo.carregar_tabela") as carregar_tabela:
+            self.assertEqual(len(carregar_cubo(db_file)), len(self.df) + 1)
+        carregar_tabela.assert_not_called() # Cubo em dia: nem a visão é regenerada nem o cubo reconstruído
+
+    def test_gerar_relatorio_comparativo_aceita_dataframe_ou_cubo(self):
+        a = gerar_relatorio_comparativo(self.df)
+        b = gerar_relatorio_comparativo(CuboComparativo.de_dataframe(self.df))
+        pd.testing.assert_frame_equal(a, b)
+        self.assertTrue(gerar_relatorio_comparativo(pd.DataFrame()).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
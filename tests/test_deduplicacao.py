@@ -0,0 +1,63 @@
+import unittest
+import pandas as pd
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import deduplicacao
+from deduplicacao import (
+    agrupar_duplicatas, chave_fonetica, deduplicar_empresas, normalizar_endereco, normalizar_nome, normalizar_telefone,
+)
+
+
+class TestDeduplicacao(unittest.TestCase):
+
+    def test_normalizacao(self):
+        self.assertEqual(normalizar_nome("Padaria São João Ltda."), "padaria sao joao")
+        self.assertEqual(normalizar_telefone("+55 (21) 99999-1234"), "99991234")
+        self.assertEqual(normalizar_telefone(21999991234.0), "99991234")
+        self.assertEqual(normalizar_telefone("N/A"), "")
+        self.assertEqual(normalizar_endereco("R. Gavião Peixoto, nº 10 - Icaraí, Niterói - RJ"), "rua gaviao peixoto 10")
+        self.assertEqual(chave_fonetica("chaveiro"), chave_fonetica("xaveiro"))
+
+    def test_une_grafias_entre_fontes(self):
+        # Colunas da SerpAPI (endereco/telefone) e do Playwright (Endereço/Telefone) no mesmo arquivo
+        df = pd.DataFrame({
+            "cidade": ["Niterói", "niteroi", "Niterói", "Niterói", "Rio de Janeiro"],
+            "nicho": ["Padaria"] * 5,
+            "nome": ["Padaria São João Ltda", "PADARIA SAO JOAO", "Padaria Sao Joao", "Pães São João", "Padaria São João"],
+            "endereco": ["R. A, 10 - Centro", None, "Rua B, 99", None, "Rua A, 10"],
+            "Telefone": ["(21) 99999-1234", None, None, "21 99999-1234", None],
+        })
+        # 1 sem endereço se junta ao 0; 2 tem outro endereço (filial); 3 confirma pelo telefone; 4 é outra cidade
+        self.assertEqual(agrupar_duplicatas(df).tolist(), [0, 0, 2, 0, 4])
+        self.assertEqual(deduplicar_empresas(df)["nome"].tolist(), ["Padaria São João Ltda", "Padaria Sao Joao", "Padaria São João"])
+
+    def test_numeros_diferentes_e_nichos_diferentes_nao_unem(self):
+        df = pd.DataFrame({
+            "cidade": ["A", "A", "A"], "nicho": ["X", "X", "Y"], "nome": ["Loja 1", "Loja 2", "Loja 1"],
+        })
+        self.assertEqual(agrupar_duplicatas(df, por=["nicho"]).tolist(), [0, 1, 2])
+        self.assertEqual(agrupar_duplicatas(df).tolist(), [0, 1, 0])
+
+    def test_bloco_grande_usa_vizinhanca_ordenada(self):
+        n = 300
+        df = pd.DataFrame({"cidade": ["A"] * n, "nome": [f"Empresa Qualquer {i}" for i in range(n)]})
+        chamadas = []
+        original = deduplicacao.mesma_empresa
+
+        def contar(a, b):
+            chamadas.append(1)
+            return original(a, b)
+
+        with patch.object(deduplicacao, "mesma_empresa", contar), patch.object(deduplicacao, "TAMANHO_MAXIMO_BLOCO", 50):
+            representantes = agrupar_duplicatas(df)
+        self.assertEqual(representantes.tolist(), list(range(n)))
+        # Dois blocos (um por termo do nome) com janela fixa, bem abaixo de n²/2 comparações
+        self.assertLessEqual(len(chamadas), 2 * n * deduplicacao.JANELA_BLOCO_GRANDE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from diario_execucao import CONCLUIDO, EM_ANDAMENTO, FALHOU, PENDENTE, DiarioExecucao
+
+
+class TestDiarioExecucao(unittest.TestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.base_path, "data", "diario.sqlite")
+        self.pares = [("NichoX", "CidadeA"), ("NichoY", "CidadeA"), ("NichoX", "CidadeB")]
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def test_resume_pula_pares_concluidos(self):
+        with DiarioExecucao("serpapi", caminho=self.caminho) as diario:
+            self.assertEqual(diario.preparar(self.pares), self.pares)
+            diario.marcar_em_andamento("NichoX", "CidadeA")
+            diario.marcar_concluido("NichoX", "CidadeA", 12)
+            diario.marcar_em_andamento("NichoY", "CidadeA")
+            diario.marcar_falha("NichoY", "CidadeA", "nenhuma empresa encontrada")
+            diario.marcar_em_andamento("NichoX", "CidadeB") # Interrompido (Ctrl-C)
+            self.assertEqual(diario.contagem_por_estado(), {CONCLUIDO: 1, FALHOU: 1, EM_ANDAMENTO: 1})
+
+        # Retomada: só o concluído é pulado; falhos e interrompidos são refeitos
+        with DiarioExecucao("serpapi", caminho=self.caminho) as diario:
+            self.assertEqual(diario.preparar(self.pares, retomar=True), [("NichoY", "CidadeA"), ("NichoX", "CidadeB")])
+            linhas, tentativas = diario.conn.execute(
+                "SELECT linhas, tentativas FROM tarefas WHERE nicho = 'NichoX' AND cidade = 'CidadeA'"
+            ).fetchone()
+            self.assertEqual((linhas, tentativas), (12, 1))
+
+        # Outro scraper/modo tem seu próprio diário; execução nova reinicia tudo como pendente
+        with DiarioExecucao("playwright", caminho=self.caminho) as diario:
+            self.assertEqual(diario.preparar(self.pares, retomar=True), self.pares)
+        with DiarioExecucao("serpapi", caminho=self.caminho) as diario:
+            self.assertEqual(diario.preparar(self.pares), self.pares)
+            self.assertEqual(diario.contagem_por_estado(), {PENDENTE: 3})
+
+    def test_diario_antigo_ganha_posicao_saida(self):
+        os.makedirs(os.path.dirname(self.caminho))
+        with sqlite3.connect(self.caminho) as conn:
+            conn.execute(
+                "CREATE TABLE tarefas (scraper TEXT NOT NULL, modo TEXT NOT NULL, nicho TEXT NOT NULL, cidade TEXT NOT NULL, "
+                "estado TEXT NOT NULL, linhas INTEGER NOT NULL DEFAULT 0, tentativas INTEGER NOT NULL DEFAULT 0, erro TEXT, "
+                "atualizado_em REAL NOT NULL, PRIMARY KEY (scraper, modo, nicho, cidade))"
+            )
+        conn.close()
+        with DiarioExecucao("serpapi", caminho=self.caminho) as diario:
+            diario.preparar(self.pares)
+            diario.marcar_em_andamento("NichoX", "CidadeA")
+            diario.registrar_posicao_saida("NichoX", "CidadeA", 128)
+            self.assertEqual(diario.posicao_saida_interrompida(), 128)
+            diario.marcar_concluido("NichoX", "CidadeA", 3)
+            self.assertIsNone(diario.posicao_saida_interrompida())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from esperas import MonitorRede, aguardar_evento
+
+
+class PaginaFalsa:
+    """Imita a API de eventos e wait_for_function de uma página do Playwright."""
+
+    def __init__(self, lista_muda_em: float | None):
+        self.lista_muda_em = lista_muda_em
+        self.handlers = {}
+
+    def on(self, evento, handler):
+        self.handlers[evento] = handler
+
+    async def wait_for_function(self, expressao, arg=None, polling=None, timeout=None):
+        if self.lista_muda_em is None:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError("timeout")
+        await asyncio.sleep(self.lista_muda_em)
+        return True
+
+
+class TestEsperas(unittest.IsolatedAsyncioTestCase):
+
+    async def test_termina_quando_a_lista_muda(self):
+        page = PaginaFalsa(lista_muda_em=0.05)
+        inicio = time.monotonic()
+        motivo = await aguardar_evento(page, total_anterior=10, espera_maxima_ms=2000, cortesia_ms=(0, 0))
+        self.assertEqual(motivo, "lista")
+        self.assertLess(time.monotonic() - inicio, 0.5)
+
+    async def test_piso_de_cortesia(self):
+        page = PaginaFalsa(lista_muda_em=0.01)
+        inicio = time.monotonic()
+        await aguardar_evento(page, total_anterior=10, espera_maxima_ms=2000, cortesia_ms=(200, 200))
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.19)
+
+    async def test_limite_superior(self):
+        page = PaginaFalsa(lista_muda_em=None)
+        monitor = MonitorRede(page, ociosa_ms=50)
+        page.handlers["request"](None) # Requisição que nunca termina
+        inicio = time.monotonic()
+        motivo = await aguardar_evento(page, monitor, total_anterior=10, espera_maxima_ms=150, cortesia_ms=(0, 0))
+        self.assertEqual(motivo, "limite")
+        self.assertLess(time.monotonic() - inicio, 0.5)
+
+    async def test_rede_ociosa(self):
+        page = PaginaFalsa(lista_muda_em=None)
+        monitor = MonitorRede(page, ociosa_ms=50)
+        page.handlers["request"](None)
+
+        async def terminar_requisicao():
+            await asyncio.sleep(0.05)
+            page.handlers["requestfinished"](None)
+
+        asyncio.ensure_future(terminar_requisicao())
+        motivo = await aguardar_evento(page, monitor, total_anterior=10, espera_maxima_ms=2000, cortesia_ms=(0, 0))
+        self.assertEqual(motivo, "rede")
+        self.assertEqual(monitor.pendentes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import math
+import pandas as pd
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from esquema_empresas import COLUNAS_EMPRESA, Empresa, para_dataframe, tipar_empresas
+from identificadores import calcular_id_empresa
+
+
+class TestEsquemaEmpresas(unittest.TestCase):
+
+    def test_empresa_normaliza_campos(self):
+        empresa = Empresa("NichoX", "CidadeA", "Loja", endereco="N/A", telefone=" ", nota="4,5", reviews=12.0, latitude="-22.9")
+        self.assertIsNone(empresa.endereco)
+        self.assertIsNone(empresa.telefone)
+        self.assertEqual((empresa.nota, empresa.reviews), (4.5, 12))
+        self.assertIsInstance(empresa.reviews, int)
+        self.assertEqual(empresa.latitude, -22.9)
+        self.assertTrue(math.isnan(empresa.longitude))
+        self.assertEqual(empresa.id_empresa, calcular_id_empresa("Loja", None, "CidadeA", -22.9, None))
+        with self.assertRaises(AttributeError): # __slots__: sem atributos fora do esquema
+            empresa.extra = 1
+
+    def test_para_dataframe_tipado(self):
+        empresa = Empresa("NichoX", "CidadeA", "Loja", latitude=-22.9)
+        # Linha antiga do cache do Playwright, com os nomes de coluna anteriores
+        antiga = {"nicho": "NichoX", "cidade": "CidadeB", "nome": "Outra", "Endereço": "Rua A", "reviews": None, "Latitude": "N/A"}
+        df = para_dataframe([empresa, antiga])
+
+        self.assertEqual(df.columns.tolist(), COLUNAS_EMPRESA)
+        self.assertEqual(str(df["nicho"].dtype), "category")
+        self.assertEqual(str(df["cidade"].dtype), "category")
+        self.assertEqual(df["latitude"].dtype, "float32")
+        self.assertEqual(df["reviews"].dtype, "int32")
+        self.assertEqual(df["endereco"].tolist()[1], "Rua A")
+        self.assertEqual(df["reviews"].tolist(), [0, 0])
+        self.assertTrue(pd.isna(df["latitude"].iloc[1]))
+        # O id de 64 bits não pode passar por float64 (perderia precisão)
+        self.assertEqual(df["id_empresa"].iloc[0], empresa.id_empresa)
+        self.assertEqual(df["id_empresa"].iloc[1], calcular_id_empresa("Outra", "Rua A", "CidadeB"))
+
+    def test_tipar_empresas_colunas_antigas(self):
+        df = pd.DataFrame({"nome": ["A"], "Telefone": ["(21) 2222-3333"], "telefone": [None], "nota": ["x"]})
+        df = tipar_empresas(df)
+        self.assertEqual(df.columns.tolist(), ["nome", "telefone", "nota"])
+        self.assertEqual(df["telefone"].iloc[0], "(21) 2222-3333")
+        self.assertEqual(df["nota"].iloc[0], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from extracao_cartoes import extrair_cartoes, extrair_place_id, normalizar_cartao
+from identificadores import calcular_id_empresa
+
+FIXTURE_HTML = os.path.join(os.path.dirname(__file__), "fixtures", "debug_page_content.html")
+
+
+async def _extrair_da_fixture():
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            with open(FIXTURE_HTML, encoding="utf-8") as f:
+                await page.set_content(f.read())
+            total, cartoes = await extrair_cartoes(page, "Pizzaria", "CidadeA")
+            total_a_partir_do_cursor, novos = await extrair_cartoes(page, "Pizzaria", "CidadeA", inicio=2)
+            return total, cartoes, total_a_partir_do_cursor, novos
+        finally:
+            await browser.close()
+
+
+class TestExtracaoCartoes(unittest.TestCase):
+
+    def test_normalizar_cartao(self):
+        bruto = {
+            "nome": "Pizzaria Bella", "endereco": "· Rua A, 10", "rating": "4,6", "reviews": "(1.234)",
+            "telefone": None, "website": "https://www.google.com/aclk?sa=l", "tipo": "Pizzaria",
+            "link": "https://www.google.com/maps/place/X/data=!4m7!3m6!1s0x1a:0x2b!8m2!3d-22.5!4d-43.25!19sChIJabc-_1",
+        }
+        dados = normalizar_cartao(bruto, "Pizzaria", "CidadeA")
+        self.assertEqual(dados.endereco, "Rua A, 10")
+        self.assertEqual((dados.nota, dados.reviews), (4.6, 1234))
+        self.assertEqual((dados.telefone, dados.website), (None, None)) # Link de anúncio descartado
+        self.assertEqual((dados.latitude, dados.longitude), (-22.5, -43.25))
+        self.assertEqual(dados.place_id, "ChIJabc-_1")
+        self.assertEqual(dados.id_empresa, calcular_id_empresa("Outro nome", place_id="ChIJabc-_1"))
+
+    def test_extrair_place_id_usa_feature_id_na_falta_do_place_id(self):
+        self.assertEqual(extrair_place_id("https://x/data=!1s0x99:0xab!8m2"), "0x99:0xab")
+        self.assertIsNone(extrair_place_id(None))
+
+    def test_extracao_em_lote_na_fixture(self):
+        try:
+            total, cartoes, total_a_partir_do_cursor, novos = asyncio.run(_extrair_da_fixture())
+        except Exception as e: # Chromium não instalado (playwright install chromium)
+            self.skipTest(f"Chromium indisponível: {e}")
+
+        self.assertEqual([c.nome for c in cartoes], ["Pizzaria Bella Napoli", "Forno & Massa", "Pizza Express"])
+        primeiro, segundo, terceiro = cartoes
+        self.assertEqual(primeiro.endereco, "Rua das Laranjeiras, 100")
+        self.assertEqual((primeiro.tipo, primeiro.telefone), ("Pizzaria", "(21) 2222-3333"))
+        self.assertEqual((primeiro.nota, primeiro.reviews), (4.6, 1234))
+        self.assertEqual(primeiro.website, "https://bellanapoli.com.br/")
+        self.assertEqual(primeiro.place_id, "ChIJFT0cLytfmQARcWBPLh08W4o")
+        self.assertIsNone(segundo.website)
+        self.assertEqual(segundo.place_id, "0x997f7e1a2b3c4d5e:0x1f2e3d4c5b6a7988")
+        self.assertEqual((terceiro.endereco, terceiro.nota), (None, 0.0))
+
+        # Com o cursor, só os cartões a partir da posição informada são extraídos
+        self.assertEqual((total, total_a_partir_do_cursor), (3, 3))
+        self.assertEqual([c.nome for c in novos], ["Pizza Express"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from filtrar_nichos_campeoes import (
+    adicionar_nicho_limpo, arquivos_de_nichos_campeoes, gravar_nicho_campeao, nicho_campeao_do_arquivo,
+)
+
+
+class TestFiltrarNichosCampeoes(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def test_nicho_campeao_do_arquivo_prefere_prefixo_mais_longo(self):
+        campeoes = frozenset({"Pizza", "Pizza_Boa"})
+        self.assertEqual(nicho_campeao_do_arquivo("dados_empresas_Pizza_Boa_Niterói.csv", campeoes), "Pizza_Boa")
+        self.assertEqual(nicho_campeao_do_arquivo("dados_empresas_Pizza_Rio.csv", campeoes), "Pizza")
+
+    def test_nicho_campeao_do_arquivo_exige_fronteira_de_termo(self):
+        self.assertIsNone(nicho_campeao_do_arquivo("dados_empresas_Pizzaria_Rio.csv", frozenset({"Pizza"})))
+        self.assertIsNone(nicho_campeao_do_arquivo("outro_Pizza_Rio.csv", frozenset({"Pizza"})))
+
+    def test_arquivos_de_nichos_campeoes_ignora_os_demais(self):
+        for nome in ("dados_empresas_Pizza_Rio.csv", "dados_empresas_Padaria_Rio.csv"):
+            open(os.path.join(self.diretorio, nome), "w").close()
+        arquivos = list(arquivos_de_nichos_campeoes(self.diretorio, frozenset({"Pizza"})))
+        self.assertEqual([os.path.basename(a) for a in arquivos], ["dados_empresas_Pizza_Rio.csv"])
+
+    def test_adicionar_nicho_limpo_e_gravacao(self):
+        df = adicionar_nicho_limpo(pd.DataFrame({"nicho": ["Pizza Boa", "Pizza Boa"], "nome": ["A", "B"]}))
+        self.assertEqual(str(df["nicho_limpo"].dtype), "category")
+        caminho = gravar_nicho_campeao(self.diretorio, "Pizza_Boa", df)
+        self.assertEqual(os.path.basename(caminho), "Pizza_Boa.csv")
+        self.assertEqual(len(pd.read_csv(caminho)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
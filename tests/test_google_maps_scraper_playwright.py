@@ -0,0 +1,121 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import google_maps_scraper_playwright as scraper
+from perfil_navegador import PerfilNavegador
+
+PERFIL = PerfilNavegador(bloquear_recursos=False)
+
+
+class ContextoFalso:
+    def __init__(self, numero):
+        self.numero = numero
+        self.fechado = False
+
+    async def close(self):
+        self.fechado = True
+
+
+class NavegadorFalso:
+    """Imita o Browser do Playwright: registra os BrowserContexts criados."""
+
+    def __init__(self):
+        self.contextos = []
+        self.fechado = False
+
+    async def new_context(self, **opcoes):
+        contexto = ContextoFalso(len(self.contextos))
+        self.contextos.append(contexto)
+        return contexto
+
+    async def close(self):
+        self.fechado = True
+
+
+class PlaywrightFalso:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class TestPoolDeBuscas(unittest.IsolatedAsyncioTestCase):
+
+    async def executar(self, pares, workers, falhar_em=()):
+        navegador = NavegadorFalso()
+        buscas = []
+
+        async def buscar(contexto, nicho, cidade):
+            self.assertFalse(contexto.fechado)
+            buscas.append((contexto.numero, nicho, cidade))
+            await asyncio.sleep(0) # Cede a vez, como uma busca real, para os workers se intercalarem
+            if nicho in falhar_em:
+                raise RuntimeError("página quebrada")
+            return [f"{nicho}/{cidade}"]
+
+        async def abrir(playwright, perfil):
+            return navegador
+
+        concluidos = []
+        with patch.object(scraper, "async_playwright", PlaywrightFalso), \
+                patch.object(scraper, "abrir_navegador", abrir), \
+                patch.object(scraper, "buscar_google_maps_no_contexto", buscar), \
+                patch.object(scraper, "INTERVALO_ENTRE_BUSCAS", (0, 0)):
+            await scraper.executar_pool_de_buscas(
+                pares, workers, perfil=PERFIL,
+                ao_concluir=lambda nicho, cidade, dados, erro: concluidos.append((nicho, cidade, dados, erro)),
+            )
+        return navegador, buscas, concluidos
+
+    async def test_um_contexto_de_longa_duracao_por_worker(self):
+        pares = [(f"Nicho{i}", "CidadeA") for i in range(7)]
+        navegador, buscas, concluidos = await self.executar(pares, workers=3)
+
+        self.assertEqual(sorted((n, c) for n, c, _, _ in concluidos), sorted(pares)) # Cada par uma única vez
+        self.assertEqual(len(navegador.contextos), 3) # Um por worker, reaproveitado entre os pares
+        self.assertEqual({numero for numero, _, _ in buscas}, {0, 1, 2})
+        self.assertTrue(all(contexto.fechado for contexto in navegador.contextos))
+        self.assertTrue(navegador.fechado)
+
+    async def test_falha_recria_o_contexto_do_worker(self):
+        pares = [("NichoA", "CidadeA"), ("Quebra", "CidadeA"), ("NichoB", "CidadeA")]
+        navegador, buscas, concluidos = await self.executar(pares, workers=1, falhar_em=("Quebra",))
+
+        self.assertEqual([numero for numero, _, _ in buscas], [0, 0, 1])
+        erros = {nicho: erro for nicho, _, _, erro in concluidos}
+        self.assertIsInstance(erros["Quebra"], RuntimeError)
+        self.assertIsNone(erros["NichoB"])
+        self.assertTrue(all(contexto.fechado for contexto in navegador.contextos))
+
+    async def test_html_de_depuracao_por_par(self):
+        class PaginaFalsa:
+            def __init__(self, html):
+                self.html = html
+
+            async def content(self):
+                return self.html
+
+        diretorio_original = os.getcwd()
+        with tempfile.TemporaryDirectory() as diretorio:
+            os.chdir(diretorio)
+            try:
+                await asyncio.gather(
+                    scraper._salvar_html_depuracao(PaginaFalsa("a"), "Pizzaria", "Niterói"),
+                    scraper._salvar_html_depuracao(PaginaFalsa("b"), "Bar", "Niterói"),
+                )
+                self.assertEqual(sorted(os.listdir("results")), [
+                    "debug_page_content_Bar_Niterói.html", "debug_page_content_Pizzaria_Niterói.html",
+                ])
+            finally:
+                os.chdir(diretorio_original)
+
+
+if __name__ == '__main__':
+    unittest.main()
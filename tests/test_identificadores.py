@@ -0,0 +1,52 @@
+import unittest
+import pandas as pd
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from identificadores import COLUNA_ID, calcular_id_empresa, garantir_id_empresa, normalizar_texto
+
+
+class TestIdentificadores(unittest.TestCase):
+
+    def test_normalizar_texto(self):
+        self.assertEqual(normalizar_texto("  Padaria São João, Ltda. "), "padaria sao joao ltda")
+        self.assertEqual(normalizar_texto("N/A"), "")
+        self.assertEqual(normalizar_texto(float("nan")), "")
+
+    def test_id_estavel_e_insensivel_a_grafia(self):
+        a = calcular_id_empresa("Padaria São João", "Rua A, 10", "Niterói", -22.90001, -43.1)
+        b = calcular_id_empresa("PADARIA SAO JOAO", "rua a 10", "niteroi", "-22.90004", "-43.10000")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, calcular_id_empresa("Padaria São João", "Rua A, 10", "Maricá", -22.9, -43.1))
+        self.assertTrue(-2**63 <= a < 2**63)
+        # Valor fixo: o id precisa ser o mesmo entre processos e versões
+        self.assertEqual(calcular_id_empresa("x", place_id="ChIJ"), -7387148946690383461)
+
+    def test_place_id_tem_prioridade(self):
+        self.assertEqual(
+            calcular_id_empresa("Nome A", "Rua 1", place_id="ChIJabc"),
+            calcular_id_empresa("Nome B", "Rua 2", place_id="ChIJabc"),
+        )
+
+    def test_garantir_id_empresa_preenche_apenas_faltantes(self):
+        df = pd.DataFrame({
+            "nome": ["Loja", "loja", "Outra"],
+            "Endereço": ["Rua A", "RUA A", "Rua B"],
+            "cidade": ["Rio", "Rio", "Rio"],
+            COLUNA_ID: [None, "N/A", 5],
+        })
+        garantir_id_empresa(df)
+        self.assertEqual(str(df[COLUNA_ID].dtype), "Int64")
+        self.assertEqual(df[COLUNA_ID].iloc[0], df[COLUNA_ID].iloc[1])
+        self.assertEqual(df[COLUNA_ID].iloc[0], calcular_id_empresa("Loja", "Rua A", "Rio"))
+        self.assertEqual(df[COLUNA_ID].iloc[2], 5)
+
+    def test_garantir_id_empresa_sem_coluna(self):
+        df = garantir_id_empresa(pd.DataFrame({"nome": ["Loja"], "endereco": ["Rua A"], "cidade": ["Rio"]}))
+        self.assertEqual(df[COLUNA_ID].tolist(), [calcular_id_empresa("Loja", "Rua A", "Rio")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+import types
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from oportunidades import main
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class TestOportunidadesCli(unittest.TestCase):
+
+    def test_importar_cli_nao_carrega_pandas(self):
+        resultado = subprocess.run(
+            [sys.executable, "-c", "import sys, oportunidades; print('pandas' in sys.modules, 'matplotlib' in sys.modules)"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(resultado.stdout.strip(), "False False")
+
+    def test_importar_scraper_serpapi_nao_carrega_aiohttp(self):
+        resultado = subprocess.run(
+            [sys.executable, "-c", "import sys, google_maps_scraper; print('aiohttp' in sys.modules)"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(resultado.stdout.strip(), "False") # Só o modo --async precisa de aiohttp
+
+    def test_importar_scrapers_nao_cria_log(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            subprocess.run(
+                [sys.executable, "-c", "import google_maps_scraper_playwright, google_maps_scraper"],
+                cwd=diretorio, env={**os.environ, "PYTHONPATH": RAIZ}, capture_output=True, check=True,
+            )
+            self.assertEqual(os.listdir(diretorio), []) # Sem scraper_debug.log: o logging só é configurado no main()
+
+    def test_importar_analise_nao_configura_logging(self):
+        resultado = subprocess.run(
+            [sys.executable, "-c",
+             "import logging, analisador_oportunidades, relatorio_comparativo_multicitadino; print(logging.getLogger().handlers)"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(resultado.stdout.strip(), "[]") # basicConfig só roda no main()
+
+    def test_analyze_repassa_argumentos(self):
+        modulo = types.ModuleType("analisador_oportunidades")
+        modulo.main = MagicMock()
+        with patch.dict(sys.modules, {"analisador_oportunidades": modulo}):
+            main(["analyze", "--completo", "--workers", "2"])
+        modulo.main.assert_called_once_with(["--completo", "--workers", "2"])
+
+    def test_scrape_escolhe_engine(self):
+        modulo = types.ModuleType("google_maps_scraper_playwright")
+        modulo.main = MagicMock()
+        with patch.dict(sys.modules, {"google_maps_scraper_playwright": modulo}):
+            main(["scrape", "--engine", "playwright", "--resume"])
+        modulo.main.assert_called_once_with(["--resume"])
+
+    def test_argumento_desconhecido_em_subcomando_sem_repasse(self):
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            main(["consolidate", "--inexistente"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from orquestrador import (
+    BLOQUEADA, EXECUTADA, FALHOU, PULADA, Etapa, EstadoPipeline, executar_pipeline, selecionar_etapas,
+)
+
+
+class TestOrquestrador(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio_original = os.getcwd()
+        self.diretorio = tempfile.mkdtemp()
+        os.chdir(self.diretorio)
+        os.makedirs("entrada")
+        with open("entrada/a.csv", "w") as f:
+            f.write("x\n1\n")
+        self.etapas = [
+            Etapa("base", ("nada.py",), entradas=("entrada/*.csv",), saidas=("base.txt",)),
+            Etapa("ramo1", ("nada.py",), entradas=("base.txt",), saidas=("ramo1.txt",), depende_de=("base",)),
+            Etapa("ramo2", ("nada.py",), entradas=("base.txt",), saidas=("ramo2.txt",), depende_de=("base",)),
+            Etapa("final", ("nada.py",), entradas=("ramo1.txt", "ramo2.txt"), depende_de=("ramo1", "ramo2")),
+        ]
+        self.executadas = []
+        self.simultaneas = 0
+        self.max_simultaneas = 0
+        self.trava = threading.Lock()
+
+    def tearDown(self):
+        os.chdir(self.diretorio_original)
+        shutil.rmtree(self.diretorio)
+
+    def _executar(self, etapa):
+        with self.trava:
+            self.executadas.append(etapa.nome)
+            self.simultaneas += 1
+            self.max_simultaneas = max(self.max_simultaneas, self.simultaneas)
+        time.sleep(0.05)
+        # "base" copia a entrada a.csv; os ramos gravam um conteúdo fixo
+        conteudo = open("entrada/a.csv").read() if etapa.nome == "base" else etapa.nome
+        for saida in etapa.saidas:
+            with open(saida, "w") as f:
+                f.write(conteudo)
+        with self.trava:
+            self.simultaneas -= 1
+        return 0, 0.05
+
+    def _rodar(self, executar=None, **opcoes):
+        self.executadas = []
+        return executar_pipeline(self.etapas, paralelo=2, estado=EstadoPipeline("estado.json"),
+                                 executar=executar or self._executar, log_file_path="log.csv", **opcoes)
+
+    def test_primeira_execucao_roda_tudo_com_ramos_em_paralelo(self):
+        status = self._rodar()
+        self.assertEqual(set(status.values()), {EXECUTADA})
+        self.assertEqual(self.executadas[0], "base")
+        self.assertEqual(self.executadas[-1], "final")
+        self.assertEqual(self.max_simultaneas, 2)
+        with open("log.csv") as f:
+            self.assertEqual(len(f.readlines()), 1 + len(self.etapas))
+
+    def test_segunda_execucao_pula_etapas_em_dia(self):
+        self._rodar()
+        status = self._rodar()
+        self.assertEqual(set(status.values()), {PULADA})
+        self.assertEqual(self.executadas, [])
+
+    def test_entrada_alterada_reexecuta_so_o_necessario(self):
+        self._rodar()
+        with open("entrada/b.csv", "w") as f: # Arquivo novo não muda a saída de "base"
+            f.write("y\n")
+        status = self._rodar()
+        self.assertEqual(status["base"], EXECUTADA)
+        self.assertEqual(status["ramo1"], PULADA)
+
+        with open("entrada/a.csv", "w") as f:
+            f.write("x\n2\n")
+        status = self._rodar()
+        self.assertEqual([status[n] for n in ("base", "ramo1", "ramo2")], [EXECUTADA] * 3)
+        self.assertEqual(status["final"], PULADA) # Os ramos regravaram saídas idênticas
+
+    def test_entrada_apagada_por_etapa_seguinte_nao_reexecuta(self):
+        with open("entrada/sub.csv", "w") as f:
+            f.write("z\n")
+
+        def executar(etapa):
+            retorno = self._executar(etapa)
+            if etapa.nome == "ramo1" and os.path.exists("entrada/sub.csv"):
+                os.remove("entrada/sub.csv") # Como o consolidar com os _sub_*.csv já analisados
+            return retorno
+
+        self._rodar(executar=executar)
+        self.assertFalse(os.path.exists("entrada/sub.csv"))
+        status = self._rodar(executar=executar)
+        self.assertEqual(set(status.values()), {PULADA})
+
+    def test_saida_ausente_e_forcar(self):
+        self._rodar()
+        os.remove("ramo2.txt")
+        status = self._rodar()
+        self.assertEqual(status["ramo2"], EXECUTADA)
+        self.assertEqual(status["ramo1"], PULADA)
+        status = self._rodar(forcar=True)
+        self.assertEqual(set(status.values()), {EXECUTADA})
+
+    def test_falha_bloqueia_dependentes(self):
+        def executar(etapa):
+            retorno = self._executar(etapa)
+            return (1, 0.0) if etapa.nome == "ramo1" else retorno
+        status = executar_pipeline(self.etapas, estado=EstadoPipeline("estado.json"), executar=executar,
+                                   log_file_path="log.csv")
+        self.assertEqual(status["ramo1"], FALHOU)
+        self.assertEqual(status["ramo2"], EXECUTADA)
+        self.assertEqual(status["final"], BLOQUEADA)
+
+    def test_selecionar_etapas(self):
+        self.assertNotIn("scrape", [e.nome for e in selecionar_etapas()])
+        self.assertEqual([e.nome for e in selecionar_etapas(incluir_scrape=True)][0], "scrape")
+        self.assertEqual([e.nome for e in selecionar_etapas(["champions", "report"])], ["report", "champions"])
+        with self.assertRaises(ValueError):
+            selecionar_etapas(["inexistente"])
+
+
+if __name__ == '__main__':
+    unittest.main()
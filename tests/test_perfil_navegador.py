@@ -0,0 +1,36 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from perfil_navegador import deve_bloquear, perfil_configurado
+
+
+class TestPerfilNavegador(unittest.TestCase):
+
+    def test_deve_bloquear(self):
+        self.assertTrue(deve_bloquear("image", "https://lh5.googleusercontent.com/p/abc=w80-h106"))
+        self.assertTrue(deve_bloquear("font", "https://fonts.gstatic.com/s/roboto.woff2"))
+        self.assertTrue(deve_bloquear("fetch", "https://www.google.com/maps/vt/pb=!1m5!1m4!1i14"))
+        self.assertTrue(deve_bloquear("image", "https://khms1.googleapis.com/kh?v=979&x=1"))
+        self.assertFalse(deve_bloquear("document", "https://www.google.com/maps"))
+        self.assertFalse(deve_bloquear("xhr", "https://www.google.com/search?tbm=map&q=pizzaria"))
+        self.assertFalse(deve_bloquear("script", "https://www.google.com/maps/_/js/k=maps.m.pt_BR"))
+
+    def test_perfil_de_producao_e_visivel(self):
+        with patch.dict(os.environ, {"SCRAPER_VIEWPORT": "800x600", "SCRAPER_HEADLESS": "1"}):
+            perfil = perfil_configurado()
+        self.assertTrue(perfil.headless and perfil.bloquear_recursos)
+        self.assertEqual(perfil.opcoes_contexto(), {"viewport": {"width": 800, "height": 600}})
+        self.assertEqual(perfil.argumentos, [])
+
+        visivel = perfil_configurado(visivel=True)
+        self.assertFalse(visivel.headless or visivel.bloquear_recursos)
+        self.assertEqual(visivel.opcoes_contexto(), {"no_viewport": True})
+        self.assertEqual(visivel.argumentos, ["--start-maximized"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+import aiohttp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache_buscas import CacheBuscas
+from replay_scraper import (ServidorReplay, caminho_maps, caminho_serpapi, exportar_cache, gravar_pagina_maps,
+                            gravar_resposta_serpapi, nicho_cidade_da_consulta)
+from serpapi_async import buscar_pares_async
+
+FIXTURE_HTML = os.path.join(os.path.dirname(__file__), "fixtures", "debug_page_content.html")
+
+
+def pagina_local(nicho, quantidade):
+    return {"local_results": [{"title": f"{nicho} {i}", "rating": 4.5, "reviews": 10} for i in range(quantidade)]}
+
+
+class TestReplayScraper(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.gravacoes = os.path.join(self.base_path, "replay")
+        gravar_resposta_serpapi(self.gravacoes, "google_local", "Pizzaria", "Niterói", 0,
+                                {**pagina_local("Pizzaria", 20), "serpapi_pagination": {"next": "..."}})
+        gravar_resposta_serpapi(self.gravacoes, "google_local", "Pizzaria", "Niterói", 1, pagina_local("Pizzaria", 3))
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def test_nicho_cidade_da_consulta(self):
+        self.assertEqual(nicho_cidade_da_consulta("Pizzaria em São Gonçalo, Rio de Janeiro"), ("Pizzaria", "São Gonçalo"))
+        self.assertEqual(nicho_cidade_da_consulta("Aulas em grupo em Niterói, Rio de Janeiro"), ("Aulas em grupo", "Niterói"))
+
+    def test_exportar_cache_grava_so_respostas_da_serpapi(self):
+        with CacheBuscas(os.path.join(self.base_path, "cache.sqlite")) as cache:
+            cache.salvar("google_maps", "Bar", "Maricá", 0, pagina_local("Bar", 2))
+            cache.salvar("google_local", "Bar", "Maricá", 0, {"error": "sem resultados"})
+            cache.salvar("playwright", "Bar", "Maricá", 0, [{"nome": "Bar 0"}])
+            destino = os.path.join(self.base_path, "exportado")
+            self.assertEqual(exportar_cache(cache, destino), 1)
+        self.assertTrue(os.path.exists(caminho_serpapi(destino, "google_maps", "Bar", "Maricá", 0)))
+
+    async def test_replay_serpapi_async_com_par_nao_gravado(self):
+        async with ServidorReplay(self.gravacoes) as servidor:
+            empresas = await buscar_pares_async(
+                [("Pizzaria", "Niterói"), ("Bar", "Niterói")], "chave", max_pages=5, base_url=servidor.url_serpapi,
+                req_por_segundo=1000, atraso_inicial=0.01,
+            )
+        self.assertEqual(len(empresas), 23) # Duas páginas gravadas; a segunda, incompleta, encerra a paginação
+        self.assertEqual(servidor.requisicoes, 2 + 2 * 2) # "Bar": duas tentativas em cada engine
+        self.assertEqual(servidor.nao_gravadas, 4)
+
+    async def test_injecao_de_erros_e_latencia(self):
+        async with ServidorReplay(self.gravacoes, latencia_ms=(20, 20), taxa_erros=1.0) as servidor:
+            inicio = asyncio.get_running_loop().time()
+            empresas = await buscar_pares_async([("Pizzaria", "Niterói")], "chave", base_url=servidor.url_serpapi,
+                                                req_por_segundo=1000, atraso_inicial=0.01)
+            decorrido = asyncio.get_running_loop().time() - inicio
+        self.assertEqual(empresas, [])
+        self.assertEqual(servidor.erros_injetados, servidor.requisicoes)
+        self.assertGreaterEqual(decorrido, servidor.requisicoes * 0.02)
+
+    async def test_gravacao_durante_a_busca(self):
+        destino = os.path.join(self.base_path, "gravado")
+        with mock.patch.dict(os.environ, {"SCRAPER_GRAVAR_REPLAY": destino}):
+            async with ServidorReplay(self.gravacoes) as servidor:
+                await buscar_pares_async([("Pizzaria", "Niterói")], "chave", base_url=servidor.url_serpapi, req_por_segundo=1000)
+        for pagina in (0, 1):
+            with open(caminho_serpapi(self.gravacoes, "google_local", "Pizzaria", "Niterói", pagina), encoding="utf-8") as f:
+                original = f.read()
+            with open(caminho_serpapi(destino, "google_local", "Pizzaria", "Niterói", pagina), encoding="utf-8") as f:
+                self.assertEqual(f.read(), original)
+
+    async def test_replay_cliente_sincrono(self):
+        import google_maps_scraper
+
+        ambiente = {"SERPAPI_API_KEY": "chave", "SCRAPER_GRAVAR_REPLAY": ""}
+        async with ServidorReplay(self.gravacoes) as servidor:
+            ambiente["SERPAPI_BASE_URL"] = servidor.url_serpapi
+            with mock.patch.dict(os.environ, ambiente), \
+                    mock.patch.object(google_maps_scraper, "INTERVALO_ENTRE_PAGINAS", (0, 0)):
+                empresas = await asyncio.to_thread(google_maps_scraper.buscar_empresas, "Pizzaria", "Niterói", 5)
+        self.assertEqual([e.nome for e in empresas][:2], ["Pizzaria 0", "Pizzaria 1"])
+        self.assertEqual(len(empresas), 23)
+
+    async def test_replay_maps(self):
+        with open(FIXTURE_HTML, encoding="utf-8") as f:
+            gravar_pagina_maps(self.gravacoes, "Pizzaria", "Niterói", f.read())
+        self.assertTrue(os.path.exists(caminho_maps(self.gravacoes, "Pizzaria", "Niterói")))
+
+        async with ServidorReplay(self.gravacoes) as servidor, aiohttp.ClientSession() as sessao:
+            async with sessao.get(servidor.url_maps) as resposta:
+                self.assertIn('id="searchboxinput"', await resposta.text())
+            async with sessao.get(f"{servidor.url_maps}/busca", params={"cidade": "Niterói", "nicho": "Pizzaria"}) as resposta:
+                self.assertIn("Pizzaria Bella Napoli", await resposta.text())
+            async with sessao.get(f"{servidor.url_maps}/busca", params={"cidade": "Niterói", "nicho": "Bar"}) as resposta:
+                self.assertNotIn("Nv2PK", await resposta.text())
+        self.assertEqual(servidor.nao_gravadas, 1)
+
+    async def test_busca_playwright_no_replay(self):
+        import google_maps_scraper_playwright
+        from perfil_navegador import PerfilNavegador
+
+        with open(FIXTURE_HTML, encoding="utf-8") as f:
+            gravar_pagina_maps(self.gravacoes, "Pizzaria", "Niterói", f.read())
+        diretorio_original = os.getcwd()
+        os.chdir(self.base_path) # HTML de depuração e capturas de tela ficam no diretório temporário
+        try:
+            async with ServidorReplay(self.gravacoes) as servidor:
+                ambiente = {"GOOGLE_MAPS_URL": servidor.url_maps, "SCRAPER_CORTESIA_MS": "0,0", "SCRAPER_GRAVAR_REPLAY": ""}
+                with mock.patch.dict(os.environ, ambiente):
+                    try:
+                        empresas = await google_maps_scraper_playwright.buscar_google_maps(
+                            "Pizzaria", "Niterói", PerfilNavegador(bloquear_recursos=False),
+                        )
+                    except Exception as e: # Chromium não instalado (playwright install chromium)
+                        self.skipTest(f"Chromium indisponível: {e}")
+        finally:
+            os.chdir(diretorio_original)
+
+        self.assertEqual([e.nome for e in empresas], ["Pizzaria Bella Napoli", "Forno & Massa", "Pizza Express"])
+        self.assertGreater(servidor.requisicoes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from diario_execucao import DiarioExecucao
+from saida_scraper import (
+    EscritorEmpresas, caminho_saida_padrao, caminho_saida_par, gravar_empresas_do_par, preparar_empresas, rotacionar_saida_padrao,
+)
+
+
+class TestSaidaScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.base_path = tempfile.mkdtemp()
+        os.chdir(self.base_path)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.base_path)
+
+    def test_modo_default_acrescenta_por_par(self):
+        colunas = ["nicho", "cidade", "nome", "nota", "reviews"]
+        df_a = preparar_empresas([{"nicho": "NichoX", "cidade": "CidadeA", "nome": "Empresa1", "nota": "4.5"}], colunas)
+        df_b = preparar_empresas([{"cidade": "CidadeB", "nicho": "NichoX", "nome": "Empresa2", "reviews": 3}], colunas)
+        gravar_empresas_do_par(df_a, "NichoX", "CidadeA", "default")
+        gravar_empresas_do_par(df_b, "NichoX", "CidadeB", "default")
+
+        df = pd.read_csv(caminho_saida_padrao(), encoding="utf-8-sig")
+        self.assertEqual(df.columns.tolist(), colunas)
+        self.assertEqual(df["nome"].tolist(), ["Empresa1", "Empresa2"])
+        self.assertEqual(df["reviews"].tolist(), [0, 3])
+
+        rotacionar_saida_padrao()
+        self.assertFalse(os.path.exists(caminho_saida_padrao()))
+        self.assertEqual(len([f for f in os.listdir(os.path.join("results", "csv")) if "_sub_" in f]), 1)
+
+    def test_cabecalho_sem_colunas_canonicas_rotaciona(self):
+        os.makedirs(os.path.join("results", "csv"))
+        with open(caminho_saida_padrao(), "w", encoding="utf-8-sig") as f:
+            f.write("nicho,cidade,nome,Endereço\nNichoX,CidadeA,Antiga,Rua 1\n")
+        df = preparar_empresas([{"nicho": "NichoX", "cidade": "CidadeA", "nome": "Nova", "place_id": "ChIJ1"}])
+        gravar_empresas_do_par(df, "NichoX", "CidadeA", "default")
+
+        novo = pd.read_csv(caminho_saida_padrao(), encoding="utf-8-sig")
+        self.assertEqual(novo.columns.tolist(), df.columns.tolist()) # id_empresa e place_id preservados
+        self.assertEqual(novo["place_id"].tolist(), ["ChIJ1"])
+        self.assertEqual(novo["id_empresa"].tolist(), df["id_empresa"].tolist())
+        antigos = [f for f in os.listdir(os.path.join("results", "csv")) if "_sub_" in f]
+        self.assertEqual(len(antigos), 1)
+        self.assertEqual(pd.read_csv(os.path.join("results", "csv", antigos[0]), encoding="utf-8-sig")["nome"].tolist(), ["Antiga"])
+
+    def test_resume_desfaz_gravacao_interrompida(self):
+        pares = [("NichoX", "CidadeA"), ("NichoX", "CidadeB")]
+        caminho_diario = os.path.join("data", "diario.sqlite")
+        with DiarioExecucao("serpapi", caminho=caminho_diario) as diario:
+            diario.preparar(pares)
+            escritor = EscritorEmpresas("default", diario=diario)
+            diario.marcar_em_andamento("NichoX", "CidadeA")
+            diario.marcar_concluido("NichoX", "CidadeA", escritor.escrever_par("NichoX", "CidadeA", [{"nome": "E1"}]))
+            diario.marcar_em_andamento("NichoX", "CidadeB")
+            escritor.escrever_par("NichoX", "CidadeB", [{"nome": "E2"}, {"nome": "E3"}]) # Queda antes do concluido
+
+        with DiarioExecucao("serpapi", caminho=caminho_diario) as diario:
+            self.assertEqual(diario.preparar(pares, retomar=True), [("NichoX", "CidadeB")])
+            escritor = EscritorEmpresas("default", diario=diario)
+            self.assertTrue(escritor.desfazer_gravacao_interrompida())
+            self.assertEqual(pd.read_csv(caminho_saida_padrao(), encoding="utf-8-sig")["nome"].tolist(), ["E1"])
+            diario.marcar_em_andamento("NichoX", "CidadeB")
+            diario.marcar_concluido("NichoX", "CidadeB", escritor.escrever_par("NichoX", "CidadeB", [{"nome": "E2"}, {"nome": "E3"}]))
+            self.assertIsNone(diario.posicao_saida_interrompida())
+            self.assertFalse(escritor.desfazer_gravacao_interrompida())
+
+        self.assertEqual(pd.read_csv(caminho_saida_padrao(), encoding="utf-8-sig")["nome"].tolist(), ["E1", "E2", "E3"])
+
+    def test_resume_remove_arquivo_criado_pela_gravacao_interrompida(self):
+        with DiarioExecucao("serpapi", caminho=os.path.join("data", "diario.sqlite")) as diario:
+            diario.preparar([("NichoX", "CidadeA")])
+            diario.marcar_em_andamento("NichoX", "CidadeA")
+            EscritorEmpresas("default", diario=diario).escrever_par("NichoX", "CidadeA", [{"nome": "E1"}])
+            self.assertEqual(diario.posicao_saida_interrompida(), 0)
+            self.assertTrue(EscritorEmpresas("default", diario=diario).desfazer_gravacao_interrompida())
+        self.assertFalse(os.path.exists(caminho_saida_padrao()))
+
+    def test_modo_expansao_grava_arquivo_do_par(self):
+        df = preparar_empresas([{"nicho": "Nicho/X", "cidade": "Cidade A", "nome": "Empresa1"}])
+        gravar_empresas_do_par(df, "Nicho/X", "Cidade A", "expansao")
+        caminho = caminho_saida_par("Nicho/X", "Cidade A")
+        self.assertTrue(caminho.endswith("dados_empresas_Nicho_X_Cidade_A.csv"))
+        self.assertEqual(pd.read_csv(caminho)["nome"].tolist(), ["Empresa1"])
+
+    def test_resumo_incremental_igual_ao_groupby(self):
+        pares = {
+            ("NichoX", "CidadeA"): [{"nome": "E1", "nota": 4.0, "reviews": 10}, {"nome": "E2", "nota": "3,5", "reviews": None}],
+            ("NichoY", "CidadeA"): [{"nome": "E3", "nota": 5, "reviews": 2}],
+            ("NichoX", "CidadeB"): [{"nome": "E4", "nota": None, "reviews": 7}],
+        }
+        escritor = EscritorEmpresas("default")
+        for (nicho, cidade), dados in pares.items():
+            escritor.escrever_par(nicho, cidade, [{"nicho": nicho, "cidade": cidade, **d} for d in dados])
+        self.assertEqual(escritor.linhas_escritas, 4)
+
+        df = pd.read_csv(caminho_saida_padrao(), encoding="utf-8-sig")
+        esperado = df.groupby(["cidade", "nicho"]).agg({"nome": "count", "nota": "mean", "reviews": "sum"}).rename(
+            columns={"nome": "quantidade_empresas", "nota": "nota_media", "reviews": "total_reviews"}
+        )
+        pd.testing.assert_frame_equal(escritor.resumo(), esperado, check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache_buscas import CacheBuscas
+from serpapi_async import TokenBucket, buscar_pares_async, extrair_empresas_serpapi
+
+
+def pagina_local(nicho, inicio, quantidade, proxima=True):
+    return {
+        "local_results": [
+            {"title": f"{nicho} {inicio + i}", "rating": "4.5", "reviews": 10, "address": "Rua A",
+             "gps_coordinates": {"latitude": -22.9, "longitude": -43.2}}
+            for i in range(quantidade)
+        ],
+        "serpapi_pagination": {"next": "..."} if proxima else {},
+    }
+
+
+class StubSerpApi:
+    """Servidor HTTP local que imita a SerpAPI: google_local falha para 'NichoFallback'."""
+
+    def __init__(self):
+        self.requisicoes = []
+
+    async def handler(self, request):
+        params = dict(request.query)
+        self.requisicoes.append(params)
+        nicho = params["q"].split(" em ")[0]
+        inicio = int(params["start"])
+        if params["engine"] == "google_local" and nicho == "NichoFallback":
+            return web.json_response({"error": "Google hasn't returned any results for this query."})
+        if params["engine"] == "google_maps":
+            return web.json_response({"local_results": [{"title": f"{nicho} maps"}]})
+        if inicio == 0:
+            return web.json_response(pagina_local(nicho, inicio, 20))
+        return web.json_response(pagina_local(nicho, inicio, 5, proxima=False))
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/search.json", self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        porta = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{porta}/search.json"
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.runner.cleanup()
+
+
+class TestSerpApiAsync(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def test_extrair_empresas_serpapi(self):
+        results = {"local_results": {"places": [{"title": "A", "rating": "x"}, {"rating": 5}]}}
+        empresas = extrair_empresas_serpapi(results, "NichoX", "CidadeA")
+        self.assertEqual(len(empresas), 1) # Sem nome é ignorada
+        self.assertEqual((empresas[0].nome, empresas[0].nota, empresas[0].reviews), ("A", 0, 0))
+
+    async def test_paginacao_fallback_e_cache(self):
+        pares = [("NichoX", "CidadeA"), ("NichoFallback", "CidadeA"), ("NichoY", "CidadeB")]
+        with CacheBuscas(os.path.join(self.base_path, "cache.sqlite")) as cache:
+            async with StubSerpApi() as stub:
+                opcoes = dict(max_pages=3, cache=cache, base_url=stub.url, concorrencia=3,
+                              req_por_segundo=1000, atraso_inicial=0.01)
+                empresas = await buscar_pares_async(pares, "chave", **opcoes)
+
+                # Páginas param quando a página vem incompleta; NichoFallback cai no google_maps
+                por_nicho = {}
+                for empresa in empresas:
+                    por_nicho[empresa.nicho] = por_nicho.get(empresa.nicho, 0) + 1
+                self.assertEqual(por_nicho, {"NichoX": 25, "NichoFallback": 1, "NichoY": 25})
+                self.assertEqual([e.nicho for e in empresas][:25], ["NichoX"] * 25) # Ordem dos pares
+                self.assertTrue(all(r["api_key"] == "chave" for r in stub.requisicoes))
+                requisicoes_primeira_rodada = len(stub.requisicoes)
+
+                # Segunda rodada sai do cache; só as respostas de erro (não cacheadas) são refeitas.
+                # Com ao_concluir, cada par vai para o callback e nada é acumulado.
+                concluidos = {}
+                novamente = await buscar_pares_async(
+                    pares, "chave", ao_concluir=lambda n, c, dados, erro: concluidos.update({(n, c): len(dados)}), **opcoes
+                )
+                self.assertEqual(novamente, [])
+                self.assertEqual(concluidos, {("NichoX", "CidadeA"): 25, ("NichoFallback", "CidadeA"): 1, ("NichoY", "CidadeB"): 25})
+                self.assertEqual(len(stub.requisicoes), requisicoes_primeira_rodada + 2)
+
+    async def test_token_bucket_limita_taxa(self):
+        limitador = TokenBucket(taxa=20, capacidade=1)
+        inicio = time.monotonic()
+        for _ in range(5):
+            await limitador.adquirir()
+        self.assertGreaterEqual(time.monotonic() - inicio, 4 / 20 * 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()